@@ -1,24 +1,43 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import base64
-import io
 import json
 import os
 import random
-import time
 import uuid
+from contextlib import asynccontextmanager
 
 import gradio as gr
-import requests
+import httpx
 from dotenv import load_dotenv
 from loguru import logger
-from pydub import AudioSegment
 from scipy.io import wavfile
+from audio_preprocess import normalize_audio
+from audio_transport import get_transport_codec, tag_codec
+from long_text import get_long_text_chunker
+from output_store import get_output_store
+from poll_scheduler import get_poll_scheduler
+from queue_lanes import get_queue_lanes
+from result_cache import (
+    SingleFlight,
+    get_encoded_audio_cache,
+    get_result_cache,
+    get_transcript_cache,
+    make_cache_key,
+)
 from tab_uniaudio_demo import MingOmniTTSDemoTab
+from task_journal import get_task_journal
+from task_manager import CANCELLED, DONE, TIMED_OUT, get_task_manager, submitted_task_id
+from webgw_client import AsyncWebGWClient
+from webgw_log import get_dump_sampler, get_log_queue
 
 # 加载 .secret 文件中的环境变量
 load_dotenv(dotenv_path=".secret")
 
-blank_rate, blank_audio_data = wavfile.read("./audio/blank.wav")
+BLANK_AUDIO_PATH = "./audio/blank.wav"
+blank_rate, blank_audio_data = wavfile.read(BLANK_AUDIO_PATH)
+# SpeechService 提交的任务在任务日志中记录的 owner
+TASK_JOURNAL_OWNER = "speech_service"
 
 
 # 模型服务类 ===========================================================
@@ -31,17 +50,40 @@ class SpeechService:
         self.WEB_GW_API_URL = os.environ.get("WEB_GW_API_URL")
         self.WEB_GW_API_KEY = os.environ.get("WEB_GW_API_KEY")
         self.WEB_GW_APP_ID = os.environ.get("WEB_GW_APP_ID")
+        self.webgw_client = AsyncWebGWClient(
+            self.WEB_GW_API_URL, self.WEB_GW_API_KEY, self.WEB_GW_APP_ID
+        )
+        self.poll_scheduler = get_poll_scheduler()
+        self.tasks = get_task_manager()
+        self.result_cache = get_result_cache()
+        self.transcript_cache = get_transcript_cache()
+        self.audio_b64_cache = get_encoded_audio_cache()
+        self.audio_codec = get_transport_codec()
+        self.output_store = get_output_store()
+        self.long_text = get_long_text_chunker()
+        self.journal = get_task_journal()
+        # task_id -> result cache key, for tasks whose result should be cached once done
+        self._result_cache_keys = {}
+        self.inflight = SingleFlight()
+        # 长文本任务 ID -> 各句的 task_id
+        self._chunked_tasks = {}
 
         # Other configs
         self.dump_reqs = os.environ.get("DUMP_REQS", "false").lower() == "true"
+        self.dump_sampler = get_dump_sampler()
+        self.log_queue = get_log_queue()
+        self.batch_poll = os.environ.get("WEBGW_BATCH_POLL", "false").lower() == "true"
         self.sample_rate = 16000  # Gradio expects a sample rate for audio output
 
+        if self.batch_poll:
+            self._register_batch_polls()
+
         logger.info(f"SpeechService initialized. Using Intranet API: {self.use_intranet_api}")
         if not self.use_intranet_api:
             logger.info(f"WebGW API URL: {self.WEB_GW_API_URL}")
             logger.info(f"WebGW APP ID: {self.WEB_GW_APP_ID}")
 
-    def _call_webgw_api(
+    async def _call_webgw_api(
         self, call_name: str, call_args: dict, api_project: str = "251220-ming-uniaudio"
     ) -> dict:
         """
@@ -53,50 +95,36 @@ class SpeechService:
             return {"success": False, "errorMessage": error_msg}
 
         api_url = self.WEB_GW_API_URL
-        request_body = {
-            "api_key": self.WEB_GW_API_KEY,
-            "api_project": api_project,
-            "call_name": call_name,
-            "call_token": "token",  # Placeholder
-            "call_args": call_args,
-        }
-        headers = {
-            "Content-Type": "application/json",
-            "x-webgw-appid": self.WEB_GW_APP_ID,
-            "x-webgw-version": "2.0",
-        }
+        request_body = self.webgw_client.build_request_body(
+            api_project, call_name, call_args, call_token="token"  # Placeholder
+        )
+        headers = self.webgw_client.headers
 
         try:
-            if self.dump_reqs:
-                try:
-                    payload_str = json.dumps(request_body, indent=2, ensure_ascii=False)
-                    log_message = (
-                        f"---- DUMP_REQS (WebGW): Start Request ----\n"
-                        f"URL         : {api_url}\n"
-                        f"Headers     : {json.dumps(headers, indent=2)}\n"
-                        # payload_str may be large, consider truncating if necessary (4KB)
-                        f"Payload     : {payload_str[:4096]}{'... [truncated]' if len(payload_str) > 4096 else ''}\n"
-                        f"---- DUMP_REQS (WebGW): End Request ----"
-                    )
-                    logger.info(log_message)
-                except Exception as e:
-                    logger.warning(
-                        f"DUMP_REQS: Failed to serialize WebGW request data for logging: {e}"
-                    )
+            if self.dump_reqs and self.dump_sampler():
+                # Rendered on the log thread, with base64 audio cut down to its length.
+                self.log_queue.log(
+                    "INFO",
+                    "---- DUMP_REQS (WebGW): Start Request ----\n"
+                    "URL         : {}\n"
+                    "Headers     : {}\n"
+                    "Payload     : {}\n"
+                    "---- DUMP_REQS (WebGW): End Request ----",
+                    api_url,
+                    headers,
+                    request_body,
+                )
 
-            response = requests.post(api_url, headers=headers, json=request_body, timeout=20)
+            response = await self.webgw_client.post(request_body, timeout=20)
             response.raise_for_status()
 
             response_data = response.json()
 
-            # response_data may be large, consider truncating if necessary (4KB)
-            logger.info(
-                f"WebGW API response data: {json.dumps(response_data, indent=2)[:4096]}{'... [truncated]' if len(json.dumps(response_data)) > 4096 else ''}"
-            )
+            # Poll responses carry the output audio; it is elided on the log thread (4KB max)
+            self.log_queue.log("INFO", "WebGW API response data: {}", response_data)
 
             # response headers
-            resp_headers = response.headers
-            logger.info(f"WebGW API response headers: {resp_headers}")
+            self.log_queue.log("INFO", "WebGW API response headers: {}", response.headers)
 
             # Transform the WebGW response to mimic the intranet response structure.
             if response_data.get("success"):
@@ -116,7 +144,7 @@ class SpeechService:
                 logger.error(f"WebGW API call failed: {error_msg}")
                 return {"success": False, "errorMessage": error_msg}
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"WebGW API request failed: {e}")
             return {"success": False, "errorMessage": f"API request failed: {e}"}
         except json.JSONDecodeError as e:
@@ -127,107 +155,356 @@ class SpeechService:
 
     def _preprocess_audio(self, audio_path: str) -> str:
         """
-        Conditionally converts an audio file to a 16kHz, single-channel WAV file using pydub.
-        Only processes files identified as microphone recordings (e.g., 'audio.wav').
+        Converts an audio file to a 16kHz, single-channel 16-bit WAV file before upload.
+        Files whose RIFF header already says so are sent as they are; WAV/PCM is resampled
+        in-process and other formats go through ffmpeg (see audio_preprocess).
         Returns the path to the converted file, or original path if not processed, or None on failure.
         """
         if not audio_path or not os.path.exists(audio_path):
             logger.error(f"Audio file not found or path is empty: {audio_path}")
             return None
 
-        # Heuristic: Only process if it's a generic recording filename.
-        # Assuming 'audio.wav' is the default name for microphone recordings from Gradio.
-        if os.path.basename(audio_path) == "audio.wav":
-            try:
-                logger.info(
-                    f"Detected microphone recording: {audio_path}. Starting preprocessing..."
-                )
-                audio = AudioSegment.from_file(audio_path)
+        try:
+            output_path = normalize_audio(audio_path, self.output_store)
+        except Exception as e:
+            # The backend accepted unconverted uploads before, so send the original as a fallback.
+            logger.warning(f"Failed to preprocess '{audio_path}', uploading it unchanged: {e}")
+            return audio_path
 
-                audio = audio.set_frame_rate(16000).set_channels(1)
+        if output_path == audio_path:
+            logger.info(f"{audio_path} is already 16kHz mono PCM. Skipping preprocessing.")
+        else:
+            logger.info(f"Preprocessed {audio_path} to: {output_path}")
+        return output_path
 
-                # Export to a new file in the same directory (or a temp one if preferred)
-                # Using a distinct name to avoid overwriting original if it's not a temp file
-                output_path = f"{os.path.splitext(audio_path)[0]}_16k_mono.wav"
-                audio.export(output_path, format="wav")
+    def _register_batch_polls(self):
+        """为各类轮询注册批量查询函数：每个调度周期每类任务只发一次 WebGW 请求"""
+        self.poll_scheduler.register_batch(
+            "non-edit", lambda task_ids: self._poll_batch("call-non-edit-model", task_ids)
+        )
+        self.poll_scheduler.register_batch(
+            "edit", lambda task_ids: self._poll_batch("call-edit-model", task_ids)
+        )
+        self.poll_scheduler.register_batch(
+            "instruct",
+            lambda task_ids: self._poll_batch(
+                "poll_task", task_ids, api_project="260113-ming-uniaudio-instruct"
+            ),
+        )
 
-                logger.info(f"Successfully preprocessed microphone recording to: {output_path}")
-                return output_path
-            except Exception as e:
-                logger.error(f"Failed to preprocess microphone recording '{audio_path}': {e}")
-                return None
-        else:
-            logger.info(
-                f"Detected uploaded file: {audio_path}. Skipping preprocessing as per user instruction."
+    async def _poll_batch(
+        self, call_name: str, task_ids: list, api_project: str = "251220-ming-uniaudio"
+    ) -> dict:
+        """
+        Polls several tasks in one WebGW call (call_args={"task_ids": [...]}).
+        Returns {task_id: poll_response}, each shaped like the response of a single poll.
+        """
+        response = await self._call_webgw_api(
+            call_name=call_name, call_args={"task_ids": task_ids}, api_project=api_project
+        )
+        if not response.get("success"):
+            raise RuntimeError(response.get("errorMessage", "Batch poll failed"))
+
+        result_content = response.get("resultMap", {}).get("result")
+        if isinstance(result_content, str):
+            result_content = json.loads(result_content)
+        result_content = result_content or {}
+
+        # The 251220 project wraps results as {"success": "True", "data": {...}},
+        # the instruct project returns them bare; each task result is wrapped the same way.
+        wrapped = "data" in result_content
+        if wrapped and result_content.get("success") != "True":
+            raise RuntimeError(result_content.get("errMsg", "Batch poll failed"))
+        tasks = (result_content["data"] if wrapped else result_content).get("tasks") or {}
+
+        return {
+            task_id: {
+                "success": True,
+                "resultMap": {"result": {"success": "True", "data": task} if wrapped else task},
+            }
+            for task_id, task in tasks.items()
+        }
+
+    async def _cached_task(self, task_type: str, cache_key: str):
+        """
+        查询结果缓存。命中时返回一个伪 task_id，并把缓存结果直接登记到轮询调度器，
+        之后的状态查询立即返回结果，不再请求后端。
+        """
+        result = await asyncio.to_thread(self.result_cache.get, cache_key)
+        if result is None:
+            return None
+        if any(
+            self.output_store.owns(value) and not self.output_store.touch(value) for value in result
+        ):
+            return None  # 结果中的音频文件已被输出目录清理
+        return self._resolved_task(task_type, cache_key, result)
+
+    def _resolved_task(self, task_type: str, cache_key: str, result: tuple) -> str:
+        task_id = f"cached-{cache_key[:32]}"
+        self.tasks.resolve(task_type, task_id, result)
+        logger.info(f"{task_type} result served from cache: {cache_key}")
+        return task_id
+
+    async def _coalesced(self, cache_key: str, submit) -> str:
+        """
+        相同请求（同一 cache_key）在途时共用同一个后端任务：并发或重复提交直接拿到进行中
+        任务的 task_id，共享同一轮询结果；任务结束（或提交失败）后释放。
+        """
+        return await self.inflight.run(
+            cache_key, submit, keep=lambda task_id: not task_id.startswith("错误:")
+        )
+
+    async def _track_task(self, kind: str, task_id: str, cache_key: str):
+        """登记刚提交的任务：完成后结果写入缓存，并记入任务日志以便服务重启后继续轮询"""
+        self._result_cache_keys[task_id] = cache_key
+        await asyncio.to_thread(self.journal.record, TASK_JOURNAL_OWNER, kind, task_id, cache_key)
+
+    def watch_task(self, kind: str, task_id: str):
+        """登记一个等待任务结果的会话；长文本任务本身就是其各句任务的等待者，无需登记"""
+        if task_id not in self._chunked_tasks:
+            self.tasks.watch(kind, task_id)
+
+    async def release_task(self, kind: str, task_id: str):
+        """
+        会话不再等待任务结果（关闭了页面或提交了新任务）。没有会话等待的任务随即取消：
+        停止轮询，并请求后端停止计算。
+        """
+        chunk_ids = self._chunked_tasks.pop(task_id, None)
+        if chunk_ids is None:
+            await self.tasks.release(kind, task_id)
+            return
+        await self.tasks.cancel(f"{kind}-long", task_id)
+        await self._release_chunks(kind, chunk_ids)
+
+    async def _release_chunks(self, kind: str, chunk_ids: list):
+        """长文本任务不再等待其各句任务：不再有人等待的句子任务随即取消"""
+        await asyncio.gather(*(self.tasks.release(kind, chunk_id) for chunk_id in chunk_ids))
+
+    async def _cancel_task(self, task_id: str, api_project: str = "251220-ming-uniaudio"):
+        """请求后端取消任务（由任务管理器在任务被取消时调用）"""
+        response = await self._call_webgw_api(
+            call_name="cancel_task", call_args={"task_id": task_id}, api_project=api_project
+        )
+        if not response.get("success"):
+            raise ConnectionError(response.get("errorMessage", "取消请求失败"))
+        logger.info(f"Backend task {task_id} cancelled")
+
+    async def resume_tasks(self, timeout: float = 600):
+        """
+        服务重启后继续轮询任务日志中尚未完成的任务，结果照常写入结果缓存。
+        期间相同的请求直接加入这些任务，不会重新提交。
+        """
+        entries = await asyncio.to_thread(self.journal.pending, TASK_JOURNAL_OWNER)
+        if not entries:
+            return
+        logger.info(f"Resuming {len(entries)} unfinished SpeechService tasks")
+        checks = {
+            "tts": self.tts_check_task,
+            "asr": self.asr_check_task,
+            "edit": self.edit_check_task,
+            "instruct": self.poll_instruct_task,
+        }
+
+        async def resume(entry):
+            self._result_cache_keys[entry.task_id] = entry.cache_key
+            if entry.cache_key:
+                self.inflight.adopt(entry.cache_key, entry.task_id)
+            deadline = asyncio.get_running_loop().time() + timeout
+            while asyncio.get_running_loop().time() < deadline:
+                result = await checks[entry.kind](entry.task_id)
+                if result[0] != "pending":
+                    return
+                await asyncio.sleep(self.poll_scheduler.interval)
+            logger.warning(f"Resumed {entry.kind} task {entry.task_id} timed out")
+            self.inflight.release(self._result_cache_keys.pop(entry.task_id, None))
+
+        await asyncio.gather(*(resume(entry) for entry in entries if entry.kind in checks))
+
+    async def _scheduled_check(
+        self,
+        task_type: str,
+        task_id: str,
+        check_once,
+        pending: tuple,
+        error: tuple = ("错误: {}", None),
+        batch_group: str = None,
+        cancel_fn=None,
+    ) -> tuple:
+        """
+        通过任务管理器查询任务：已完成则返回结果，超时或已取消返回按 error 模板（其中的 "{}"
+        替换为错误信息）构造的错误，否则返回 pending。任务被取消时调用 cancel_fn 请求后端停止计算。
+        """
+        self.tasks.track(
+            task_type,
+            task_id,
+            check_once,
+            batch=(batch_group, task_id) if batch_group else None,
+            on_finish=self._task_finished,
+            cancel_fn=cancel_fn,
+        )
+        record = await self.tasks.check(task_type, task_id)
+        if record.state in (TIMED_OUT, CANCELLED):
+            message = "任务超时" if record.state == TIMED_OUT else "任务已取消"
+            return tuple(slot.format(message) if isinstance(slot, str) else slot for slot in error)
+        return record.result if record.final else pending
+
+    async def _task_finished(self, record):
+        """任务结束（完成、失败或超时）时写入结果缓存和任务日志，并结束相同请求的合并"""
+        result = record.result
+        if record.task_id in self._result_cache_keys:
+            await asyncio.to_thread(
+                self.journal.finish,
+                TASK_JOURNAL_OWNER,
+                record.task_id,
+                record.state,
+                result[1:] if record.state == DONE else result and result[0],
             )
-            return audio_path
+        cache_key = self._result_cache_keys.pop(record.task_id, None)
+        if cache_key and record.state == DONE:
+            await asyncio.to_thread(self.result_cache.put, cache_key, result)
+            if record.kind == "asr":
+                await asyncio.to_thread(self.transcript_cache.put, cache_key, result[1])
+        self.inflight.release(cache_key)
+
+    async def _start_chunked_task(self, task_type: str, starts: list) -> str:
+        """
+        长文本模式：各句作为独立任务并发提交（每句照常走结果缓存和请求合并），
+        返回代表整段文本的 task_id；任一句提交失败则返回其错误。
+        """
+        chunk_ids = await asyncio.gather(*starts)
+        errors = [chunk_id for chunk_id in chunk_ids if chunk_id.startswith("错误:")]
+        submitted = [chunk_id for chunk_id in chunk_ids if not chunk_id.startswith("错误:")]
+        # 长文本任务作为各句任务的等待者：它失败或被释放时，其余句子任务若无人等待即被取消
+        for chunk_id in submitted:
+            self.tasks.watch(task_type, chunk_id)
+        if errors:
+            await self._release_chunks(task_type, submitted)
+            return errors[0]
+        task_id = f"long-{uuid.uuid4().hex}"
+        self._chunked_tasks[task_id] = list(chunk_ids)
+        logger.info(f"{task_type} text split into {len(chunk_ids)} tasks: {task_id}")
+        return task_id
+
+    async def _chunked_check(self, task_type: str, task_id: str, check_chunk) -> tuple:
+        """查询长文本任务：各句全部完成后按顺序交叉淡化拼接为一段音频"""
+
+        async def check_once(_=None):
+            chunk_ids = self._chunked_tasks.get(task_id)
+            if chunk_ids is None:
+                return "错误: 任务不存在或已过期", None
+            results = await asyncio.gather(*(check_chunk(chunk_id) for chunk_id in chunk_ids))
+            for status, _ in results:
+                if status not in ("done", "pending"):
+                    await self._release_chunks(task_type, self._chunked_tasks.pop(task_id, []))
+                    return status, None
+            if any(status == "pending" for status, _ in results):
+                return "pending", None
+
+            self._chunked_tasks.pop(task_id, None)
+            try:
+                content = await asyncio.to_thread(self.long_text.stitch, [p for _, p in results])
+                return "done", await asyncio.to_thread(self.output_store.save, content)
+            except Exception as e:
+                logger.error(f"Failed to join audio of {task_type} task {task_id}: {e}")
+                return f"错误: 拼接音频失败 - {e}", None
+
+        return await self._scheduled_check(
+            f"{task_type}-long", task_id, check_once, pending=("pending", None)
+        )
 
-    def _submit_tts_task(self, payload: dict) -> dict:
+    async def _submit_tts_task(self, payload: dict) -> dict:
         """
         Submits the TTS task to the async endpoint.
         Returns the initial response which should contain the task_id.
         """
-        return self._call_webgw_api(call_name="call-non-edit-model", call_args=payload)
+        return await self._call_webgw_api(call_name="call-non-edit-model", call_args=payload)
 
-    def _poll_tts_result(self, task_id: str) -> dict:
+    async def _poll_tts_result(self, task_id: str) -> dict:
         """Polls the TTS task result."""
         payload = {"task_id": task_id}
-        return self._call_webgw_api(call_name="call-non-edit-model", call_args=payload)
+        return await self._call_webgw_api(call_name="call-non-edit-model", call_args=payload)
 
-    def _submit_edit_task(self, payload: dict) -> dict:
+    async def _submit_edit_task(self, payload: dict) -> dict:
         """
         Submits the Edit task to the async endpoint.
         Returns the initial response which should contain the task_id.
         """
-        return self._call_webgw_api(call_name="call-edit-model", call_args=payload)
+        return await self._call_webgw_api(call_name="call-edit-model", call_args=payload)
 
-    def _poll_edit_result(self, task_id: str) -> dict:
+    async def _poll_edit_result(self, task_id: str) -> dict:
         """Polls the Edit task result."""
         payload = {"task_id": task_id}
-        return self._call_webgw_api(call_name="call-edit-model", call_args=payload)
+        return await self._call_webgw_api(call_name="call-edit-model", call_args=payload)
+
+    async def tts_start_task(self, text: str, prompt_wav_path: str, prompt_text: str) -> str:
+        """提交TTS任务并返回task_id；长文本按句切分后并发提交"""
+        chunks = self.long_text.split(text)
+        if len(chunks) > 1:
+            return await self._start_chunked_task(
+                "tts",
+                [self.tts_start_task(chunk, prompt_wav_path, prompt_text) for chunk in chunks],
+            )
 
-    def tts_start_task(self, text: str, prompt_wav_path: str, prompt_text: str) -> str:
-        """提交TTS任务并返回task_id"""
-        with open(prompt_wav_path, "rb") as f:
-            prompt_audio_bytes = f.read()
-        prompt_audio_b64 = base64.b64encode(prompt_audio_bytes).decode("utf-8")
+        # 参考音频按内容哈希计入缓存键；命中缓存时不必编码参考音频
+        cache_key = await asyncio.to_thread(
+            make_cache_key,
+            "tts",
+            {"task_name": "tts", "text": text, "prompt_text": prompt_text},
+            [prompt_wav_path],
+        )
+        cached_task_id = await self._cached_task("tts", cache_key)
+        if cached_task_id:
+            return cached_task_id
 
+        prompt_audio_b64, codec = await asyncio.to_thread(
+            self.audio_b64_cache.encode, prompt_wav_path, self.audio_codec
+        )
         submit_payload = {
             "task_name": "tts",
             "prompt_audio_b64": prompt_audio_b64,
             "text": text,
             "prompt_text": prompt_text,
         }
+        tag_codec(submit_payload, "prompt_audio_b64", codec)
+        return await self._coalesced(
+            cache_key, lambda: self._start_tts_task(submit_payload, cache_key)
+        )
 
+    async def _start_tts_task(self, submit_payload: dict, cache_key: str) -> str:
+        """提交TTS任务（相同请求在途时由 _coalesced 合并）"""
         # The response from the submission API is the *outer* MPS response
-        initial_response = self._submit_tts_task(submit_payload)
+        initial_response = await self._submit_tts_task(submit_payload)
         logger.info(f"TTS task submission response: {initial_response}")
 
-        if not initial_response.get("success"):
-            return f"错误: {initial_response.get('errorMessage', '任务提交失败')}"
-
-        result_content_str = initial_response.get("resultMap", {}).get("result")
-        if not result_content_str:
-            return "错误: 提交响应中缺少 'result' 字段"
-
-        if isinstance(result_content_str, str):
-            inner_response = json.loads(result_content_str)
-        else:
-            inner_response = result_content_str
-
-        if inner_response.get("success") != "True":
-            return f"错误: {inner_response.get('errMsg', '内部API调用失败')}"
-
-        task_id = inner_response.get("data", {}).get("task_id")
+        task_id, error = submitted_task_id(initial_response)
         if not task_id:
-            return "错误: 未能从响应中获取 task_id"
+            return f"错误: {error or '未能从响应中获取 task_id'}"
 
         logger.info(f"TTS task started with ID: {task_id}")
+        await self._track_task("tts", task_id, cache_key)
+        # 提交后立即登记到轮询调度器，任务耗时从提交时刻起算
+        await self.tts_check_task(task_id)
         return task_id
 
-    def tts_check_task(self, task_id: str) -> (str, tuple or None):
+    async def tts_check_task(self, task_id: str) -> (str, str or None):
         """检查TTS任务状态并返回结果"""
-        poll_response = self._poll_tts_result(task_id)
+        if task_id.startswith("long-"):
+            return await self._chunked_check("tts", task_id, self.tts_check_task)
+        return await self._scheduled_check(
+            "tts",
+            task_id,
+            lambda poll_response: self._tts_check_task_once(task_id, poll_response),
+            pending=("pending", None),
+            batch_group="non-edit",
+            cancel_fn=lambda: self._cancel_task(task_id),
+        )
+
+    async def _tts_check_task_once(
+        self, task_id: str, poll_response: dict = None
+    ) -> (str, str or None):
+        """单次查询TTS任务状态（由轮询调度器调用）"""
+        if poll_response is None:
+            poll_response = await self._poll_tts_result(task_id)
 
         if not poll_response.get("success"):
             return f"错误: {poll_response.get('errorMessage', '轮询失败')}", None
@@ -247,6 +524,8 @@ class SpeechService:
         task_status = inner_response.get("data", {}).get("status")
         if task_status == "pending":
             return "pending", None
+        if task_status == "cancelled":
+            return "错误: 任务已取消", None
 
         # Task finished, process final audio
         output_audio_b64 = inner_response.get("data", {}).get("output_audio_b64")
@@ -254,22 +533,35 @@ class SpeechService:
             return "错误: 任务成功但未返回音频数据。", None
 
         try:
-            decoded_audio_bytes = base64.b64decode(output_audio_b64)
-            rate, audio_data = wavfile.read(io.BytesIO(decoded_audio_bytes))
-            return "done", (rate, audio_data)
+            audio_path = await asyncio.to_thread(self.output_store.save_audio, output_audio_b64)
+            return "done", audio_path
         except Exception as e:
             logger.error(f"Error decoding final audio for task {task_id}: {e}")
             return f"错误: 解码音频失败 - {e}", None
 
-    def asr_start_task(self, audio_path: str) -> str:
+    async def asr_start_task(self, audio_path: str) -> str:
         """提交ASR任务并返回task_id"""
-        processed_path = self._preprocess_audio(audio_path)
+        cache_key = await asyncio.to_thread(
+            make_cache_key, "asr", {"task_name": "asr"}, [audio_path]
+        )
+        # 识别文本缓存按音频内容哈希索引，不受结果缓存的容量和有效期限制
+        transcript = self.transcript_cache.get(cache_key)
+        if transcript is not None:
+            return self._resolved_task("asr", cache_key, ("done", transcript))
+        cached_task_id = await self._cached_task("asr", cache_key)
+        if cached_task_id:
+            return cached_task_id
+        return await self._coalesced(cache_key, lambda: self._start_asr_task(audio_path, cache_key))
+
+    async def _start_asr_task(self, audio_path: str, cache_key: str) -> str:
+        """提交ASR任务（相同请求在途时由 _coalesced 合并）"""
+        processed_path = await asyncio.to_thread(self._preprocess_audio, audio_path)
         if not processed_path:
             return "错误: 音频预处理失败"
 
-        with open(processed_path, "rb") as f:
-            audio_bytes = f.read()
-        audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
+        audio_b64, codec = await asyncio.to_thread(
+            self.audio_b64_cache.encode, processed_path, self.audio_codec
+        )
 
         submit_payload = {
             "task_name": "asr",
@@ -287,37 +579,72 @@ class SpeechService:
                 }
             ],
         }
+        tag_codec(submit_payload, "audio_b64", codec)
 
         # 复用通用的异步提交逻辑
-        initial_response = self._submit_tts_task(submit_payload)
+        initial_response = await self._submit_tts_task(submit_payload)
         logger.info(f"ASR task submission response: {initial_response}")
 
-        if not initial_response.get("success"):
-            return f"错误: {initial_response.get('errorMessage', 'ASR 任务提交失败')}"
-
-        result_content_str = initial_response.get("resultMap", {}).get("result")
-        if not result_content_str:
-            return "错误: 提交响应中缺少 'result' 字段"
-
-        if isinstance(result_content_str, str):
-            inner_response = json.loads(result_content_str)
-        else:
-            inner_response = result_content_str
-
-        if inner_response.get("success") != "True":
-            return f"错误: {inner_response.get('errMsg', '内部API调用失败')}"
-
-        task_id = inner_response.get("data", {}).get("task_id")
+        task_id, error = submitted_task_id(initial_response)
         if not task_id:
-            return "错误: 未能从响应中获取 task_id"
+            return f"错误: {error or '未能从响应中获取 task_id'}"
 
         logger.info(f"ASR task started with ID: {task_id}")
+        await self._track_task("asr", task_id, cache_key)
+        # 提交后立即登记到轮询调度器，任务耗时从提交时刻起算
+        await self.asr_check_task(task_id)
         return task_id
 
-    def asr_check_task(self, task_id: str) -> (str, str or None):
+    async def seed_transcripts(self, audio_paths: list, timeout: float = 120):
+        """
+        预先识别一批参考音频的文本并写入识别文本缓存，已缓存的音频直接跳过。
+        """
+
+        async def transcribe(audio_path) -> bool:
+            task_id = await self.asr_start_task(audio_path)
+            if task_id.startswith("错误:"):
+                logger.warning(f"Transcript seeding failed for {audio_path}: {task_id}")
+                return False
+            # 与会话一样登记为等待者，加入此任务的会话离开时不会将其取消
+            self.watch_task("asr", task_id)
+            try:
+                deadline = asyncio.get_running_loop().time() + timeout
+                while asyncio.get_running_loop().time() < deadline:
+                    status, _ = await self.asr_check_task(task_id)
+                    if status == "done":
+                        return True
+                    if status != "pending":
+                        logger.warning(f"Transcript seeding failed for {audio_path}: {status}")
+                        return False
+                    await asyncio.sleep(self.poll_scheduler.interval)
+                logger.warning(f"Transcript seeding timed out for {audio_path}")
+                return False
+            finally:
+                await self.release_task("asr", task_id)
+
+        seeded = await asyncio.gather(*(transcribe(audio_path) for audio_path in audio_paths))
+        logger.info(
+            f"Transcript cache seeded for {sum(seeded)} of {len(audio_paths)} reference clips"
+        )
+
+    async def asr_check_task(self, task_id: str) -> (str, str or None):
         """检查ASR任务状态并返回结果"""
+        return await self._scheduled_check(
+            "asr",
+            task_id,
+            lambda poll_response: self._asr_check_task_once(task_id, poll_response),
+            pending=("pending", None),
+            batch_group="non-edit",
+            cancel_fn=lambda: self._cancel_task(task_id),
+        )
+
+    async def _asr_check_task_once(
+        self, task_id: str, poll_response: dict = None
+    ) -> (str, str or None):
+        """单次查询ASR任务状态（由轮询调度器调用）"""
         # 复用通用的异步轮询逻辑
-        poll_response = self._poll_tts_result(task_id)
+        if poll_response is None:
+            poll_response = await self._poll_tts_result(task_id)
 
         if not poll_response.get("success"):
             return f"错误: {poll_response.get('errorMessage', '轮询失败')}", None
@@ -337,6 +664,8 @@ class SpeechService:
         task_status = inner_response.get("data", {}).get("status")
         if task_status == "pending":
             return "pending", None
+        if task_status == "cancelled":
+            return "错误: 任务已取消", None
 
         # 任务完成，处理最终文本结果
         transcribed_text = inner_response.get("data", {}).get("transcribed_text")
@@ -347,15 +676,30 @@ class SpeechService:
         final_text = transcribed_text.split("\t", 1)[-1]
         return "done", final_text
 
-    def edit_start_task(self, audio_path: str, instruction_text: str) -> str:
+    async def edit_start_task(self, audio_path: str, instruction_text: str) -> str:
         """提交Edit任务并返回task_id"""
-        processed_path = self._preprocess_audio(audio_path)
+        cache_key = await asyncio.to_thread(
+            make_cache_key,
+            "edit",
+            {"task_name": "edit", "instruction": instruction_text},
+            [audio_path],
+        )
+        cached_task_id = await self._cached_task("edit", cache_key)
+        if cached_task_id:
+            return cached_task_id
+        return await self._coalesced(
+            cache_key, lambda: self._start_edit_task(audio_path, instruction_text, cache_key)
+        )
+
+    async def _start_edit_task(self, audio_path: str, instruction_text: str, cache_key: str) -> str:
+        """提交Edit任务（相同请求在途时由 _coalesced 合并）"""
+        processed_path = await asyncio.to_thread(self._preprocess_audio, audio_path)
         if not processed_path:
             return "错误: 音频预处理失败"
 
-        with open(processed_path, "rb") as f:
-            audio_bytes = f.read()
-        audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
+        audio_b64, codec = await asyncio.to_thread(
+            self.audio_b64_cache.encode, processed_path, self.audio_codec
+        )
 
         messages = [
             {
@@ -371,37 +715,41 @@ class SpeechService:
         ]
 
         submit_payload = {"task_name": "edit", "audio_b64": audio_b64, "messages": messages}
+        tag_codec(submit_payload, "audio_b64", codec)
 
         # 调用专用的 Edit 任务提交逻辑
-        initial_response = self._submit_edit_task(submit_payload)
+        initial_response = await self._submit_edit_task(submit_payload)
         logger.info(f"Edit task submission response: {initial_response}")
 
-        if not initial_response.get("success"):
-            return f"错误: {initial_response.get('errorMessage', 'Edit 任务提交失败')}"
-
-        result_content_str = initial_response.get("resultMap", {}).get("result")
-        if not result_content_str:
-            return "错误: 提交响应中缺少 'result' 字段"
-
-        if isinstance(result_content_str, str):
-            inner_response = json.loads(result_content_str)
-        else:
-            inner_response = result_content_str
-
-        if inner_response.get("success") != "True":
-            return f"错误: {inner_response.get('errMsg', '内部API调用失败')}"
-
-        task_id = inner_response.get("data", {}).get("task_id")
+        task_id, error = submitted_task_id(initial_response)
         if not task_id:
-            return "错误: 未能从响应中获取 task_id"
+            return f"错误: {error or '未能从响应中获取 task_id'}"
 
         logger.info(f"Edit task started with ID: {task_id}")
+        await self._track_task("edit", task_id, cache_key)
+        # 提交后立即登记到轮询调度器，任务耗时从提交时刻起算
+        await self.edit_check_task(task_id)
         return task_id
 
-    def edit_check_task(self, task_id: str) -> (str, str or None, tuple or None):
+    async def edit_check_task(self, task_id: str) -> (str, str or None, str or None):
         """检查Edit任务状态并返回结果 (status, text_result, audio_result)"""
+        return await self._scheduled_check(
+            "edit",
+            task_id,
+            lambda poll_response: self._edit_check_task_once(task_id, poll_response),
+            pending=("pending", "任务处理中...", None),
+            error=("错误", "{}", None),
+            batch_group="edit",
+            cancel_fn=lambda: self._cancel_task(task_id),
+        )
+
+    async def _edit_check_task_once(
+        self, task_id: str, poll_response: dict = None
+    ) -> (str, str or None, str or None):
+        """单次查询Edit任务状态（由轮询调度器调用）"""
         # 调用专用的 Edit 任务轮询逻辑
-        poll_response = self._poll_edit_result(task_id)
+        if poll_response is None:
+            poll_response = await self._poll_edit_result(task_id)
 
         if not poll_response.get("success"):
             return "错误", f"轮询失败: {poll_response.get('errorMessage', '未知错误')}", None
@@ -421,6 +769,8 @@ class SpeechService:
         task_status = inner_response.get("data", {}).get("status")
         if task_status == "pending":
             return "pending", "任务处理中...", None
+        if task_status == "cancelled":
+            return "错误", "任务已取消", None
 
         # 任务完成，解析结果
         data = inner_response.get("data", {})
@@ -430,31 +780,61 @@ class SpeechService:
         if not output_audio_b64:
             logger.warning(f"Edit task {task_id} did not return audio data.")
             # 返回空白音频
-            return "done", edited_text, (blank_rate, blank_audio_data)
+            return "done", edited_text, BLANK_AUDIO_PATH
 
         try:
-            decoded_audio_bytes = base64.b64decode(output_audio_b64)
-            rate, audio_data = wavfile.read(io.BytesIO(decoded_audio_bytes))
-            return "done", edited_text, (rate, audio_data)
+            audio_path = await asyncio.to_thread(self.output_store.save_audio, output_audio_b64)
+            return "done", edited_text, audio_path
         except Exception as e:
             logger.error(f"Error decoding final audio for edit task {task_id}: {e}")
             return "错误", f"解码音频失败: {e}", None
 
     # Instruct Model Methods ===========================================
-    def submit_instruct_task(self, payload: dict) -> str:
-        """提交可控TTS任务"""
+    async def submit_instruct_task(self, payload: dict) -> str:
+        """提交可控TTS任务；长文本按句切分后并发提交，各句使用相同的描述、种子和参考音频"""
+        chunks = self.long_text.split(payload.get("text"))
+        if len(chunks) > 1:
+            return await self._start_chunked_task(
+                "instruct",
+                [self.submit_instruct_task({**payload, "text": chunk}) for chunk in chunks],
+            )
+
+        prompt_audio = payload.get("prompt_audio")
+        prompt_is_file = bool(prompt_audio) and os.path.isfile(prompt_audio)
+        cache_key = await asyncio.to_thread(
+            make_cache_key,
+            "instruct",
+            {
+                "text": payload.get("text"),
+                "caption": payload.get("caption"),
+                "seed": payload.get("seed"),
+                "prompt_audio": None if prompt_is_file else prompt_audio,
+            },
+            [prompt_audio] if prompt_is_file else [],
+        )
+        cached_task_id = await self._cached_task("instruct", cache_key)
+        if cached_task_id:
+            return cached_task_id
+        return await self._coalesced(
+            cache_key, lambda: self._start_instruct_task(payload, cache_key)
+        )
+
+    async def _start_instruct_task(self, payload: dict, cache_key: str) -> str:
+        """提交可控TTS任务（相同请求在途时由 _coalesced 合并）"""
         # 处理参考音频 (如果存在且是文件路径)
         prompt_audio = payload.get("prompt_audio")
         prompt_wav_b64 = None
+        codec = "wav"
 
         if prompt_audio:
             # 如果已经是 Base64 字符串（虽然 UI 传递的通常是路径），则保留
             # 否则尝试作为文件路径读取
             if os.path.isfile(prompt_audio):
-                processed_path = self._preprocess_audio(prompt_audio)
+                processed_path = await asyncio.to_thread(self._preprocess_audio, prompt_audio)
                 if processed_path:
-                    with open(processed_path, "rb") as f:
-                        prompt_wav_b64 = base64.b64encode(f.read()).decode("utf-8")
+                    prompt_wav_b64, codec = await asyncio.to_thread(
+                        self.audio_b64_cache.encode, processed_path, self.audio_codec
+                    )
                 else:
                     return "错误: 音频文件处理失败"
             else:
@@ -471,48 +851,50 @@ class SpeechService:
 
         # 移除 None 值参数 (某些模式下 prompt_wav_b64 可选)
         call_args = {k: v for k, v in call_args.items() if v is not None}
+        tag_codec(call_args, "prompt_wav_b64", codec)
 
-        response = self._call_webgw_api(
+        response = await self._call_webgw_api(
             call_name="submit_task",
             call_args=call_args,
             api_project="260113-ming-uniaudio-instruct",
         )
 
-        if not response.get("success"):
-            return f"错误: {response.get('errorMessage', '提交失败')}"
-
-        result_content = response.get("resultMap", {}).get("result")
-
-        # 打印日志
         logger.info(f"Instruct task submission response content: {response}")
-
-        # 解析内部 JSON (Maya 返回的结构)
-        if isinstance(result_content, str):
-            try:
-                result_data = json.loads(result_content)
-            except json.JSONDecodeError:
-                return f"错误: 响应格式无效 - {result_content}"
-        else:
-            result_data = result_content
-
-        # 注意：这里直接返回 data 中的 task_id
-        # Maya 返回格式: { "task_id": "...", "status": "pending" }
-        task_id = result_data.get("task_id")
+        task_id, error = submitted_task_id(response)
         if not task_id:
-            return f"错误: 响应中缺少 task_id - {result_data}"
+            return f"错误: {error or '响应中缺少 task_id'}"
 
         logger.info(f"Instruct task started with ID: {task_id}")
+        await self._track_task("instruct", task_id, cache_key)
 
+        # 提交后立即登记到轮询调度器，任务耗时从提交时刻起算
+        await self.poll_instruct_task(task_id)
         return task_id
 
-    def poll_instruct_task(self, task_id: str) -> (str, tuple or None):
+    async def poll_instruct_task(self, task_id: str) -> (str, str or None):
         """轮询可控TTS任务结果"""
-        response = self._call_webgw_api(
-            call_name="poll_task",
-            call_args={"task_id": task_id},
-            api_project="260113-ming-uniaudio-instruct",
+        if task_id.startswith("long-"):
+            return await self._chunked_check("instruct", task_id, self.poll_instruct_task)
+        return await self._scheduled_check(
+            "instruct",
+            task_id,
+            lambda response: self._poll_instruct_task_once(task_id, response),
+            pending=("pending", None),
+            batch_group="instruct",
+            cancel_fn=lambda: self._cancel_task(task_id, "260113-ming-uniaudio-instruct"),
         )
 
+    async def _poll_instruct_task_once(
+        self, task_id: str, response: dict = None
+    ) -> (str, str or None):
+        """单次查询可控TTS任务状态（由轮询调度器调用）"""
+        if response is None:
+            response = await self._call_webgw_api(
+                call_name="poll_task",
+                call_args={"task_id": task_id},
+                api_project="260113-ming-uniaudio-instruct",
+            )
+
         if not response.get("success"):
             return f"错误: {response.get('errorMessage', '轮询请求失败')}", None
 
@@ -537,9 +919,8 @@ class SpeechService:
             if not output_audio_b64:
                 return "错误: 任务成功但未返回音频", None
             try:
-                decoded_audio = base64.b64decode(output_audio_b64)
-                rate, audio_data = wavfile.read(io.BytesIO(decoded_audio))
-                return "done", (rate, audio_data)
+                audio_path = await asyncio.to_thread(self.output_store.save_audio, output_audio_b64)
+                return "done", audio_path
             except Exception as e:
                 logger.error(f"Failed to decode instruct audio: {e}")
                 return f"错误: 音频解码失败 - {e}", None
@@ -551,6 +932,7 @@ class SpeechService:
 class GradioInterface:
     def __init__(self, speech_service: SpeechService):
         self.service = speech_service
+        self.lanes = get_queue_lanes()
 
         # 初始化 UniAudio V4 MOE 演示 Tab
         self.uniaudio_demo_tab = MingOmniTTSDemoTab(
@@ -582,6 +964,10 @@ class GradioInterface:
                 font-family: SFMono-Regular, Consolas, "Liberation Mono", Menlo, Courier, monospace !important;
             }
             """
+        self._transcript_seed_task = None
+        self._resume_task = None
+        # 会话 -> {界面位置: (任务类型, task_id)}，即会话在各位置上正在等待的任务
+        self._session_tasks = {}
         self.demo = self._create_interface()
 
     def play_audio(self, content):
@@ -664,6 +1050,7 @@ class GradioInterface:
                                 submit_btn = gr.Button("执行编辑", variant="primary")
                                 output_text = gr.Textbox(label="编辑后文本", interactive=False)
                                 output_audio = gr.Audio(
+                                    type="filepath",
                                     label="编辑后音频",
                                     autoplay=True,
                                     interactive=False,
@@ -747,24 +1134,28 @@ class GradioInterface:
                 self.asr_start_wrapper,
                 inputs=[input_audio],
                 outputs=[asr_task_id_state, transcription_box, asr_polling_counter],
+                **self.lanes.listener("asr"),
             )
             asr_polling_counter.change(
                 self.asr_check_wrapper,
                 inputs=[asr_task_id_state, asr_polling_counter],
                 outputs=[transcription_box, asr_polling_counter],
                 every=2,
+                concurrency_limit=None,
             )
 
             submit_btn.click(
                 self.edit_start_wrapper,
                 inputs=[input_audio, instruction_box],
                 outputs=[edit_task_id_state, edit_polling_counter, output_text, output_audio],
+                **self.lanes.listener("edit"),
             )
             edit_polling_counter.change(
                 self.edit_check_wrapper,
                 inputs=[edit_task_id_state, edit_polling_counter],
                 outputs=[output_text, output_audio, edit_polling_counter],
                 every=2,
+                concurrency_limit=None,
             )
 
             continuous_edit.change(
@@ -780,24 +1171,28 @@ class GradioInterface:
                 self.prompt_asr_start_wrapper,
                 inputs=[prompt_audio],
                 outputs=[prompt_asr_task_id_state, prompt_text, prompt_asr_polling_counter],
+                **self.lanes.listener("asr"),
             )
             prompt_asr_polling_counter.change(
                 self.prompt_asr_check_wrapper,
                 inputs=[prompt_asr_task_id_state, prompt_asr_polling_counter],
                 outputs=[prompt_text, prompt_asr_polling_counter],
                 every=2,
+                concurrency_limit=None,
             )
 
             tts_btn.click(
                 self.tts_start_wrapper,
                 inputs=[tts_box, prompt_audio, prompt_text],
                 outputs=[task_id_state, synthesized_audio, polling_counter],
+                **self.lanes.listener("tts"),
             )
             polling_counter.change(
                 self.tts_check_wrapper,
                 inputs=[task_id_state, polling_counter],
                 outputs=[synthesized_audio, polling_counter],
                 every=2,
+                concurrency_limit=None,
             )
 
             with gr.Accordion("麦克风权限不工作？点我查看解决方案", open=False):
@@ -814,6 +1209,9 @@ class GradioInterface:
                 """
                 )
 
+            demo.load(self.seed_prompt_transcripts, show_progress="hidden", api_name=False)
+            demo.unload(self.release_session_tasks)
+
         return demo
 
     def _get_tts_examples(self) -> list:
@@ -844,16 +1242,20 @@ class GradioInterface:
 
     # 包装器函数 =======================================================
 
-    def edit_start_wrapper(self, audio_path: str, instruction: str):
+    async def edit_start_wrapper(self, audio_path: str, instruction: str, request: gr.Request):
         """语音编辑异步任务启动包装器"""
         logger.info(
             f"Edit start wrapper called with audio: {audio_path}, instruction: {instruction}"
         )
         if not audio_path or not instruction:
+            await self._session_task(request, "edit")
             # 返回值需要对应 UI outputs: task_id, polling_counter, output_text, output_audio
             return None, 0, "错误: 请提供音频和编辑指令", (blank_rate, blank_audio_data)
 
-        task_id = self.service.edit_start_task(audio_path, instruction)
+        task_id = await self.service.edit_start_task(audio_path, instruction)
+        await self._session_task(
+            request, "edit", "edit", None if task_id.startswith("错误:") else task_id
+        )
         if task_id.startswith("错误:"):
             return None, 0, task_id, (blank_rate, blank_audio_data)
 
@@ -861,14 +1263,14 @@ class GradioInterface:
         # 返回 task_id, 启动轮询计数器, 更新文本输出框为状态信息, 清空音频输出
         return task_id, 1, status_message, gr.update(value=None)
 
-    def edit_check_wrapper(self, task_id: str, polling_counter: int):
+    async def edit_check_wrapper(self, task_id: str, polling_counter: int):
         """语音编辑异步任务状态检查包装器"""
         if not task_id or polling_counter == 0:
             # 没有任务或轮询未启动，直接返回，不更新任何内容
             return gr.update(), gr.update(), polling_counter
 
         logger.info(f"Polling Edit task {task_id}, counter: {polling_counter}")
-        status, text_result, audio_result = self.service.edit_check_task(task_id)
+        status, text_result, audio_result = await self.service.edit_check_task(task_id)
 
         if status == "pending":
             elapsed = polling_counter * 2
@@ -882,30 +1284,36 @@ class GradioInterface:
             # 在文本框显示错误信息, 返回空白音频, 停止轮询
             return text_result, audio_result or (blank_rate, blank_audio_data), 0
 
-    def tts_start_wrapper(self, text: str, prompt_wav_path: str, prompt_text: str):
+    async def tts_start_wrapper(
+        self, text: str, prompt_wav_path: str, prompt_text: str, request: gr.Request
+    ):
         """语音合成任务启动包装器"""
         logger.info(
             f"TTS start wrapper called with text length: {len(text)}, prompt_wav_path: {prompt_wav_path}, prompt_text length: {len(prompt_text)}"
         )
         if not all([text, prompt_wav_path, prompt_text]):
+            await self._session_task(request, "tts")
             # outputs: [task_id_state, synthesized_audio, polling_counter]
             return None, gr.update(label="错误：缺少合成文本、参考音频或参考文本。", value=None), 0
 
-        task_id = self.service.tts_start_task(text, prompt_wav_path, prompt_text)
+        task_id = await self.service.tts_start_task(text, prompt_wav_path, prompt_text)
+        await self._session_task(
+            request, "tts", "tts", None if task_id.startswith("错误:") else task_id
+        )
         if task_id.startswith("错误:"):
             return None, gr.update(label=task_id, value=None), 0
 
         status_message = f"任务已提交 (ID: ...{task_id[-6:]})，开始轮询..."
         return task_id, gr.update(label=status_message, value=None), 1
 
-    def tts_check_wrapper(self, task_id: str, polling_counter: int):
+    async def tts_check_wrapper(self, task_id: str, polling_counter: int):
         """语音合成任务状态检查包装器"""
         if not task_id or polling_counter == 0:
             # outputs: [synthesized_audio, polling_counter]
             return gr.update(), 0
 
         logger.info(f"Polling TTS task {task_id}, counter: {polling_counter}")
-        status, result = self.service.tts_check_task(task_id)
+        status, result = await self.service.tts_check_task(task_id)
 
         if status == "pending":
             elapsed = polling_counter * 2  # Approx. 2s per check
@@ -916,13 +1324,17 @@ class GradioInterface:
         else:  # Error case
             return gr.update(label=status, value=None), 0
 
-    def asr_start_wrapper(self, audio_path: str):
+    async def asr_start_wrapper(self, audio_path: str, request: gr.Request):
         """ASR 异步任务启动包装器"""
         logger.info(f"ASR start wrapper called with audio_path: {audio_path}")
         if not audio_path:
+            await self._session_task(request, "asr")
             return None, "错误：请先上传一个音频文件。", 0
 
-        task_id = self.service.asr_start_task(audio_path)
+        task_id = await self.service.asr_start_task(audio_path)
+        await self._session_task(
+            request, "asr", "asr", None if task_id.startswith("错误:") else task_id
+        )
         if task_id.startswith("错误:"):
             return None, task_id, 0
 
@@ -930,14 +1342,14 @@ class GradioInterface:
         # 返回 task_id 到 state, 更新状态信息, 启动轮询计数器
         return task_id, status_message, 1
 
-    def asr_check_wrapper(self, task_id: str, polling_counter: int):
+    async def asr_check_wrapper(self, task_id: str, polling_counter: int):
         """ASR 异步任务状态检查包装器"""
         if not task_id or polling_counter == 0:
             # 没有任务或轮询未启动，直接返回
             return gr.update(), 0
 
         logger.info(f"Polling ASR task {task_id}, counter: {polling_counter}")
-        status, result = self.service.asr_check_task(task_id)
+        status, result = await self.service.asr_check_task(task_id)
 
         if status == "pending":
             elapsed = polling_counter * 2  # 假设轮询间隔为2秒
@@ -955,27 +1367,89 @@ class GradioInterface:
             # 停止轮询，并显示错误信息
             return status_message, 0
 
-    def prompt_asr_start_wrapper(self, audio_path: str):
+    async def prompt_asr_start_wrapper(self, audio_path: str, request: gr.Request):
         """专门用于TTS参考音频的ASR异步任务启动包装器"""
         logger.info(f"Prompt ASR start wrapper called with audio_path: {audio_path}")
         if not audio_path:
+            await self._session_task(request, "prompt_asr")
             # outputs: [task_id_state, output_textbox, polling_counter]
             return None, "错误：请先上传参考音频。", 0
 
-        task_id = self.service.asr_start_task(audio_path)
+        task_id = await self.service.asr_start_task(audio_path)
+        await self._session_task(
+            request, "prompt_asr", "asr", None if task_id.startswith("错误:") else task_id
+        )
         if task_id.startswith("错误:"):
             return None, task_id, 0
 
+        # 已缓存的参考音频（包括预先识别的示例音频）直接返回文本，无需轮询
+        status, result = await self.service.asr_check_task(task_id)
+        if status == "done":
+            return None, result, 0
+
         status_message = f"参考音频识别任务已提交，等待结果..."
         return task_id, status_message, 1
 
-    def prompt_asr_check_wrapper(self, task_id: str, polling_counter: int):
+    async def _session_task(
+        self, request: gr.Request, slot: str, kind: str = None, task_id: str = None
+    ):
+        """
+        登记会话在界面位置 `slot` 上等待的任务（没有新任务时传 None），并释放该位置上之前的任务：
+        之前的任务不再有会话等待时随即取消，后端不再为无人查看的结果计算。
+        """
+        tasks = self._session_tasks.setdefault(request.session_hash, {})
+        previous = tasks.pop(slot, None)
+        if task_id:
+            # 先登记新任务再释放旧任务：重复提交相同请求时共用的任务不会被取消
+            self.service.watch_task(kind, task_id)
+            tasks[slot] = (kind, task_id)
+        if previous:
+            await self.service.release_task(*previous)
+
+    async def release_session_tasks(self, request: gr.Request):
+        """会话断开（关闭或刷新页面）时释放其等待的任务"""
+        tasks = self._session_tasks.pop(request.session_hash, {})
+        await asyncio.gather(
+            *(self.service.release_task(kind, task_id) for kind, task_id in tasks.values())
+        )
+
+    async def seed_prompt_transcripts(self):
+        """首次加载页面时在后台预先识别示例参考音频的文本"""
+        # 调度器和 HTTP 客户端绑定在 Gradio 的事件循环上，所以在服务运行后才开始预热
+        if self._transcript_seed_task is None:
+            audio_paths = [audio_path for audio_path, _ in self._get_tts_examples()]
+            self._transcript_seed_task = asyncio.create_task(
+                self.service.seed_transcripts(audio_paths)
+            )
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """
+        Gradio 服务（FastAPI）的 lifespan：服务启动后即在后台继续轮询重启前未完成的任务，
+        不必等到有人打开页面。调度器和 HTTP 客户端绑定在 Gradio 的事件循环上，所以不能更早开始。
+        """
+        self._resume_task = asyncio.create_task(self.resume_journaled_tasks())
+        yield
+        self._resume_task.cancel()
+
+    async def resume_journaled_tasks(self):
+        """继续轮询服务重启前未完成的任务，失败时记录错误"""
+        results = await asyncio.gather(
+            self.service.resume_tasks(),
+            self.uniaudio_demo_tab.resume_tasks(),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.opt(exception=result).error(f"Resuming journaled tasks failed: {result}")
+
+    async def prompt_asr_check_wrapper(self, task_id: str, polling_counter: int):
         """专门用于TTS参考音频的ASR异步任务状态检查包装器"""
         if not task_id or polling_counter == 0:
             return gr.update(), 0
 
         logger.info(f"Polling Prompt ASR task {task_id}, counter: {polling_counter}")
-        status, result = self.service.asr_check_task(task_id)
+        status, result = await self.service.asr_check_task(task_id)
 
         if status == "pending":
             elapsed = polling_counter * 2
@@ -1055,78 +1529,80 @@ class GradioInterface:
             gr.update(value=None),
         )
 
-    def process_edit_example(self, audio_path: str, instruction: str):
+    async def process_edit_example(self, audio_path: str, instruction: str):
+        """
+        示例点击处理。编辑任务不依赖识别结果，因此两者同时提交、一起轮询，
+        各自的结果一到就显示，耗时为两者中较长的一个而不是两者之和。
+        """
         # Populate input fields
-        yield gr.update(value=audio_path), gr.update(
-            value=instruction
-        ), "正在提交识别任务...", gr.update(), gr.update()
-
-        # --- ASR Task ---
-        asr_task_id = self.service.asr_start_task(audio_path)
-        if asr_task_id.startswith("错误:"):
-            yield gr.update(), gr.update(), asr_task_id, gr.update(), gr.update()
-            return
-
-        yield gr.update(), gr.update(), "识别任务已提交，等待结果...", gr.update(), gr.update()
-
-        transcription = ""
-        for i in range(30):  # Timeout after 60s
-            time.sleep(2)
-            status, result = self.service.asr_check_task(asr_task_id)
-            if status == "pending":
-                yield gr.update(), gr.update(), f"识别中... ({(i+1)*2}s)", gr.update(), gr.update()
-            elif status == "done":
-                transcription = result
-                yield gr.update(), gr.update(), transcription, gr.update(), gr.update()
-                break
-            else:  # Error
-                yield gr.update(), gr.update(), f"识别失败: {result}", gr.update(), gr.update()
-                return
-
-        if not transcription:
-            yield gr.update(), gr.update(), "识别超时或未返回结果", gr.update(), gr.update()
-            return
-
-        # --- Edit Task ---
-        yield gr.update(), gr.update(), transcription, "正在提交编辑任务...", gr.update(value=None)
-
-        edit_task_id = self.service.edit_start_task(audio_path, instruction)
-        if edit_task_id.startswith("错误:"):
-            yield gr.update(), gr.update(), transcription, f"编辑任务提交失败: {edit_task_id}", (
-                blank_rate,
-                blank_audio_data,
-            )
-            return
-
-        yield gr.update(), gr.update(), transcription, "编辑任务已提交，等待结果...", gr.update(
-            value=None
+        yield (
+            gr.update(value=audio_path),
+            gr.update(value=instruction),
+            "正在提交识别任务...",
+            "正在提交编辑任务...",
+            gr.update(value=None),
         )
 
-        for i in range(60):  # Timeout after 120s
-            time.sleep(2)
-            status, text_result, audio_result = self.service.edit_check_task(edit_task_id)
-            if status == "pending":
-                yield gr.update(), gr.update(), transcription, f"编辑中... ({(i+1)*2}s)", gr.update()
-            elif status == "done":
-                yield gr.update(), gr.update(), transcription, text_result, audio_result
-                return
-            else:  # Error
-                yield gr.update(), gr.update(), transcription, f"编辑失败: {text_result}", audio_result or (
-                    blank_rate,
-                    blank_audio_data,
-                )
-                return
-
-        yield gr.update(), gr.update(), transcription, "编辑任务超时", (
-            blank_rate,
-            blank_audio_data,
+        asr_task_id, edit_task_id = await asyncio.gather(
+            self.service.asr_start_task(audio_path),
+            self.service.edit_start_task(audio_path, instruction),
+        )
+        asr_pending = not asr_task_id.startswith("错误:")
+        transcription = "识别任务已提交，等待结果..." if asr_pending else asr_task_id
+        edit_pending = not edit_task_id.startswith("错误:")
+        edit_text = (
+            "编辑任务已提交，等待结果..." if edit_pending else f"编辑任务提交失败: {edit_task_id}"
         )
+        edit_audio = None if edit_pending else (blank_rate, blank_audio_data)
+        yield gr.update(), gr.update(), transcription, edit_text, gr.update(value=edit_audio)
+
+        elapsed = 0
+        while asr_pending or edit_pending:
+            await asyncio.sleep(2)
+            elapsed += 2
+            audio_update = gr.update()
+
+            if asr_pending:  # Timeout after 60s
+                status, result = await self.service.asr_check_task(asr_task_id)
+                asr_pending = status == "pending" and elapsed < 60
+                if status == "pending":
+                    transcription = (
+                        f"识别中... ({elapsed}s)" if asr_pending else "识别超时或未返回结果"
+                    )
+                elif status == "done":
+                    transcription = result
+                else:  # Error
+                    transcription = f"识别失败: {result}"
+
+            if edit_pending:  # Timeout after 120s
+                status, text_result, audio_result = await self.service.edit_check_task(edit_task_id)
+                edit_pending = status == "pending" and elapsed < 120
+                if status == "pending":
+                    edit_text = f"编辑中... ({elapsed}s)" if edit_pending else "编辑任务超时"
+                elif status == "done":
+                    edit_text, edit_audio = text_result, audio_result
+                else:  # Error
+                    edit_text = f"编辑失败: {text_result}"
+                    edit_audio = audio_result
+                if not edit_pending:
+                    edit_audio = edit_audio or (blank_rate, blank_audio_data)
+                    audio_update = edit_audio
+
+            # 编辑结果只在到达时发送一次，以免识别仍在进行时重复刷新播放器；最后一次输出包含全部结果
+            if not (asr_pending or edit_pending):
+                audio_update = edit_audio
+            yield gr.update(), gr.update(), transcription, edit_text, audio_update
 
     def launch(self):
         """启动Gradio应用"""
         server_name = os.getenv("GRADIO_APP_HOST", "127.0.0.1")
         server_port = int(os.getenv("GRADIO_APP_PORT", "7860"))
-        self.demo.launch(share=False, server_name=server_name, server_port=server_port)
+        self.demo.launch(
+            share=False,
+            server_name=server_name,
+            server_port=server_port,
+            app_kwargs={"lifespan": self.lifespan},
+        )
 
 
 # 主程序 ==============================================================
@@ -1136,4 +1612,6 @@ if __name__ == "__main__":
 
     # 创建并启动Gradio界面
     gradio_interface = GradioInterface(speech_service)
-    gradio_interface.demo.queue(default_concurrency_limit=10).launch()
+    gradio_interface.demo.queue(default_concurrency_limit=10)
+    gradio_interface.lanes.install(gradio_interface.demo)
+    gradio_interface.demo.launch(app_kwargs={"lifespan": gradio_interface.lifespan})
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import struct
+from functools import partial
+from math import gcd
+from typing import NamedTuple, Optional
+
+import numpy as np
+from loguru import logger
+from pydub import AudioSegment
+from scipy.io import wavfile
+from scipy.signal import resample_poly
+
+from output_store import OutputStore
+
+TARGET_SAMPLE_RATE = 16000
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavFormat(NamedTuple):
+    format_tag: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+
+    @property
+    def is_target(self) -> bool:
+        """True for 16-bit PCM, mono, TARGET_SAMPLE_RATE: nothing to convert."""
+        return (
+            self.format_tag == WAVE_FORMAT_PCM
+            and self.channels == 1
+            and self.sample_rate == TARGET_SAMPLE_RATE
+            and self.bits_per_sample == 16
+        )
+
+
+def probe_wav(audio_path: str) -> Optional[WavFormat]:
+    """
+    Reads the `fmt ` chunk of a RIFF/WAVE file without touching the sample
+    data. Returns None if the file is not a WAV file.
+    """
+    with open(audio_path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", chunk)
+            if chunk_id != b"fmt ":
+                f.seek(size + (size & 1), os.SEEK_CUR)  # chunks are word aligned
+                continue
+            fmt = f.read(min(size, 40))
+            if len(fmt) < 16:
+                return None
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                # The real format is the first two bytes of the SubFormat GUID.
+                (format_tag,) = struct.unpack("<H", fmt[24:26])
+            return WavFormat(format_tag, channels, sample_rate, bits)
+
+
+def _to_float(data: np.ndarray) -> np.ndarray:
+    """Scales integer PCM to float32 in [-1, 1)."""
+    if data.dtype == np.uint8:
+        return (data.astype(np.float32) - 128) / 128
+    if np.issubdtype(data.dtype, np.integer):
+        return data.astype(np.float32) / -np.iinfo(data.dtype).min
+    return data.astype(np.float32)
+
+
+def resample_mono(data: np.ndarray, rate: int, target_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """
+    Downmixes `data` (frames x channels, or 1-D) to mono and resamples it to
+    `target_rate` with a polyphase filter. Returns 16-bit PCM.
+    """
+    samples = _to_float(data)
+    if samples.ndim > 1:
+        # Summing column by column is much faster than mean(axis=1) on interleaved frames.
+        samples = sum(samples[:, channel] for channel in range(samples.shape[1])) / samples.shape[1]
+    if rate != target_rate:
+        divisor = gcd(rate, target_rate)
+        samples = resample_poly(samples, target_rate // divisor, rate // divisor)
+    return np.clip(np.round(samples * 32767), -32768, 32767).astype(np.int16)
+
+
+def convert_wav(audio_path: str, output_path: str, target_rate: int = TARGET_SAMPLE_RATE) -> str:
+    """
+    Converts a WAV file to mono 16-bit PCM at `target_rate` in-process.
+    Returns `audio_path` unchanged if it is already in that format.
+    Raises ValueError if the file is not a WAV file scipy can read.
+    """
+    rate, data = wavfile.read(audio_path)
+    if rate == target_rate and data.ndim == 1 and data.dtype == np.int16:
+        return audio_path
+    wavfile.write(output_path, target_rate, resample_mono(data, rate, target_rate))
+    return output_path
+
+
+def convert_ffmpeg(audio_path: str, output_path: str, target_rate: int = TARGET_SAMPLE_RATE) -> str:
+    """Converts any format ffmpeg understands to a mono WAV at `target_rate` via pydub."""
+    audio = AudioSegment.from_file(audio_path)
+    audio = audio.set_frame_rate(target_rate).set_channels(1)
+    audio.export(output_path, format="wav")
+    return output_path
+
+
+def to_16k_mono(audio_path: str, output_path: str) -> str:
+    """
+    Converts `audio_path` to a 16kHz mono WAV at `output_path` and returns the
+    path to use. WAV/PCM input is resampled with numpy/scipy; anything else
+    (mp3, m4a, ogg, compressed WAV codecs, ...) falls back to ffmpeg.
+    """
+    wav_format = probe_wav(audio_path)
+    if wav_format is not None and wav_format.is_target:
+        return audio_path
+    if wav_format is not None and wav_format.format_tag in (
+        WAVE_FORMAT_PCM,
+        WAVE_FORMAT_IEEE_FLOAT,
+    ):
+        try:
+            return convert_wav(audio_path, output_path)
+        except ValueError as e:
+            logger.info(f"scipy cannot read {os.path.basename(audio_path)} ({e}), using ffmpeg")
+    return convert_ffmpeg(audio_path, output_path)
+
+
+def normalize_audio(audio_path: str, store: OutputStore) -> str:
+    """
+    Returns a 16kHz mono 16-bit WAV version of `audio_path`: the file itself
+    if its header says it already is one, otherwise a converted copy in the
+    shared namespace of `store`, which evicts it like any other output.
+    Copies are named after the source's path, size and mtime, so the same
+    upload is only converted once while its copy is kept.
+    """
+    wav_format = probe_wav(audio_path)
+    if wav_format is not None and wav_format.is_target:
+        return audio_path
+
+    stat = os.stat(audio_path)
+    source_id = f"{os.path.abspath(audio_path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    digest = hashlib.sha1(source_id.encode("utf-8")).hexdigest()[:20]
+    return store.save_file(f"{digest}_16k_mono.wav", partial(to_16k_mono, audio_path))
@@ -0,0 +1,66 @@
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from pydub import AudioSegment
+from scipy.io import wavfile
+
+from audio_preprocess import convert_ffmpeg, convert_wav
+
+
+def make_recording(path: str, seconds: float, rate: int, channels: int):
+    """Writes a noisy 16-bit tone, shaped like a browser microphone recording."""
+    t = np.arange(int(seconds * rate)) / rate
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * np.random.randn(len(t))
+    samples = (tone * 32767).astype(np.int16)
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    wavfile.write(path, rate, samples)
+
+
+def bench(convert, audio_path: str, output_path: str, repeat: int) -> float:
+    """Median wall time of `convert` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert(audio_path, output_path)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    """
+    Compares the two preprocessing paths of audio_preprocess on synthetic
+    microphone recordings: in-process numpy/scipy resampling against pydub
+    (which launches ffmpeg for anything but plain WAV).
+
+    To run:
+        python bench_preprocess.py --seconds 5 10 30 --repeat 10
+    """
+    parser = argparse.ArgumentParser(description="Benchmark audio preprocessing")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0, 10.0, 30.0])
+    parser.add_argument("--rate", type=int, default=48000, help="input sample rate")
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    print(f"{args.rate} Hz, {args.channels} ch -> 16000 Hz mono, median of {args.repeat} runs")
+    print(f"{'seconds':>8} {'numpy (ms)':>12} {'pydub wav (ms)':>15} {'ffmpeg mp3 (ms)':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "audio.wav")
+        output = os.path.join(tmp, "audio_16k_mono.wav")
+        for seconds in args.seconds:
+            make_recording(source, seconds, args.rate, args.channels)
+            numpy_ms = bench(convert_wav, source, output, args.repeat)
+            pydub_ms = bench(convert_ffmpeg, source, output, args.repeat)
+            ffmpeg_ms = "n/a"
+            if has_ffmpeg:
+                mp3 = os.path.join(tmp, "audio.mp3")
+                AudioSegment.from_wav(source).export(mp3, format="mp3")
+                ffmpeg_ms = f"{bench(convert_ffmpeg, mp3, output, args.repeat):.1f}"
+            print(f"{seconds:>8.1f} {numpy_ms:>12.1f} {pydub_ms:>15.1f} {ffmpeg_ms:>16}")
@@ -0,0 +1,204 @@
+import io
+import os
+import re
+from typing import List
+
+import numpy as np
+from loguru import logger
+from scipy.io import wavfile
+
+# Sentence ends: Chinese/English terminal punctuation (with any closing quotes or
+# brackets), a period followed by whitespace, or line breaks. A period inside a
+# number or an abbreviation like "e.g." does not end a sentence.
+_SENTENCE_END = re.compile(r"([。！？；!?;…]+[”’」』）)\"']*|\.(?=\s|$)[\"')]*|\n+)")
+# Where an overlong sentence may be cut instead.
+_CLAUSE_END = re.compile(r"([，,、：:—]+)")
+# Speaker tags of a podcast script ("speaker_1: ...").
+_SPEAKER_TAG = re.compile(r"speaker_\d+\s*[:：]")
+_SPEAKER_TURN = re.compile(r"(?=speaker_\d+\s*[:：])")
+
+
+def _pieces(text: str, pattern: re.Pattern) -> List[str]:
+    """Splits `text` after each match of `pattern`, keeping the punctuation with its piece."""
+    parts = pattern.split(text)
+    pieces = []
+    for i in range(0, len(parts), 2):
+        piece = parts[i] + (parts[i + 1] if i + 1 < len(parts) else "")
+        if piece.strip():
+            pieces.append(piece)
+    return pieces
+
+
+def _hard_split(text: str, max_chars: int) -> List[str]:
+    """Cuts text without punctuation into `max_chars` pieces, at a space where there is one."""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", max_chars // 2, max_chars)
+        cut = cut + 1 if cut > 0 else max_chars
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+
+class LongTextChunker:
+    """
+    Long-text mode for TTS: a text longer than `max_chars` is split at sentence
+    boundaries into chunks of at most `max_chars`, which are synthesized as
+    separate tasks at the same time, and the resulting WAVs are joined with a
+    `crossfade_ms` linear crossfade. The wait for a long text becomes that of
+    its slowest chunk instead of the whole text.
+    """
+
+    def __init__(self, max_chars: int = 120, crossfade_ms: float = 30.0):
+        self.max_chars = max_chars
+        self.crossfade_ms = crossfade_ms
+
+    def _sentences(self, text: str, max_chars: int) -> List[str]:
+        """Sentences of `text`, those longer than `max_chars` cut at clauses or spaces."""
+        units = []
+        for sentence in _pieces(text, _SENTENCE_END):
+            if len(sentence.strip()) <= max_chars:
+                units.append(sentence)
+                continue
+            for clause in _pieces(sentence, _CLAUSE_END):
+                units.extend(_hard_split(clause, max_chars))
+        return units
+
+    def _pack(self, units: List[str], max_chars: int) -> List[str]:
+        """
+        Packs consecutive units into as few chunks as fit, keeping the original
+        spacing between them.
+        """
+        chunks = []
+        current = ""
+        for unit in units:
+            if current.strip() and len((current + unit).strip()) > max_chars:
+                chunks.append(current.strip())
+                current = ""
+            current += unit
+        if current.strip():
+            chunks.append(current.strip())
+        return chunks
+
+    def split(self, text: str) -> List[str]:
+        """Chunks of `text` to synthesize; `[text]` when it is short or the mode is off."""
+        if self.max_chars <= 0 or not text or len(text.strip()) <= self.max_chars:
+            return [text]
+        return self._pack(self._sentences(text, self.max_chars), self.max_chars)
+
+    def split_dialogue(self, text: str) -> List[str]:
+        """
+        Like `split()` for a podcast script: chunks end between speaker turns,
+        and a turn too long for one chunk is cut into pieces that each keep the
+        turn's speaker tag.
+        """
+        if self.max_chars <= 0 or not text or len(text.strip()) <= self.max_chars:
+            return [text]
+
+        units = []
+        for turn in _SPEAKER_TURN.split(text):
+            if len(turn.strip()) <= self.max_chars:
+                units.append(turn)
+                continue
+            turn = turn.strip()
+            match = _SPEAKER_TAG.match(turn)
+            tag = match.group(0) if match else ""
+            max_chars = self.max_chars - len(tag)
+            for piece in self._pack(self._sentences(turn[len(tag) :], max_chars), max_chars):
+                units.append(f"{tag}{piece}\n")
+        return self._pack(units, self.max_chars)
+
+    def stitch(self, paths: List[str]) -> bytes:
+        """Joins the WAV files at `paths` in order into one WAV, crossfading at each seam."""
+        stream = CrossfadeStream(self.crossfade_ms)
+        segments = [stream.push(path) for path in paths]
+        segments.append(stream.finish())
+        buffer = io.BytesIO()
+        wavfile.write(buffer, stream.rate, np.concatenate(segments))
+        return buffer.getvalue()
+
+
+class CrossfadeStream:
+    """
+    Joins WAV files one at a time with a `crossfade_ms` linear crossfade at
+    each seam, so chunks of a long text can be played while later ones are
+    still being generated. `push()` returns the samples that are final once a
+    file is added; the end of the latest file is held back until the next file
+    (or `finish()`) comes.
+    """
+
+    def __init__(self, crossfade_ms: float = 30.0):
+        self.crossfade_ms = crossfade_ms
+        self.rate = None
+        self._dtype = None
+        self._channels = None
+        self._tail = None
+        self._header_sent = False
+
+    def push(self, path: str) -> np.ndarray:
+        """Adds the next WAV file; returns the samples up to its held-back end."""
+        rate, audio = wavfile.read(path)
+        if self.rate is None:
+            self.rate, self._dtype, self._channels = rate, audio.dtype, audio.shape[1:]
+        elif rate != self.rate or audio.shape[1:] != self._channels:
+            raise ValueError(f"{path} differs from the previous audio in sample rate or channels")
+
+        current = audio.astype(np.float32)
+        segments = []
+        if self._tail is not None:
+            n = min(len(self._tail), len(current))
+            ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+            if current.ndim > 1:
+                ramp = ramp[:, None]
+            keep = len(self._tail) - n
+            segments.append(self._tail[:keep])
+            segments.append(self._tail[keep:] * (1.0 - ramp) + current[:n] * ramp)
+            current = current[n:]
+
+        hold = min(int(rate * self.crossfade_ms / 1000), len(current))
+        segments.append(current[: len(current) - hold])
+        self._tail = current[len(current) - hold :]
+        return self._convert(np.concatenate(segments))
+
+    def finish(self) -> np.ndarray:
+        """The held-back end of the last file."""
+        tail, self._tail = self._tail, None
+        return self._convert(tail)
+
+    def _convert(self, samples: np.ndarray) -> np.ndarray:
+        if np.issubdtype(self._dtype, np.integer):
+            limits = np.iinfo(self._dtype)
+            samples = np.clip(np.rint(samples), limits.min, limits.max)
+        return samples.astype(self._dtype)
+
+    def pcm(self, samples: np.ndarray) -> bytes:
+        """
+        `samples` as bytes for a player fed one piece at a time. The first
+        piece starts with a WAV header whose sizes are left open, since the
+        total length is not known yet.
+        """
+        if self._header_sent:
+            return samples.tobytes()
+        self._header_sent = True
+        buffer = io.BytesIO()
+        wavfile.write(buffer, self.rate, np.zeros((0,) + self._channels, self._dtype))
+        header = bytearray(buffer.getvalue())
+        header[4:8] = b"\xff\xff\xff\xff"
+        data = header.rfind(b"data")
+        header[data + 4 : data + 8] = b"\xff\xff\xff\xff"
+        return bytes(header) + samples.tobytes()
+
+
+def get_long_text_chunker() -> LongTextChunker:
+    """
+    Chunker configured from LONG_TEXT_MAX_CHARS (characters per chunk; default
+    0, which turns the long-text mode off) and LONG_TEXT_CROSSFADE_MS (default 30).
+    """
+    try:
+        max_chars = int(os.environ.get("LONG_TEXT_MAX_CHARS", 0))
+        crossfade_ms = float(os.environ.get("LONG_TEXT_CROSSFADE_MS", 30))
+    except ValueError:
+        logger.warning("Invalid LONG_TEXT_* setting, using defaults")
+        max_chars, crossfade_ms = 0, 30.0
+    return LongTextChunker(max_chars, crossfade_ms)
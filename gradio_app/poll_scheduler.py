@@ -0,0 +1,373 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# A poll function returns None while the task is still pending (or the poll
+# failed transiently) and the final result once the task has finished.
+# Batched entries get the response fetched for them by their group's batch
+# function as the only argument, or None when they have to fetch it themselves.
+PollFn = Callable[..., Awaitable[Optional[Any]]]
+
+# A batch function takes the item ids of one group and returns the raw poll
+# response per id. Ids missing from the returned map are polled individually.
+BatchPollFn = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+
+class CompletionStats:
+    """
+    Rolling window of observed completion times (seconds) for one task type.
+    """
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self._samples)
+        position = q * (len(ordered) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class _PollEntry:
+    __slots__ = (
+        "key",
+        "poll_fn",
+        "batch",
+        "task_type",
+        "result",
+        "final",
+        "update",
+        "created_at",
+        "last_access",
+        "last_polled_at",
+        "next_poll_at",
+        "late_polls",
+        "finished_at",
+    )
+
+    def __init__(
+        self,
+        key: str,
+        poll_fn: PollFn,
+        batch: Optional[Tuple[str, str]],
+        task_type: Optional[str],
+        loop: asyncio.AbstractEventLoop,
+    ):
+        now = time.monotonic()
+        self.key = key
+        self.poll_fn = poll_fn
+        self.batch = batch
+        self.task_type = task_type
+        self.result = None
+        self.final = False
+        self.update = loop.create_future()
+        self.created_at = now
+        self.last_access = now
+        self.last_polled_at = now
+        self.next_poll_at = now
+        # Polls made after the learned completion window has passed (drives backoff).
+        self.late_polls = 0
+        self.finished_at = 0.0
+
+
+class PollScheduler:
+    """
+    Owns every outstanding task id in the process and decides when to poll each.
+
+    Sessions never hit the backend themselves: timer-driven check handlers read
+    the latest result with `check()`, and long-running generators wait for the
+    next poll with `next_result()`. Several sessions asking about the same key
+    share one backend poll.
+
+    Poll times adapt per task type. Until `min_samples` completions of a type
+    have been seen its tasks are polled every `interval` seconds. After that the
+    scheduler polls at the 10/25/50/75/90th percentiles of the observed
+    completion times, then backs off exponentially from `min_interval` up to
+    `max_interval` for stragglers.
+
+    Keys tracked with `batch=(group, item_id)` are fetched together: the group's
+    batch function (see `register_batch()`) is called with all item ids that are
+    due, in chunks of at most `max_size`.
+    """
+
+    QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+    def __init__(
+        self,
+        interval: float = 2.0,
+        min_interval: float = 0.5,
+        max_interval: float = 10.0,
+        backoff: float = 1.5,
+        min_samples: int = 5,
+        max_concurrency: int = 16,
+        idle_timeout: float = 30.0,
+        retention: float = 60.0,
+    ):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.min_samples = min_samples
+        self.max_concurrency = max_concurrency
+        # Pending tasks nobody asked about for this long are dropped (session gone).
+        self.idle_timeout = idle_timeout
+        # Finished results are kept this long for late readers.
+        self.retention = retention
+        self._entries: Dict[str, _PollEntry] = {}
+        self._batchers: Dict[str, Tuple[BatchPollFn, int]] = {}
+        self._stats: Dict[str, CompletionStats] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _ensure_running(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # Futures are bound to their loop, so entries cannot move between loops.
+            self._entries.clear()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+            logger.info(
+                f"Poll scheduler started (interval={self.interval}s, "
+                f"min_interval={self.min_interval}s, max_interval={self.max_interval}s)"
+            )
+        return loop
+
+    def register_batch(self, group: str, batch_fn: BatchPollFn, max_size: int = 50):
+        """Polls the entries tracked with `batch=(group, ...)` through `batch_fn`."""
+        self._batchers[group] = (batch_fn, max_size)
+        logger.info(f"Batch polling enabled for {group} (max_size={max_size})")
+
+    def _track(
+        self,
+        key: str,
+        poll_fn: PollFn,
+        batch: Optional[Tuple[str, str]],
+        task_type: Optional[str],
+    ) -> _PollEntry:
+        loop = self._ensure_running()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PollEntry(key, poll_fn, batch, task_type, loop)
+            entry.next_poll_at = entry.created_at + self._next_delay(entry, entry.created_at)
+            self._entries[key] = entry
+            self._wakeup.set()
+        entry.last_access = time.monotonic()
+        return entry
+
+    def check(
+        self,
+        key: str,
+        poll_fn: PollFn,
+        pending: Any = None,
+        batch: Optional[Tuple[str, str]] = None,
+        task_type: Optional[str] = None,
+    ) -> Any:
+        """Registers `key` if needed and returns its final result, or `pending`."""
+        entry = self._track(key, poll_fn, batch, task_type)
+        return entry.result if entry.final else pending
+
+    def resolve(self, key: str, result: Any):
+        """Records a final result for `key` without polling (e.g. served from a cache)."""
+        loop = self._ensure_running()
+        entry = _PollEntry(key, None, None, None, loop)
+        entry.result = result
+        entry.final = True
+        entry.finished_at = entry.created_at
+        entry.update.set_result(result)
+        self._entries[key] = entry
+
+    def discard(self, key: str):
+        """Stops polling `key` (e.g. its task was cancelled); its waiters get None."""
+        entry = self._entries.pop(key, None)
+        if entry is not None and not entry.update.done():
+            entry.update.set_result(None)
+
+    async def next_result(
+        self,
+        key: str,
+        poll_fn: PollFn,
+        batch: Optional[Tuple[str, str]] = None,
+        task_type: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[Any]:
+        """
+        Waits for the next poll of `key` (at most `timeout` seconds) and returns
+        the final result, or None if the task is still pending.
+        """
+        entry = self._track(key, poll_fn, batch, task_type)
+        if entry.final:
+            return entry.result
+        try:
+            return await asyncio.wait_for(asyncio.shield(entry.update), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    @property
+    def pending_count(self) -> int:
+        return sum(1 for entry in self._entries.values() if not entry.final)
+
+    def _next_delay(self, entry: _PollEntry, now: float) -> float:
+        stats = self._stats.get(entry.task_type)
+        if stats is None or len(stats) < self.min_samples:
+            return self.interval
+
+        elapsed = now - entry.created_at
+        for q in self.QUANTILES:
+            wait = stats.quantile(q) - elapsed
+            if wait >= self.min_interval:
+                return wait
+
+        # Past the usual completion window: back off for stragglers.
+        entry.late_polls += 1
+        return min(self.min_interval * self.backoff**entry.late_polls, self.max_interval)
+
+    def _record_completion(self, entry: _PollEntry, now: float):
+        if entry.task_type is None:
+            return
+        if entry.last_polled_at > entry.created_at:
+            # The task finished somewhere between the previous poll and this one.
+            duration = (entry.last_polled_at + now) / 2 - entry.created_at
+        else:
+            # Done on the first poll: only an upper bound is known.
+            duration = now - entry.created_at
+        self._stats.setdefault(entry.task_type, CompletionStats()).add(duration)
+        logger.debug(f"{entry.task_type} task {entry.key} completed in ~{duration:.1f}s")
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            next_due = min(
+                (entry.next_poll_at for entry in self._entries.values() if not entry.final),
+                default=now + self.max_interval,
+            )
+            # Wake up early when a new key is tracked, and at least every
+            # max_interval so idle entries get evicted.
+            timeout = min(max(next_due - now, 0), self.max_interval)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._tick()
+            except Exception as e:
+                logger.error(f"Poll scheduler tick failed: {e}")
+
+    async def _tick(self):
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            expired = (
+                now - entry.finished_at > self.retention
+                if entry.final
+                else now - entry.last_access > self.idle_timeout
+            )
+            if expired:
+                del self._entries[key]
+                if not entry.update.done():
+                    entry.update.set_result(None)
+
+        # Entries due within half the minimum interval are polled now, so nearby
+        # polls share one wake-up (and one batch request).
+        horizon = now + self.min_interval / 2
+        singles = []
+        batches: Dict[str, List[_PollEntry]] = {}
+        for entry in self._entries.values():
+            if entry.final or entry.next_poll_at > horizon:
+                continue
+            if entry.batch and entry.batch[0] in self._batchers:
+                batches.setdefault(entry.batch[0], []).append(entry)
+            else:
+                singles.append(entry)
+
+        await asyncio.gather(
+            *(self._poll(entry) for entry in singles),
+            *(self._poll_batch(group, entries) for group, entries in batches.items()),
+        )
+
+    async def _fetch_batch(self, group: str, item_ids: List[str]) -> Dict[str, Any]:
+        batch_fn, _ = self._batchers[group]
+        async with self._semaphore:
+            try:
+                return await batch_fn(item_ids) or {}
+            except Exception as e:
+                logger.warning(f"Batch poll of {len(item_ids)} {group} tasks failed: {e}")
+                return {}
+
+    async def _poll_batch(self, group: str, entries: List[_PollEntry]):
+        _, max_size = self._batchers[group]
+        item_ids = list(dict.fromkeys(entry.batch[1] for entry in entries))
+        chunks = [item_ids[i : i + max_size] for i in range(0, len(item_ids), max_size)]
+        responses = {}
+        for chunk_responses in await asyncio.gather(
+            *(self._fetch_batch(group, chunk) for chunk in chunks)
+        ):
+            responses.update(chunk_responses)
+
+        await asyncio.gather(
+            *(self._poll(entry, responses.get(entry.batch[1])) for entry in entries)
+        )
+
+    async def _poll(self, entry: _PollEntry, response: Any = None):
+        async with self._semaphore:
+            try:
+                if response is None:
+                    result = await entry.poll_fn()
+                else:
+                    result = await entry.poll_fn(response)
+            except Exception as e:
+                logger.error(f"Polling {entry.key} failed: {e}")
+                result = None
+
+        now = time.monotonic()
+        if result is not None:
+            entry.result = result
+            entry.final = True
+            entry.finished_at = now
+            self._record_completion(entry, now)
+        else:
+            entry.last_polled_at = now
+            entry.next_poll_at = now + self._next_delay(entry, now)
+        update, entry.update = entry.update, asyncio.get_running_loop().create_future()
+        if not update.done():
+            update.set_result(entry.result)
+
+
+_scheduler = None
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}, falling back to {default}")
+        return default
+
+
+def get_poll_scheduler() -> PollScheduler:
+    """
+    Returns the scheduler shared by every tab in the process, configured from:
+      POLL_INTERVAL      seconds between polls of a task type with no history yet (default 2)
+      POLL_MIN_INTERVAL  shortest gap between two polls of one task (default 0.5)
+      POLL_MAX_INTERVAL  longest gap while backing off (default 10)
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PollScheduler(
+            interval=_env_float("POLL_INTERVAL", 2.0),
+            min_interval=_env_float("POLL_MIN_INTERVAL", 0.5),
+            max_interval=_env_float("POLL_MAX_INTERVAL", 10.0),
+        )
+    return _scheduler
@@ -25,6 +25,10 @@ if __name__ == '__main__':
         '.',  # Watch the current directory
         target=f'{sys.executable} app.py --color',  # Command to run
         target_type='command',
+        # Caches and the task journal are written while the app runs; they must not restart it
+        watch_filter=watchfiles.DefaultFilter(
+            ignore_dirs=(*watchfiles.DefaultFilter.ignore_dirs, 'cache')
+        ),
         debounce=2_000,
         step=1_000,
         sigint_timeout=1,
@@ -2,6 +2,7 @@ import gradio as gr
 import json
 import os
 from loguru import logger
+from task_manager import DONE, PENDING, task_state
 
 class AudioInstructTab:
     def __init__(self, speech_service):
@@ -158,7 +159,8 @@ class AudioInstructTab:
                 fn=self.check_task_status,
                 inputs=[task_id_state, polling_counter],
                 outputs=[audio_output, polling_counter, status_msg],
-                every=2
+                every=2,
+                concurrency_limit=None
             )
 
             logger.info("Structured mode events bound.")
@@ -178,7 +180,8 @@ class AudioInstructTab:
                 fn=self.check_task_status,
                 inputs=[expert_task_id_state, expert_polling_counter],
                 outputs=[expert_audio_output, expert_polling_counter, expert_status_msg],
-                every=2
+                every=2,
+                concurrency_limit=None
             )
 
             logger.info("Expert mode events bound.")
@@ -193,7 +196,8 @@ class AudioInstructTab:
                 fn=self.check_task_status,
                 inputs=[free_task_id_state, free_polling_counter],
                 outputs=[free_audio_output, free_polling_counter, free_status_msg],
-                every=2
+                every=2,
+                concurrency_limit=None
             )
 
     def update_ui_visibility(self, instruct_type):
@@ -255,7 +259,7 @@ class AudioInstructTab:
 
         return {"audio_sequence": [base_caption]}
 
-    def _submit_task(self, payload):
+    async def _submit_task(self, payload):
         """
         内部任务提交方法。
         调用 SpeechService 的 submit_instruct_task 方法。
@@ -264,9 +268,9 @@ class AudioInstructTab:
 
         # 调用 SpeechService 的新接口
         # payload 已经包含了 text, prompt_audio, caption, seed
-        return self.service.submit_instruct_task(payload)
+        return await self.service.submit_instruct_task(payload)
 
-    def _check_task(self, task_id):
+    async def _check_task(self, task_id):
         """
         内部任务状态检查方法。
         调用 SpeechService 的 poll_instruct_task 方法。
@@ -274,9 +278,9 @@ class AudioInstructTab:
 
         logger.info(f"AudioInstructTab checking task status for task_id: {task_id}")
 
-        return self.service.poll_instruct_task(task_id)
+        return await self.service.poll_instruct_task(task_id)
 
-    def submit_structured_task(self, instruct_type, text, prompt_audio,
+    async def submit_structured_task(self, instruct_type, text, prompt_audio,
                              speaker_id, pitch, volume, speed, dialect, emotion,
                              ip_character, style, album, seed):
         """提交结构化任务"""
@@ -299,25 +303,25 @@ class AudioInstructTab:
         }
 
         # 调用内部提交方法
-        task_id = self._submit_task(payload)
+        task_id = await self._submit_task(payload)
 
         if task_id.startswith("错误"):
             return None, 0, task_id, None
 
         return task_id, 1, f"任务已提交 (ID: ...{task_id[-6:]})", None
 
-    def submit_expert_task(self, text, prompt_audio,
+    async def submit_expert_task(self, text, prompt_audio,
                          speaker_id, pitch, volume, speed, dialect, emotion,
                          ip_character, style, album, seed):
         """提交专家模式任务"""
 
         logger.info(f"Submitting expert task with text: {text}")
 
-        return self.submit_structured_task("expert", text, prompt_audio,
+        return await self.submit_structured_task("expert", text, prompt_audio,
                                          speaker_id, pitch, volume, speed, dialect, emotion,
                                          ip_character, style, album, seed)
 
-    def submit_json_task(self, json_str, prompt_audio, seed):
+    async def submit_json_task(self, json_str, prompt_audio, seed):
         """提交 JSON 模式任务"""
 
         logger.info(f"Submitting JSON task with input: {json_str}")
@@ -361,14 +365,14 @@ class AudioInstructTab:
             "seed": seed,
         }
 
-        task_id = self._submit_task(payload)
+        task_id = await self._submit_task(payload)
 
         if task_id.startswith("错误"):
             return None, 0, task_id, None
 
         return task_id, 1, f"任务已提交 (ID: ...{task_id[-6:]})", None
 
-    def check_task_status(self, task_id, polling_counter):
+    async def check_task_status(self, task_id, polling_counter):
         """检查任务状态"""
 
         # 如果没有任务ID或者轮询计数器归零（任务已结束），则停止轮询逻辑
@@ -378,12 +382,12 @@ class AudioInstructTab:
         logger.info(f"Checking task status for task_id: {task_id}, polling_counter: {polling_counter}")
 
         # 调用内部检查方法
-        status, result = self._check_task(task_id)
+        status, result = await self._check_task(task_id)
 
-        if status == "pending":
+        if task_state(status) == PENDING:
             elapsed = polling_counter * 2
             return gr.update(), polling_counter + 1, f"合成中... ({elapsed}s)"
-        elif status == "done" or status == "completed":
+        elif task_state(status) == DONE:
             return gr.update(value=result), 0, "合成成功！"
         else:
             return gr.update(), 0, f"失败: {status}"
@@ -1,17 +1,41 @@
-import base64
-import gzip
-import io
+import asyncio
 import json
 import os
 import time
 import uuid
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
 import gradio as gr
-import requests
 from loguru import logger
 from pypinyin import Style, pinyin
+from audio_transport import get_transport_codec, iter_gzip_b64, tag_codec
+from long_text import CrossfadeStream, get_long_text_chunker
+from output_store import SHARED_NAMESPACE, get_output_store, session_namespace
+from poll_scheduler import get_poll_scheduler
+from queue_lanes import get_queue_lanes
+from result_cache import SingleFlight, get_encoded_audio_cache, get_result_cache, make_cache_key
+from task_journal import get_task_journal
+from task_manager import (
+    CANCELLED,
+    DONE,
+    FAILED,
+    TIMED_OUT,
+    get_task_manager,
+    submitted_task_id,
+)
+from webgw_client import AsyncWebGWClient
+
+# 可以流式输出的任务（i_tts_output、zs_tts_output、pod_output），见 STREAMING_AUDIO_OUTPUT
+STREAMING_TASK_TYPES = ("TTS", "zero_shot_TTS", "podcast")
+
+# 没有随机种子的生成任务（背景音乐、音效、语音配乐）每次生成的结果都不同，不读写结果缓存，
+# 否则“再次生成”总是得到同一段音频
+UNCACHED_TASK_TYPES = ("bgm", "TTA", "speech_with_bgm")
+
+# 参考音频的 Base64 字段不计入缓存键，参考音频改为按文件内容哈希计入
+PROMPT_B64_FIELDS = ("prompt_wav_b64", "prompt_wavs_b64")
 
 # --- 静态数据 ---
 DROPDOWN_CHOICES = {
@@ -192,6 +216,22 @@ class MingOmniTTSDemoTab:
         self.api_key = webgw_api_key
         self.app_id = webgw_app_id
         self.api_project = api_project
+        self.webgw_client = AsyncWebGWClient(webgw_url, webgw_api_key, webgw_app_id)
+        self.poll_scheduler = get_poll_scheduler()
+        self.tasks = get_task_manager()
+        self.lanes = get_queue_lanes()
+        self.result_cache = get_result_cache()
+        self.audio_b64_cache = get_encoded_audio_cache()
+        self.audio_codec = get_transport_codec()
+        self.output_store = get_output_store()
+        self.journal = get_task_journal()
+        self.long_text = get_long_text_chunker()
+        self.streaming_output = os.environ.get("STREAMING_AUDIO_OUTPUT", "false").lower() == "true"
+        self.inflight = SingleFlight()
+        self._inflight_keys = {}  # task_id -> cache_key
+        self._runs = {}  # (namespace, task_type) -> superseded flag of the session's latest request
+        if os.environ.get("WEBGW_BATCH_POLL", "false").lower() == "true":
+            self.poll_scheduler.register_batch(api_project, self._poll_tasks_batch)
 
     def create_tab(self):
         with gr.TabItem("Ming-omni-tts"):
@@ -257,7 +297,11 @@ class MingOmniTTSDemoTab:
                         with gr.Column(scale=1):
                             i_tts_status = gr.Markdown(value="💡 请选择指令类型并填写参数。")
                             i_tts_output = gr.Audio(
-                                label="生成结果", type="filepath", interactive=False
+                                label="生成结果",
+                                type="filepath",
+                                interactive=False,
+                                streaming=self.streaming_output,
+                                autoplay=self.streaming_output,
                             )
 
                     def update_details_visibility(instruct_type):
@@ -305,7 +349,11 @@ class MingOmniTTSDemoTab:
                         with gr.Column(scale=1):
                             zs_tts_status = gr.Markdown(value="💡 请输入文本并上传参考音频。")
                             zs_tts_output = gr.Audio(
-                                label="生成结果", type="filepath", interactive=False
+                                label="生成结果",
+                                type="filepath",
+                                interactive=False,
+                                streaming=self.streaming_output,
+                                autoplay=self.streaming_output,
                             )
 
                 # --- Tab 3: 多人播客 ---
@@ -335,7 +383,11 @@ class MingOmniTTSDemoTab:
                                 value="💡 请填写脚本并上传两位说话人的参考音频。"
                             )
                             pod_output = gr.Audio(
-                                label="生成结果", type="filepath", interactive=False
+                                label="生成结果",
+                                type="filepath",
+                                interactive=False,
+                                streaming=self.streaming_output,
+                                autoplay=self.streaming_output,
                             )
 
                 # --- Tab 4: 带背景音乐的语音 ---
@@ -436,7 +488,7 @@ class MingOmniTTSDemoTab:
                             )
 
             # --- 事件绑定 ---
-            def i_tts_submit(
+            async def i_tts_submit(
                 instruct_type,
                 text,
                 prompt_audio,
@@ -447,6 +499,7 @@ class MingOmniTTSDemoTab:
                 speed,
                 pitch,
                 volume,
+                request: gr.Request,
             ):
                 details = {}
                 if instruct_type == "emotion":
@@ -462,7 +515,15 @@ class MingOmniTTSDemoTab:
                     details = {"风格": style}
                 elif instruct_type == "basic":
                     details = {"语速": speed, "基频": pitch, "音量": volume}
-                yield from self._submit_and_poll("TTS", instruct_type, text, prompt_audio, details)
+                async for update in self._submit_and_poll(
+                    "TTS",
+                    instruct_type,
+                    text,
+                    prompt_audio,
+                    details,
+                    namespace=session_namespace(request),
+                ):
+                    yield update
 
             i_tts_btn.click(
                 fn=i_tts_submit,
@@ -479,20 +540,26 @@ class MingOmniTTSDemoTab:
                     i_tts_volume,
                 ],
                 outputs=[i_tts_status, i_tts_btn, i_tts_output],
+                **self.lanes.listener("instruct"),
             )
 
+            # 端点名沿用这些按钮原先以 lambda 绑定时的 API 名称，已有的 API 客户端不受影响
             zs_tts_btn.click(
-                fn=lambda *args: (yield from self._submit_and_poll("zero_shot_TTS", *args)),
+                fn=self._poll_handler("zero_shot_TTS"),
                 inputs=[zs_tts_text, zs_tts_prompt],
                 outputs=[zs_tts_status, zs_tts_btn, zs_tts_output],
+                api_name="lambda",
+                **self.lanes.listener("tts"),
             )
             pod_btn.click(
-                fn=lambda *args: (yield from self._submit_and_poll("podcast", *args)),
+                fn=self._poll_handler("podcast"),
                 inputs=[pod_text, pod_prompt1, pod_prompt2],
                 outputs=[pod_status, pod_btn, pod_output],
+                api_name="lambda_1",
+                **self.lanes.listener("podcast"),
             )
             swb_btn.click(
-                fn=lambda *args: (yield from self._submit_and_poll("speech_with_bgm", *args)),
+                fn=self._poll_handler("speech_with_bgm"),
                 inputs=[
                     swb_text,
                     swb_prompt,
@@ -503,71 +570,325 @@ class MingOmniTTSDemoTab:
                     swb_snr,
                 ],
                 outputs=[swb_status, swb_btn, swb_output],
+                api_name="lambda_2",
+                **self.lanes.listener("speech_with_bgm"),
             )
             bgm_btn.click(
-                fn=lambda *args: (yield from self._submit_and_poll("bgm", *args)),
+                fn=self._poll_handler("bgm"),
                 inputs=[bgm_genre, bgm_mood, bgm_instrument, bgm_theme, bgm_duration],
                 outputs=[bgm_status, bgm_btn, bgm_output],
+                api_name="lambda_3",
+                **self.lanes.listener("bgm"),
             )
             tta_btn.click(
-                fn=lambda *args: (yield from self._submit_and_poll("TTA", *args)),
+                fn=self._poll_handler("TTA"),
                 inputs=[tta_text],
                 outputs=[tta_status, tta_btn, tta_output],
+                api_name="lambda_4",
+                **self.lanes.listener("tta"),
             )
 
     # --- 辅助方法 ---
-    def _file_to_b64(self, filepath: Optional[str]) -> Optional[str]:
+    def _poll_handler(self, task_type: str):
+        """Wraps _submit_and_poll as an async generator event handler for `task_type`."""
+
+        async def handler(request: gr.Request, *args):
+            # 生成的音频存放在各自会话的输出目录中，清理时互不影响
+            namespace = session_namespace(request)
+            updates = self._submit_and_poll(task_type, *args, namespace=namespace)
+            try:
+                async for update in updates:
+                    yield update
+            finally:
+                # 客户端断开时 Gradio 关闭本生成器，随之关闭内层生成器，释放其等待的任务
+                await updates.aclose()
+
+        return handler
+
+    def _file_to_b64(self, filepath: Optional[str]) -> Tuple[Optional[str], str]:
+        """返回 (Base64 音频, 编码格式)，编码格式见 AUDIO_TRANSPORT"""
         if not filepath or not os.path.exists(filepath):
-            return None
-        with open(filepath, "rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
+            return None, "wav"
+        return self.audio_b64_cache.encode(filepath, self.audio_codec)
+
+    def _cache_key(self, payload: dict, audio_paths: List[str]) -> str:
+        """请求的缓存键：参考音频按文件内容哈希计入，不序列化其 Base64 文本（读取文件，需在线程中调用）"""
+        fields = {k: v for k, v in payload.items() if k not in PROMPT_B64_FIELDS}
+        return make_cache_key(self.api_project, fields, audio_paths)
+
+    async def _poll_tasks_batch(self, task_ids: List[str]) -> Dict[str, dict]:
+        """一次请求查询多个任务状态，返回 {task_id: 任务状态}"""
+        r = await self.webgw_client.call(
+            self.api_project,
+            "poll_task",
+            {"task_ids": task_ids},
+            call_token=str(uuid.uuid4()),
+            timeout=30,
+        )
+        r.raise_for_status()
+        res_data = r.json()
+
+        if not res_data.get("success"):
+            raise ConnectionError(f"Batch poll request failed: {res_data.get('errorMessage')}")
+
+        inner_result = res_data.get("resultObj", {}).get("result") or {}
+        if isinstance(inner_result, str):
+            inner_result = json.loads(inner_result)
+        return inner_result.get("tasks") or {}
+
+    async def _poll_task_once(
+        self, task_type: str, task_id: str, poll_res: Optional[dict] = None
+    ) -> Optional[dict]:
+        """
+        查询一次任务状态（由轮询调度器调用）。任务仍在进行时返回 None。
+        批量轮询时 poll_res 为调度器已取回的任务状态，不再单独请求。
+        """
+        if poll_res is None:
+            r = await self.webgw_client.call(
+                self.api_project,
+                "poll_task",
+                {"task_id": task_id},
+                call_token=str(uuid.uuid4()),
+                timeout=30,
+            )
+            r.raise_for_status()
+            res_data = r.json()
+
+            if not res_data.get("success"):
+                logger.warning(f"Poll request failed: {res_data.get('errorMessage')}")
+                return None  # 轮询失败暂不中断，重试
+
+            result_obj = res_data.get("resultObj", {})
+            inner_result = result_obj.get("result")  # 对象或字符串
+
+            if not inner_result:
+                return None
+
+            if isinstance(inner_result, str):
+                poll_res = json.loads(inner_result)
+            else:
+                poll_res = inner_result
+
+        # status: pending / completed / failed
+        status = poll_res.get("status")
+        logger.info(f"[{task_type}] Poll status for task {task_id}: {status}")
+        if status in ("completed", "success", "failed", "cancelled"):
+            return poll_res
+        return None
+
+    def _track_task(self, task_type: str, task_id: str) -> None:
+        """交给任务管理器跟踪已提交的任务（已在跟踪时不重复登记）"""
+        self.tasks.track(
+            task_type,
+            task_id,
+            partial(self._poll_task_once, task_type, task_id),
+            batch=(self.api_project, task_id),
+            on_finish=self._task_finished,
+            cancel_fn=partial(self._cancel_task, task_type, task_id),
+        )
+
+    async def _task_finished(self, record):
+        """任务结束时结束相同请求的合并；失败、超时或取消记入任务日志（完成的在下载音频后记录）"""
+        self.inflight.release(self._inflight_keys.pop(record.task_id, None))
+        if record.state != DONE:
+            error = record.result.get("error_message") if record.state == FAILED else None
+            await asyncio.to_thread(
+                self.journal.finish, self.api_project, record.task_id, record.state, error
+            )
+
+    async def _cancel_task(self, task_type: str, task_id: str):
+        """请求后端取消任务（由任务管理器在没有请求等待该任务时调用）"""
+        r = await self.webgw_client.call(
+            self.api_project,
+            "cancel_task",
+            {"task_id": task_id},
+            call_token=str(uuid.uuid4()),
+            timeout=30,
+        )
+        r.raise_for_status()
+        res_data = r.json()
+
+        if not res_data.get("success"):
+            raise ConnectionError(f"Cancel request failed: {res_data.get('errorMessage')}")
+        logger.info(f"[{task_type}] Backend task {task_id} cancelled")
 
-    def _cleanup_temp_files(self, output_dir: str, max_files: int = 10):
+    def _supersede(self, namespace: str, task_type: str) -> asyncio.Event:
         """
-        清理临时目录，仅保留最新的 max_files 个文件。
+        登记会话的一次新请求并返回其取代标志。同一会话之前的同类请求随即被取代：
+        停止轮询并释放其任务。共享目录中的请求（API 调用）互不取代。
         """
+        superseded = asyncio.Event()
+        if namespace != SHARED_NAMESPACE:
+            previous = self._runs.get((namespace, task_type))
+            if previous is not None:
+                previous.set()
+            self._runs[(namespace, task_type)] = superseded
+        return superseded
+
+    async def _submit_task(
+        self, task_type: str, payload: dict, cache_key: str, namespace: str = SHARED_NAMESPACE
+    ) -> str:
+        """提交任务到 WebGW 并返回 task_id，失败时抛出异常；任务记入任务日志，服务重启后可继续轮询"""
+        call_token = str(uuid.uuid4())
+        logger.info(f"[{task_type}] Submitting task to WebGW. Token: {call_token}")
+
+        logger.info(f"Submitting task to WebGW: {self.webgw_url}")
+        r = await self.webgw_client.call(
+            self.api_project, "submit_task", payload, call_token=call_token, timeout=30
+        )
+        r.raise_for_status()
+        task_id, error = submitted_task_id(r.json())
+        if not task_id:
+            raise ValueError(f"WebGW 任务提交失败: {error or '未能从响应中获取 task_id'}")
+
+        self._inflight_keys[task_id] = cache_key
+        await asyncio.to_thread(
+            self.journal.record, self.api_project, task_type, task_id, cache_key, namespace
+        )
+        return task_id
+
+    async def _download_audio(self, poll_res: dict, namespace: str) -> str:
+        """下载已完成任务的音频（经 FaaS 代理），写入输出目录中 `namespace` 的子目录并返回路径"""
+        audio_url = poll_res.get("output_audio_url")
+        if not audio_url:
+            raise ValueError("任务完成但未返回音频 URL")
+
+        # 下载音频 (通过 FaaS Proxy 曲线救国，解决 OSS 403 问题)
         try:
-            if not os.path.exists(output_dir):
-                return
+            parsed_url = urlparse(audio_url)
+            query_params = parse_qs(parsed_url.query)
+
+            # 提取 OSS 签名参数
+            proxy_args = {
+                "filename": os.path.basename(parsed_url.path),
+                "oss_access_key_id": query_params.get("OSSAccessKeyId", [None])[0],
+                "expires": query_params.get("Expires", [None])[0],
+                "signature": query_params.get("Signature", [None])[0],
+            }
 
-            files = [
-                os.path.join(output_dir, f)
-                for f in os.listdir(output_dir)
-                if os.path.isfile(os.path.join(output_dir, f))
-            ]
+            logger.info(f"Downloading audio via Proxy: {proxy_args['filename']}")
 
-            # 按修改时间排序（从旧到新）
-            files.sort(key=os.path.getmtime)
+            # 发起代理下载请求 (POST)
+            audio_resp = await self.webgw_client.call(
+                self.api_project,
+                "get_audio",
+                proxy_args,
+                call_token=str(uuid.uuid4()),
+                timeout=60,
+            )
+            audio_resp.raise_for_status()
 
-            if len(files) >= max_files:
-                num_to_delete = (
-                    len(files) - max_files + 1
-                )  # +1 是为了给即将新创建的文件腾位置，保持总数 <= 10
-                for i in range(num_to_delete):
-                    try:
-                        os.remove(files[i])
-                        logger.info(f"Deleted old temp file: {files[i]}")
-                    except OSError as e:
-                        logger.warning(f"Error deleting file {files[i]}: {e}")
+            res_json = audio_resp.json()
+            if not res_json.get("success"):
+                raise RuntimeError(
+                    f"Proxy download error: {res_json.get('errorMessage', 'Unknown error')}"
+                )
+
+            # 解析 Gzip+Base64 响应
+            result_obj = res_json.get("resultObj", {})
+            # result 可能是 JSON 对象也可能是字符串
+            inner_result = result_obj.get("result")
+            if isinstance(inner_result, str):
+                try:
+                    inner_result = json.loads(inner_result)
+                except json.JSONDecodeError:
+                    pass  # 应该不会发生，除非格式错乱
+
+            if not isinstance(inner_result, dict) or "gzippedRaw" not in inner_result:
+                raise ValueError("Invalid proxy response: missing 'gzippedRaw' field")
+
+            # 分块 Base64 解码并解压 Gzip，边解压边写入输出目录，不在内存中保留完整音频
+            # (如果不是 Gzip 格式，虽然服务端强制压缩了，则直接使用解码后的内容)
+            return await asyncio.to_thread(
+                self.output_store.save_stream,
+                iter_gzip_b64(inner_result["gzippedRaw"]),
+                ".wav",
+                namespace,
+            )
         except Exception as e:
-            logger.error(f"Error during temp file cleanup: {e}")
+            logger.error(f"Audio download via proxy failed: {e}")
+            raise RuntimeError(f"音频下载失败: {e}")
+
+    async def _collect_result(
+        self, task_type: str, task_id: str, poll_res: dict, cache_key: str, namespace: str
+    ) -> str:
+        """下载已完成任务的音频，写入结果缓存，并在任务日志中记下结果位置"""
+        audio_file = await self._download_audio(poll_res, namespace)
+        if task_type not in UNCACHED_TASK_TYPES:
+            await self._cache_result(cache_key, audio_file)
+        await asyncio.to_thread(self.journal.finish, self.api_project, task_id, "done", audio_file)
+        return audio_file
+
+    async def _cache_result(self, cache_key: str, audio_file: str):
+        """把结果的共享目录链接写入结果缓存：会话清理自己的文件时不影响缓存和其他会话"""
+        shared_file = await asyncio.to_thread(self.output_store.link, audio_file, SHARED_NAMESPACE)
+        await asyncio.to_thread(self.result_cache.put, cache_key, shared_file)
+
+    async def resume_tasks(self):
+        """
+        服务重启后继续轮询任务日志中尚未完成的任务，完成后音频照常写入结果缓存。
+        重新连接的会话再次提交相同请求时直接得到结果，任务仍在进行时则加入该任务，不会重复提交。
+        """
+        entries = await asyncio.to_thread(self.journal.pending, self.api_project)
+        if not entries:
+            return
+        logger.info(f"Resuming {len(entries)} unfinished {self.api_project} tasks")
+
+        async def resume(entry):
+            if entry.cache_key:
+                self.inflight.adopt(entry.cache_key, entry.task_id)
+                self._inflight_keys[entry.task_id] = entry.cache_key
+            self._track_task(entry.kind, entry.task_id)
+            record = self.tasks.get(entry.kind, entry.task_id)
+            while not record.final:
+                # 限时等待：每次等待都会刷新调度器中的任务，不会被当作无人查询而清除
+                record = await self.tasks.wait(
+                    entry.kind, entry.task_id, timeout=self.poll_scheduler.interval
+                )
+            if record.state == DONE:
+                try:
+                    await self._collect_result(
+                        entry.kind,
+                        entry.task_id,
+                        record.result,
+                        entry.cache_key,
+                        entry.namespace or SHARED_NAMESPACE,
+                    )
+                except Exception as e:
+                    logger.warning(f"[{entry.kind}] Resumed task {entry.task_id} failed: {e}")
+                    await asyncio.to_thread(
+                        self.journal.finish, self.api_project, entry.task_id, "failed", str(e)
+                    )
+
+        await asyncio.gather(*(resume(entry) for entry in entries))
 
-    def _submit_and_poll(self, task_type: str, *args):
+    async def _submit_and_poll(self, task_type: str, *args, namespace: str = SHARED_NAMESPACE):
         """
         核心的提交和轮询逻辑。
         独立实现，不依赖外部 SpeechService，适配 UniAudio V4 MOE 接口。
+        生成的音频写入输出目录中 `namespace`（浏览器会话）的子目录。
+        客户端断开（生成器被关闭）或同一会话提交了新的同类请求时停止轮询，释放等待的任务，
+        不再有请求等待的任务随即在后端取消。
         """
+        # 流式输出（STREAMING_AUDIO_OUTPUT）时音频组件只接受音频数据：各部分按顺序完成后逐段推送，
+        # 没有新数据时推送空数据
+        stream = self.streaming_output and task_type in STREAMING_TASK_TYPES
+
+        def no_audio():
+            return b"" if stream else gr.update(value=None)
+
         yield (
             gr.update(value="⏳ 正在准备任务..."),
             gr.update(interactive=False),
-            gr.update(value=None),
+            no_audio(),
         )
 
         payload = {}
+        audio_paths = []  # 参考音频文件，按内容哈希计入缓存键
         try:
             if task_type == "TTS":
                 instruct_type, text, prompt_audio, caption_details = args
-                prompt_b64 = self._file_to_b64(prompt_audio)
+                prompt_b64, prompt_codec = self._file_to_b64(prompt_audio)
 
                 if not text:
                     raise ValueError("合成文本不能为空。")
@@ -585,22 +906,25 @@ class MingOmniTTSDemoTab:
                     "caption": json.dumps(caption_obj, ensure_ascii=False),  # 序列化
                     "prompt_wav_b64": prompt_b64,
                 }
+                tag_codec(payload, "prompt_wav_b64", prompt_codec)
+                audio_paths = [prompt_audio] if prompt_b64 else []
             elif task_type == "zero_shot_TTS":
                 text, prompt_audio = args
                 logger.info(
                     f"[Zero-shot TTS] Preparing task. Text: '{text[:20]}...', Audio: {prompt_audio}"
                 )
-                prompt_b64 = self._file_to_b64(prompt_audio)
+                prompt_b64, prompt_codec = self._file_to_b64(prompt_audio)
                 if not text or not prompt_b64:
                     logger.error("[Zero-shot TTS] Validation failed: Missing text or prompt audio.")
                     raise ValueError("文本和参考音频不能为空。")
                 payload = {"task_type": "zero_shot_TTS", "text": text, "prompt_wav_b64": prompt_b64}
+                tag_codec(payload, "prompt_wav_b64", prompt_codec)
+                audio_paths = [prompt_audio]
                 logger.info("[Zero-shot TTS] Payload constructed successfully.")
             elif task_type == "podcast":
                 text, prompt_audio_1, prompt_audio_2 = args
-                prompt_b64_1, prompt_b64_2 = self._file_to_b64(prompt_audio_1), self._file_to_b64(
-                    prompt_audio_2
-                )
+                prompt_b64_1, codec_1 = self._file_to_b64(prompt_audio_1)
+                prompt_b64_2, codec_2 = self._file_to_b64(prompt_audio_2)
                 if not text or not prompt_b64_1 or not prompt_b64_2:
                     raise ValueError("对话脚本和两个参考音频均不能为空。")
                 payload = {
@@ -608,6 +932,8 @@ class MingOmniTTSDemoTab:
                     "text": text,
                     "prompt_wavs_b64": [prompt_b64_1, prompt_b64_2],
                 }
+                tag_codec(payload, "prompt_wavs_b64", [codec_1, codec_2])
+                audio_paths = [prompt_audio_1, prompt_audio_2]
             elif task_type == "bgm":
                 genre, mood, instrument, theme, duration = args
                 prompt_text = f"Genre: {genre}. Mood: {mood}. Instrument: {instrument}. Theme: {theme}. Duration: {duration}s."
@@ -619,7 +945,7 @@ class MingOmniTTSDemoTab:
                 payload = {"task_type": "TTA", "text": text}
             elif task_type == "speech_with_bgm":
                 text, prompt_audio, genre, mood, instrument, theme, snr = args
-                prompt_b64 = self._file_to_b64(prompt_audio)
+                prompt_b64, prompt_codec = self._file_to_b64(prompt_audio)
                 if not text or not prompt_b64:
                     raise ValueError("文本和参考音频不能为空。")
                 bgm_data = {
@@ -636,6 +962,8 @@ class MingOmniTTSDemoTab:
                     "prompt_wav_b64": prompt_b64,
                     "caption": json.dumps(bgm_data, ensure_ascii=False),  # 序列化
                 }
+                tag_codec(payload, "prompt_wav_b64", prompt_codec)
+                audio_paths = [prompt_audio]
             else:
                 raise ValueError(f"未知的任务类型: {task_type}")
 
@@ -643,218 +971,210 @@ class MingOmniTTSDemoTab:
             yield (
                 gr.update(value=f"❌ 错误：输入参数组装失败 - {e}"),
                 gr.update(interactive=True),
-                gr.update(value=None),
+                no_audio(),
             )
             return
 
-        yield (
-            gr.update(value="🚀 任务提交中..."),
-            gr.update(interactive=False),
-            gr.update(value=None),
-        )
-
-        # --- 发起 WebGW 请求 (Submit) ---
-        call_token = str(uuid.uuid4())
-        logger.info(f"[{task_type}] Submitting task to WebGW. Token: {call_token}")
-
-        request_body = {
-            "api_key": self.api_key,
-            "api_project": self.api_project,
-            "call_name": "submit_task",
-            "call_token": call_token,
-            "call_args": payload,
-        }
-
-        headers = {
-            "Content-Type": "application/json",
-            "x-webgw-appid": self.app_id,
-            "x-webgw-version": "2.0",
-        }
-
+        # 同一会话再次提交同类请求时，本请求被取代
+        superseded = self._supersede(namespace, task_type)
+        task_ids = []
         try:
-            logger.info(f"Submitting task to WebGW: {self.webgw_url}")
-            r = requests.post(url=self.webgw_url, json=request_body, headers=headers, timeout=30)
-            r.raise_for_status()
-            res_data = r.json()
-
-            if not res_data.get("success"):
-                raise ConnectionError(f"WebGW 请求失败: {res_data.get('errorMessage', '未知错误')}")
-
-            # 解析内部结果
-            result_obj = res_data.get("resultObj", {})
-            inner_result_str = result_obj.get("result")
-
-            if not inner_result_str:
-                # 可能是直接返回在 resultObj 里，视具体实现而定，但标准 WebGW 通常在 result 字段返回字符串
-                # 这里的解析逻辑需要适配 Chair FaaS 的 AudioProxyController 返回
-                # 回顾 AudioProxyController，它返回 { result: object }
-                # 如果是 AudioProxyController.ts:
-                # return { success: true, resultObj: { ..., result: res } }
-                # 所以 res 就是 payload
-                inner_result = result_obj.get("result")
-                if not inner_result:
-                    raise ValueError("服务返回中未找到 'result' 字段。")
-            else:
-                # 如果 result 是字符串（常见情况），则 parse
-                if isinstance(inner_result_str, str):
-                    inner_result = json.loads(inner_result_str)
+            # --- 结果缓存 ---
+            cache_key = await asyncio.to_thread(self._cache_key, payload, audio_paths)
+            cached_audio = None
+            if task_type not in UNCACHED_TASK_TYPES:
+                cached_audio = await asyncio.to_thread(self.result_cache.get, cache_key)
+            if cached_audio is not None and self.output_store.touch(cached_audio):
+                logger.info(f"[{task_type}] Result served from cache: {cache_key}")
+                if stream:
+                    crossfade = CrossfadeStream(self.long_text.crossfade_ms)
+                    samples = await asyncio.to_thread(crossfade.push, cached_audio)
+                    cached_audio = crossfade.pcm(samples) + crossfade.pcm(crossfade.finish())
                 else:
-                    inner_result = inner_result_str
-
-            # 检查内部业务成功状态 (根据 V4 接口定义)
-            # V4 MOE 接口通常直接返回 task_id
-            task_id = inner_result.get("task_id")
-            if not task_id:
-                raise ValueError(f"未能从响应中获取 task_id: {inner_result}")
-
-        except Exception as e:
-            logger.error(f"Task submission failed: {e}")
-            yield (
-                gr.update(value=f"❌ 错误：任务提交失败 - {e}"),
-                gr.update(interactive=True),
-                gr.update(value=None),
-            )
-            return
-
-        # --- 轮询逻辑 (Poll) ---
-        max_polls = 60  # 2分钟超时
-        poll_interval = 2
+                    # 缓存中是共享目录的文件，链接到本会话的目录后再交给界面
+                    cached_audio = await asyncio.to_thread(
+                        self.output_store.link, cached_audio, namespace
+                    )
+                yield (
+                    gr.update(value="✅ 成功！"),
+                    gr.update(interactive=True),
+                    cached_audio if stream else gr.update(value=cached_audio),
+                )
+                return
 
-        for i in range(max_polls):
             yield (
-                gr.update(value=f"🔄 生成中... ({i*poll_interval}s)"),
+                gr.update(value="🚀 任务提交中..."),
                 gr.update(interactive=False),
-                gr.update(value=None),
+                no_audio(),
             )
-            time.sleep(poll_interval)
-
-            poll_body = {
-                "api_key": self.api_key,
-                "api_project": self.api_project,
-                "call_name": "poll_task",
-                "call_token": str(uuid.uuid4()),
-                "call_args": {"task_id": task_id},
-            }
-
-            try:
-                r = requests.post(url=self.webgw_url, json=poll_body, headers=headers, timeout=30)
-                r.raise_for_status()
-                res_data = r.json()
-
-                if not res_data.get("success"):
-                    logger.warning(f"Poll request failed: {res_data.get('errorMessage')}")
-                    continue  # 轮询失败暂不中断，重试
 
-                result_obj = res_data.get("resultObj", {})
-                inner_result = result_obj.get("result")  # 对象或字符串
-
-                if not inner_result:
-                    continue
-
-                if isinstance(inner_result, str):
-                    poll_res = json.loads(inner_result)
+            # --- 长文本分句 ---
+            # 长文本按句（播客按说话人轮次）切分，各部分以相同的参考音频和描述作为独立任务并发生成，
+            # 全部完成后交叉淡化拼接
+            parts = [payload]
+            if task_type in STREAMING_TASK_TYPES:
+                if task_type == "podcast":
+                    chunks = self.long_text.split_dialogue(payload["text"])
                 else:
-                    poll_res = inner_result
-
-                # status: pending / completed / failed
-                status = poll_res.get("status")
-                logger.info(f"[{task_type}] Poll status for task {task_id}: {status}")
-
-                if status == "completed" or status == "success":
-                    audio_url = poll_res.get("output_audio_url")
-                    if not audio_url:
-                        raise ValueError("任务完成但未返回音频 URL")
-
-                    # 下载音频 (通过 FaaS Proxy 曲线救国，解决 OSS 403 问题)
-                    try:
-                        parsed_url = urlparse(audio_url)
-                        query_params = parse_qs(parsed_url.query)
-
-                        # 提取 OSS 签名参数
-                        proxy_args = {
-                            "filename": os.path.basename(parsed_url.path),
-                            "oss_access_key_id": query_params.get("OSSAccessKeyId", [None])[0],
-                            "expires": query_params.get("Expires", [None])[0],
-                            "signature": query_params.get("Signature", [None])[0],
-                        }
-
-                        logger.info(f"Downloading audio via Proxy: {proxy_args['filename']}")
-
-                        proxy_payload = {
-                            "api_key": self.api_key,
-                            "api_project": self.api_project,
-                            "call_name": "get_audio",
-                            "call_token": str(uuid.uuid4()),
-                            "call_args": proxy_args,
-                        }
+                    chunks = self.long_text.split(payload["text"])
+                if len(chunks) > 1:
+                    logger.info(f"[{task_type}] Text split into {len(chunks)} chunks")
+                    parts = [{**payload, "text": chunk} for chunk in chunks]
+            part_keys = [cache_key]
+            audio_files = [None] * len(parts)
+            if len(parts) > 1:
+                part_keys = await asyncio.gather(
+                    *(asyncio.to_thread(self._cache_key, part, audio_paths) for part in parts)
+                )
+                # 各部分单独缓存：同一段长文本再次提交时（例如服务重启前已完成一部分），只提交缺少的部分
+                for i, key in enumerate(part_keys):
+                    cached_part = await asyncio.to_thread(self.result_cache.get, key)
+                    if cached_part is not None and self.output_store.touch(cached_part):
+                        audio_files[i] = await asyncio.to_thread(
+                            self.output_store.link, cached_part, namespace
+                        )
 
-                        # 发起代理下载请求 (POST)
-                        audio_resp = requests.post(
-                            url=self.webgw_url, json=proxy_payload, headers=headers, timeout=60
+            # --- 发起 WebGW 请求 (Submit) ---
+            # 相同请求在途时直接复用进行中的任务，不重复提交
+            task_ids = [None] * len(parts)
+            try:
+                missing = [i for i, audio_file in enumerate(audio_files) if audio_file is None]
+                submitted = await asyncio.gather(
+                    *(
+                        self.inflight.run(
+                            part_keys[i],
+                            partial(
+                                self.tasks.submit,
+                                task_type,
+                                partial(
+                                    self._submit_task, task_type, parts[i], part_keys[i], namespace
+                                ),
+                            ),
                         )
-                        audio_resp.raise_for_status()
+                        for i in missing
+                    ),
+                    return_exceptions=True,
+                )
+                # 部分提交失败时已提交的部分照常登记，由 finally 释放：无人等待的任务随即取消
+                for i, task_id in zip(missing, submitted):
+                    if not isinstance(task_id, BaseException):
+                        task_ids[i] = task_id
+                        self._track_task(task_type, task_id)
+                        self.tasks.watch(task_type, task_id)
+                for error in submitted:
+                    if isinstance(error, BaseException):
+                        raise error
+
+            except Exception as e:
+                logger.error(f"Task submission failed: {e}")
+                yield (
+                    gr.update(value=f"❌ 错误：任务提交失败 - {e}"),
+                    gr.update(interactive=True),
+                    no_audio(),
+                )
+                return
 
-                        res_json = audio_resp.json()
-                        if not res_json.get("success"):
+            # --- 轮询逻辑 (Poll) ---
+            # 何时查询后端由调度器按该任务类型的历史耗时决定，这里只按固定间隔刷新界面
+            timeout = 120  # 2分钟超时
+            refresh_interval = self.poll_scheduler.interval
+            started_at = time.monotonic()
+            crossfade = CrossfadeStream(self.long_text.crossfade_ms)
+            streamed = 0  # 已推送的部分数
+            segment = b""  # 待推送的音频数据
+
+            while time.monotonic() - started_at < timeout:
+                elapsed = int(time.monotonic() - started_at)
+                if len(task_ids) > 1:
+                    finished = len(task_ids) - audio_files.count(None)
+                    progress = f"生成中... ({finished}/{len(task_ids)}, {elapsed}s)"
+                else:
+                    progress = f"生成中... ({elapsed}s)"
+                yield (
+                    gr.update(value=f"🔄 {progress}"),
+                    gr.update(interactive=False),
+                    segment if stream else no_audio(),
+                )
+                segment = b""
+                pending = [i for i, audio_file in enumerate(audio_files) if audio_file is None]
+                records = await asyncio.gather(
+                    *(
+                        self.tasks.wait(task_type, task_ids[i], timeout=refresh_interval)
+                        for i in pending
+                    )
+                )
+                if superseded.is_set():
+                    # 界面已由新请求接管，不再推送更新
+                    logger.info(f"[{task_type}] Request superseded by a newer one of the session")
+                    return
+
+                try:
+                    completed = []
+                    for i, record in zip(pending, records):
+                        if record.state == DONE:
+                            completed.append((i, record.result))
+                        elif record.state == FAILED:
                             raise RuntimeError(
-                                f"Proxy download error: {res_json.get('errorMessage', 'Unknown error')}"
+                                f"任务执行失败: {record.result.get('error_message', '未知错误')}"
                             )
-
-                        # 解析 Gzip+Base64 响应
-                        result_obj = res_json.get("resultObj", {})
-                        # result 可能是 JSON 对象也可能是字符串
-                        inner_result = result_obj.get("result")
-                        if isinstance(inner_result, str):
-                            try:
-                                inner_result = json.loads(inner_result)
-                            except json.JSONDecodeError:
-                                pass  # 应该不会发生，除非格式错乱
-
-                        if not isinstance(inner_result, dict) or "gzippedRaw" not in inner_result:
-                            raise ValueError("Invalid proxy response: missing 'gzippedRaw' field")
-
-                        gzipped_b64 = inner_result["gzippedRaw"]
-                        compressed_data = base64.b64decode(gzipped_b64)
-
-                        # 解压 Gzip
-                        try:
-                            with gzip.GzipFile(fileobj=io.BytesIO(compressed_data)) as f_gz:
-                                content = f_gz.read()
-                        except OSError as e:
-                            # 兼容性尝试：如果不是 Gzip 格式（虽然服务端强制压缩了），尝试直接使用
-                            logger.warning(f"Gzip decompression failed, trying raw: {e}")
-                            content = compressed_data
-
-                        os.makedirs("temp_audio", exist_ok=True)
-                        self._cleanup_temp_files("temp_audio")  # 清理旧文件
-
-                        audio_file = os.path.join("temp_audio", f"{task_id}.wav")
-                        with open(audio_file, "wb") as f_out:
-                            f_out.write(content)
-
-                        yield (
-                            gr.update(value="✅ 成功！"),
-                            gr.update(interactive=True),
-                            gr.update(value=audio_file),
+                        elif record.state == TIMED_OUT:
+                            raise RuntimeError("任务超时")
+                        elif record.state == CANCELLED:
+                            raise RuntimeError("任务已取消")
+                    downloads = await asyncio.gather(
+                        *(
+                            self._collect_result(
+                                task_type, task_ids[i], poll_res, part_keys[i], namespace
+                            )
+                            for i, poll_res in completed
                         )
-                        return
-                    except Exception as e:
-                        logger.error(f"Audio download via proxy failed: {e}")
-                        raise RuntimeError(f"音频下载失败: {e}")
-
-                elif status == "failed":
-                    raise RuntimeError(f"任务执行失败: {poll_res.get('error_message', '未知错误')}")
-
-                # pending 继续循环
-
-            except Exception as e:
-                logger.error(f"Polling error: {e}")
-                # 轮询出错通常不应直接中断，除非严重错误
-                # 这里简单处理，继续
-                pass
+                    )
+                    for (i, _), audio_file in zip(completed, downloads):
+                        audio_files[i] = audio_file
+                    if stream:
+                        # 只推送从头起连续完成的部分；每部分末尾留待下一部分到达后交叉淡化
+                        while streamed < len(audio_files) and audio_files[streamed] is not None:
+                            samples = await asyncio.to_thread(crossfade.push, audio_files[streamed])
+                            segment += crossfade.pcm(samples)
+                            streamed += 1
+                    if None in audio_files:
+                        continue
+
+                    # 各部分的结果已在下载时写入缓存，多个部分时再缓存拼接后的整段音频
+                    audio_file = audio_files[0]
+                    if len(audio_files) > 1:
+                        content = await asyncio.to_thread(self.long_text.stitch, audio_files)
+                        audio_file = await asyncio.to_thread(
+                            self.output_store.save, content, ".wav", namespace
+                        )
+                        await self._cache_result(cache_key, audio_file)
+
+                    if stream:
+                        segment += crossfade.pcm(crossfade.finish())
+                    yield (
+                        gr.update(value="✅ 成功！"),
+                        gr.update(interactive=True),
+                        segment if stream else gr.update(value=audio_file),
+                    )
+                    return
+                except Exception as e:
+                    logger.error(f"Task {', '.join(filter(None, task_ids))} failed: {e}")
+                    yield (
+                        gr.update(value=f"❌ 错误：{e}"),
+                        gr.update(interactive=True),
+                        no_audio(),
+                    )
+                    return
 
-        yield (
-            gr.update(value="⏰ 错误：任务超时。", color="red"),
-            gr.update(interactive=True),
-            gr.update(value=None),
-        )
+            yield (
+                gr.update(value="⏰ 错误：任务超时。", color="red"),
+                gr.update(interactive=True),
+                no_audio(),
+            )
+        finally:
+            if self._runs.get((namespace, task_type)) is superseded:
+                del self._runs[(namespace, task_type)]
+            # 不再有请求等待的任务（例如客户端已断开）由任务管理器在后端取消
+            await asyncio.gather(
+                *(self.tasks.release(task_type, task_id) for task_id in filter(None, task_ids))
+            )
@@ -0,0 +1,391 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from poll_scheduler import PollFn, PollScheduler, get_poll_scheduler
+
+# Task states. A tracked task starts PENDING and ends in exactly one of the
+# final states; a final state never changes again.
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+CANCELLED = "cancelled"
+FINAL_STATES = frozenset((DONE, FAILED, TIMED_OUT, CANCELLED))
+_TRANSITIONS = {PENDING: FINAL_STATES}
+
+# Status words used by the different backends for a finished task.
+_DONE_STATUSES = frozenset(("done", "completed", "success"))
+_PENDING_STATUSES = frozenset(("pending", "queued", "running", "processing"))
+
+
+def task_state(status: Optional[str]) -> str:
+    """
+    Maps a backend or service status onto a task state: "done", "completed"
+    and "success" are DONE, None and "pending"-like words are PENDING,
+    "cancelled" is CANCELLED, and anything else (e.g. "failed", or an error
+    message) is FAILED.
+    """
+    if status is None or status in _PENDING_STATUSES:
+        return PENDING
+    if status in _DONE_STATUSES:
+        return DONE
+    if status == CANCELLED:
+        return CANCELLED
+    return FAILED
+
+
+def result_state(result: Any) -> str:
+    """State of a poll result: a `(status, ...)` tuple, a dict with "status", or None."""
+    if result is None:
+        return PENDING
+    if isinstance(result, dict):
+        return task_state(result.get("status"))
+    if isinstance(result, (tuple, list)) and result:
+        return task_state(result[0])
+    return DONE
+
+
+def submitted_task_id(response: dict) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Reads a WebGW submit response, however the project wraps its result: a
+    JSON string or an object under "resultMap" or "resultObj", holding either
+    {"success": "True", "data": {"task_id": ...}} or a bare {"task_id": ...}.
+    Returns (task_id, None), or (None, the backend's error message if it gave one).
+    """
+    if not response.get("success"):
+        return None, response.get("errorMessage")
+    result = (response.get("resultMap") or response.get("resultObj") or {}).get("result")
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except json.JSONDecodeError:
+            logger.warning(f"Submit response result is not JSON: {result[:200]}")
+            return None, None
+    if not isinstance(result, dict):
+        return None, None
+    if "data" in result or "success" in result:
+        if result.get("success") not in ("True", True):
+            return None, result.get("errMsg")
+        result = result.get("data") or {}
+    task_id = result.get("task_id")
+    return (task_id, None) if task_id else (None, result.get("error_message"))
+
+
+class TaskRecord:
+    """
+    One tracked task. Records only hold scalars and references, and use
+    `__slots__`, so tens of thousands of them stay cheap.
+    """
+
+    __slots__ = (
+        "kind",
+        "task_id",
+        "state",
+        "result",
+        "submitted_at",
+        "deadline",
+        "finished_at",
+        "poll",
+        "batch",
+        "on_finish",
+        "cancel",
+        "watchers",
+    )
+
+    def __init__(
+        self,
+        kind: str,
+        task_id: str,
+        poll: Optional[PollFn],
+        batch: Optional[Tuple[str, str]],
+        deadline: float,
+        on_finish: Optional[Callable[["TaskRecord"], Awaitable[None]]],
+        cancel: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        self.kind = kind
+        self.task_id = task_id
+        self.state = PENDING
+        self.result = None
+        self.submitted_at = time.monotonic()
+        self.deadline = deadline
+        self.finished_at = 0.0
+        self.poll = poll
+        self.batch = batch
+        self.on_finish = on_finish
+        self.cancel = cancel
+        self.watchers = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.task_id}"
+
+    @property
+    def final(self) -> bool:
+        return self.state in FINAL_STATES
+
+
+class TaskManager:
+    """
+    Owns the lifecycle of every backend task in the process: submission with
+    retries, state (see `task_state()`), deadlines, the final result and the
+    eviction of finished records.
+
+    When to poll is left to the `PollScheduler`; the manager registers each
+    task with it and turns the poll results, whatever their status words, into
+    state transitions. A task still pending at its deadline becomes TIMED_OUT.
+    Finished records are kept for `retention` seconds so late readers still get
+    the result, and at most `max_records` records are kept in total (the oldest
+    finished ones go first).
+
+    Callers waiting for a result `watch()` the task and `release()` it when
+    they stop waiting (the user left or submitted something else). A pending
+    task nobody watches any more is CANCELLED: polling stops and its cancel
+    function is called so the backend stops working on it too.
+    """
+
+    def __init__(
+        self,
+        scheduler: PollScheduler,
+        timeout: float = 600.0,
+        retention: float = 600.0,
+        max_records: int = 50000,
+        submit_retries: int = 2,
+        retry_delay: float = 1.0,
+        retry_on: Tuple[type, ...] = (httpx.ConnectError, httpx.ConnectTimeout),
+        sweep_interval: float = 10.0,
+    ):
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.retention = retention
+        self.max_records = max_records
+        self.submit_retries = submit_retries
+        self.retry_delay = retry_delay
+        # Only errors that mean the request never reached the backend are retried,
+        # so a retry cannot start the same task twice.
+        self.retry_on = retry_on
+        self.sweep_interval = sweep_interval
+        self._records: Dict[str, TaskRecord] = {}
+        # keys of finished records, oldest first
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._swept_at = time.monotonic()
+
+    async def submit(self, kind: str, submit_fn: Callable[[], Awaitable[str]]) -> str:
+        """
+        Runs `submit_fn` and returns the task id it returns, retrying up to
+        `submit_retries` times on connection errors.
+        """
+        for attempt in range(self.submit_retries + 1):
+            try:
+                return await submit_fn()
+            except self.retry_on as e:
+                if attempt == self.submit_retries:
+                    raise
+                logger.warning(f"[{kind}] Submission failed ({e}), retrying")
+                await asyncio.sleep(self.retry_delay * 2**attempt)
+
+    def track(
+        self,
+        kind: str,
+        task_id: str,
+        poll_fn: PollFn,
+        batch: Optional[Tuple[str, str]] = None,
+        timeout: Optional[float] = None,
+        on_finish: Optional[Callable[[TaskRecord], Awaitable[None]]] = None,
+        cancel_fn: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> TaskRecord:
+        """
+        Starts tracking a submitted task, or returns its record if it is
+        tracked already. `poll_fn` is called by the scheduler with the batch
+        response for the task (None when it has to poll by itself) and returns
+        None while the task is pending. `on_finish(record)` is awaited once the
+        task reaches a final state, and `cancel_fn()` when it is cancelled.
+        """
+        key = f"{kind}:{task_id}"
+        record = self._records.get(key)
+        if record is not None:
+            return record
+
+        async def poll(response=None):
+            result = await poll_fn(response)
+            state = result_state(result)
+            if state == PENDING:
+                return None
+            await self._finish(record, state, result)
+            return record
+
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        record = TaskRecord(kind, task_id, poll, batch, deadline, on_finish, cancel_fn)
+        self._records[key] = record
+        self._sweep()
+        self._register(record)
+        return record
+
+    def resolve(self, kind: str, task_id: str, result: Any) -> TaskRecord:
+        """Records a task that is already finished (e.g. served from a cache)."""
+        record = TaskRecord(kind, task_id, None, None, time.monotonic(), None)
+        record.state = result_state(result)
+        record.result = result
+        record.finished_at = record.submitted_at
+        self._records[record.key] = record
+        self._finished.pop(record.key, None)
+        self._finished[record.key] = None
+        self._sweep()
+        return record
+
+    def get(self, kind: str, task_id: str) -> Optional[TaskRecord]:
+        return self._records.get(f"{kind}:{task_id}")
+
+    def watch(self, kind: str, task_id: str) -> Optional[TaskRecord]:
+        """Registers one more caller waiting for the task's result."""
+        record = self.get(kind, task_id)
+        if record is not None:
+            record.watchers += 1
+        return record
+
+    async def release(self, kind: str, task_id: str):
+        """
+        Registers that a caller stopped waiting for the task; the task is
+        cancelled once nobody waits for it and it is still pending.
+        """
+        record = self.get(kind, task_id)
+        if record is None:
+            return
+        record.watchers = max(record.watchers - 1, 0)
+        if record.watchers == 0 and not record.final:
+            await self.cancel(kind, task_id)
+
+    async def cancel(self, kind: str, task_id: str) -> Optional[TaskRecord]:
+        """
+        Cancels a pending task: it stops being polled, becomes CANCELLED, and
+        its cancel function asks the backend to stop working on it.
+        """
+        record = self.get(kind, task_id)
+        if record is None or record.final:
+            return record
+        cancel_fn, record.cancel = record.cancel, None
+        self.scheduler.discard(record.key)
+        await self._finish(record, CANCELLED, None)
+        if cancel_fn is not None:
+            try:
+                await cancel_fn()
+            except Exception as e:
+                logger.warning(f"Cancelling task {record.key} on the backend failed: {e}")
+        return record
+
+    def _register(self, record: TaskRecord):
+        self.scheduler.check(record.key, record.poll, batch=record.batch, task_type=record.kind)
+
+    async def check(self, kind: str, task_id: str) -> Optional[TaskRecord]:
+        """
+        The record of a task, None if it is not tracked. A pending task stays
+        registered with the scheduler, and is timed out once past its deadline.
+        """
+        record = self.get(kind, task_id)
+        if record is None or record.final:
+            return record
+        if time.monotonic() > record.deadline:
+            await self._finish(record, TIMED_OUT, None)
+        else:
+            self._register(record)
+        return record
+
+    async def wait(
+        self, kind: str, task_id: str, timeout: Optional[float] = None
+    ) -> Optional[TaskRecord]:
+        """Like `check()`, but first waits (at most `timeout` seconds) for the next poll."""
+        record = await self.check(kind, task_id)
+        if record is None or record.final:
+            return record
+        await self.scheduler.next_result(
+            record.key,
+            record.poll,
+            batch=record.batch,
+            task_type=kind,
+            timeout=min(timeout, max(record.deadline - time.monotonic(), 0)) if timeout else None,
+        )
+        return await self.check(kind, task_id)
+
+    async def _finish(self, record: TaskRecord, state: str, result: Any):
+        if state not in _TRANSITIONS.get(record.state, ()):
+            logger.debug(f"Ignoring {record.state} -> {state} for task {record.key}")
+            return
+        record.state = state
+        record.result = result
+        record.finished_at = time.monotonic()
+        record.poll = None
+        record.cancel = None
+        if record.key in self._records:
+            self._finished[record.key] = None
+        if state == TIMED_OUT:
+            logger.warning(f"Task {record.key} timed out")
+        elif state == CANCELLED:
+            logger.info(f"Task {record.key} cancelled")
+        if record.on_finish is not None:
+            on_finish, record.on_finish = record.on_finish, None
+            try:
+                await on_finish(record)
+            except Exception as e:
+                logger.error(f"Finishing task {record.key} failed: {e}")
+
+    def _sweep(self):
+        """Drops finished records past `retention`, and the oldest ones past `max_records`."""
+        now = time.monotonic()
+        while self._finished and len(self._records) > self.max_records:
+            key, _ = self._finished.popitem(last=False)
+            self._records.pop(key, None)
+        if now - self._swept_at < self.sweep_interval:
+            return
+        self._swept_at = now
+        while self._finished:
+            key = next(iter(self._finished))
+            record = self._records.get(key)
+            if record is not None and now - record.finished_at <= self.retention:
+                break
+            del self._finished[key]
+            self._records.pop(key, None)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tracked records per state."""
+        counts: Dict[str, int] = {}
+        for record in self._records.values():
+            counts[record.state] = counts.get(record.state, 0) + 1
+        return counts
+
+
+_task_manager: Optional[TaskManager] = None
+_task_manager_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}, falling back to {default}")
+        return default
+
+
+def get_task_manager() -> TaskManager:
+    """
+    Returns the task manager shared by every tab in the process, configured from:
+      TASK_TIMEOUT      seconds after submission a pending task times out (default 600)
+      TASK_RETENTION    seconds a finished task's result is kept (default 600)
+      TASK_MAX_RECORDS  most task records kept in memory (default 50000)
+    """
+    global _task_manager
+    with _task_manager_lock:
+        if _task_manager is None:
+            _task_manager = TaskManager(
+                get_poll_scheduler(),
+                timeout=_env_float("TASK_TIMEOUT", 600.0),
+                retention=_env_float("TASK_RETENTION", 600.0),
+                max_records=int(_env_float("TASK_MAX_RECORDS", 50000)),
+            )
+        return _task_manager
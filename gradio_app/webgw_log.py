@@ -0,0 +1,157 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+from typing import Any
+
+from loguru import logger
+
+# Poll results arrive as a JSON string inside the response; its audio fields are
+# found with str.find rather than by parsing or scanning the whole string.
+_EMBEDDED_B64 = '_b64": "'
+
+
+def _elide_embedded(text: str, max_len: int) -> str:
+    pieces = []
+    position = 0
+    while True:
+        start = text.find(_EMBEDDED_B64, position)
+        if start < 0:
+            break
+        start += len(_EMBEDDED_B64)
+        end = text.find('"', start)
+        if end < 0:
+            break
+        pieces.append(text[position:start])
+        pieces.append(text[start:end] if end - start <= max_len else f"<{end - start} chars>")
+        position = end
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+def redact(value: Any, max_len: int = 256) -> Any:
+    """
+    Copy of `value` for logging: `*_b64` fields and other long strings are cut
+    down to their length without serializing them. Long strings
+    holding JSON keep their other fields.
+    """
+    if isinstance(value, dict):
+        return {
+            key: (
+                f"<{len(item)} chars>"
+                if str(key).endswith("_b64") and isinstance(item, str) and len(item) > max_len
+                else redact(item, max_len)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item, max_len) for item in value]
+    if isinstance(value, str) and len(value) > max_len:
+        if _EMBEDDED_B64 in value:
+            value = _elide_embedded(value, max_len)
+            if len(value) <= max_len * 16:
+                return value
+        return f"{value[:max_len]}... [{len(value)} chars]"
+    return value
+
+
+class LogQueue:
+    """
+    Formats and writes log records on a background thread so the event loop
+    only pays for an enqueue. The queue is bounded: when the writer falls
+    behind, new records are dropped and counted instead of piling up.
+    """
+
+    def __init__(self, max_size: int = 1000, max_chars: int = 4096):
+        self.max_chars = max_chars
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = threading.Thread(target=self._run, name="webgw-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, level: str, message: str, *objects: Any):
+        """
+        Logs `message.format(*objects)`. Dicts and lists among `objects` are
+        redacted and rendered as JSON on the writer thread, so they must not be
+        changed after being passed in.
+        """
+        try:
+            self._queue.put_nowait((level, message, objects))
+        except queue.Full:
+            self.dropped += 1
+
+    def _render(self, value: Any) -> str:
+        if isinstance(value, (dict, list, tuple)):
+            text = json.dumps(redact(value), indent=2, ensure_ascii=False)
+        else:
+            text = str(value)
+        if len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}... [truncated]"
+        return text
+
+    def _run(self):
+        reported = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            level, message, objects = item
+            try:
+                if self.dropped != reported:
+                    logger.warning(f"Log queue full, {self.dropped - reported} records dropped")
+                    reported = self.dropped
+                logger.log(level, message.format(*(self._render(o) for o in objects)))
+            except Exception as e:
+                logger.warning(f"Failed to write log record '{message}': {e}")
+
+    def close(self, timeout: float = 2.0):
+        """Writes what is still queued, waiting at most `timeout` seconds."""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class Sampler:
+    """
+    Decides per request whether DUMP_REQS dumps it: every request at rate 1,
+    none at rate 0, a random fraction in between.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = min(max(rate, 0.0), 1.0)
+
+    def __call__(self) -> bool:
+        return self.rate >= 1.0 or (self.rate > 0.0 and random.random() < self.rate)
+
+
+_log_queue = None
+_log_queue_lock = threading.Lock()
+
+
+def get_log_queue() -> LogQueue:
+    """Process-wide log queue; LOG_QUEUE_SIZE bounds the pending records (default 1000)."""
+    global _log_queue
+    with _log_queue_lock:
+        if _log_queue is None:
+            try:
+                max_size = int(os.environ.get("LOG_QUEUE_SIZE", 1000))
+            except ValueError:
+                logger.warning("Invalid value for LOG_QUEUE_SIZE, falling back to 1000")
+                max_size = 1000
+            _log_queue = LogQueue(max_size=max_size)
+    return _log_queue
+
+
+def get_dump_sampler() -> Sampler:
+    """Sampler for DUMP_REQS, from DUMP_REQS_SAMPLE_RATE (0-1, default 1: dump every request)."""
+    try:
+        rate = float(os.environ.get("DUMP_REQS_SAMPLE_RATE", 1.0))
+    except ValueError:
+        logger.warning("Invalid value for DUMP_REQS_SAMPLE_RATE, falling back to 1")
+        rate = 1.0
+    return Sampler(rate)
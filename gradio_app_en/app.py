@@ -1,24 +1,43 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import base64
-import io
 import json
 import os
 import random
-import time
 import uuid
+from contextlib import asynccontextmanager
 
 import gradio as gr
-import requests
+import httpx
 from dotenv import load_dotenv
 from loguru import logger
-from pydub import AudioSegment
 from scipy.io import wavfile
+from audio_preprocess import normalize_audio
+from audio_transport import get_transport_codec, tag_codec
+from long_text import get_long_text_chunker
+from output_store import get_output_store
+from poll_scheduler import get_poll_scheduler
+from queue_lanes import get_queue_lanes
+from result_cache import (
+    SingleFlight,
+    get_encoded_audio_cache,
+    get_result_cache,
+    get_transcript_cache,
+    make_cache_key,
+)
 from tab_uniaudio_demo import MingOmniTTSDemoTab
+from task_journal import get_task_journal
+from task_manager import CANCELLED, DONE, TIMED_OUT, get_task_manager, submitted_task_id
+from webgw_client import AsyncWebGWClient
+from webgw_log import get_dump_sampler, get_log_queue
 
 # 加载 .secret 文件中的环境变量
 load_dotenv(dotenv_path=".secret")
 
-blank_rate, blank_audio_data = wavfile.read("./audio/blank.wav")
+BLANK_AUDIO_PATH = "./audio/blank.wav"
+blank_rate, blank_audio_data = wavfile.read(BLANK_AUDIO_PATH)
+# owner recorded in the task journal for SpeechService tasks
+TASK_JOURNAL_OWNER = "speech_service"
 
 
 # 模型服务类 ===========================================================
@@ -31,17 +50,40 @@ class SpeechService:
         self.WEB_GW_API_URL = os.environ.get("WEB_GW_API_URL")
         self.WEB_GW_API_KEY = os.environ.get("WEB_GW_API_KEY")
         self.WEB_GW_APP_ID = os.environ.get("WEB_GW_APP_ID")
+        self.webgw_client = AsyncWebGWClient(
+            self.WEB_GW_API_URL, self.WEB_GW_API_KEY, self.WEB_GW_APP_ID
+        )
+        self.poll_scheduler = get_poll_scheduler()
+        self.tasks = get_task_manager()
+        self.result_cache = get_result_cache()
+        self.transcript_cache = get_transcript_cache()
+        self.audio_b64_cache = get_encoded_audio_cache()
+        self.audio_codec = get_transport_codec()
+        self.output_store = get_output_store()
+        self.long_text = get_long_text_chunker()
+        self.journal = get_task_journal()
+        # task_id -> result cache key, for tasks whose result should be cached once done
+        self._result_cache_keys = {}
+        self.inflight = SingleFlight()
+        # long-text task ID -> task_ids of its chunks
+        self._chunked_tasks = {}
 
         # Other configs
         self.dump_reqs = os.environ.get("DUMP_REQS", "false").lower() == "true"
+        self.dump_sampler = get_dump_sampler()
+        self.log_queue = get_log_queue()
+        self.batch_poll = os.environ.get("WEBGW_BATCH_POLL", "false").lower() == "true"
         self.sample_rate = 16000  # Gradio expects a sample rate for audio output
 
+        if self.batch_poll:
+            self._register_batch_polls()
+
         logger.info(f"SpeechService initialized. Using Intranet API: {self.use_intranet_api}")
         if not self.use_intranet_api:
             logger.info(f"WebGW API URL: {self.WEB_GW_API_URL}")
             logger.info(f"WebGW APP ID: {self.WEB_GW_APP_ID}")
 
-    def _call_webgw_api(
+    async def _call_webgw_api(
         self, call_name: str, call_args: dict, api_project: str = "251220-ming-uniaudio"
     ) -> dict:
         """
@@ -53,50 +95,36 @@ class SpeechService:
             return {"success": False, "errorMessage": error_msg}
 
         api_url = self.WEB_GW_API_URL
-        request_body = {
-            "api_key": self.WEB_GW_API_KEY,
-            "api_project": api_project,
-            "call_name": call_name,
-            "call_token": "token",  # Placeholder
-            "call_args": call_args,
-        }
-        headers = {
-            "Content-Type": "application/json",
-            "x-webgw-appid": self.WEB_GW_APP_ID,
-            "x-webgw-version": "2.0",
-        }
+        request_body = self.webgw_client.build_request_body(
+            api_project, call_name, call_args, call_token="token"  # Placeholder
+        )
+        headers = self.webgw_client.headers
 
         try:
-            if self.dump_reqs:
-                try:
-                    payload_str = json.dumps(request_body, indent=2, ensure_ascii=False)
-                    log_message = (
-                        f"---- DUMP_REQS (WebGW): Start Request ----\n"
-                        f"URL         : {api_url}\n"
-                        f"Headers     : {json.dumps(headers, indent=2)}\n"
-                        # payload_str may be large, consider truncating if necessary (4KB)
-                        f"Payload     : {payload_str[:4096]}{'... [truncated]' if len(payload_str) > 4096 else ''}\n"
-                        f"---- DUMP_REQS (WebGW): End Request ----"
-                    )
-                    logger.info(log_message)
-                except Exception as e:
-                    logger.warning(
-                        f"DUMP_REQS: Failed to serialize WebGW request data for logging: {e}"
-                    )
+            if self.dump_reqs and self.dump_sampler():
+                # Rendered on the log thread, with base64 audio cut down to its length.
+                self.log_queue.log(
+                    "INFO",
+                    "---- DUMP_REQS (WebGW): Start Request ----\n"
+                    "URL         : {}\n"
+                    "Headers     : {}\n"
+                    "Payload     : {}\n"
+                    "---- DUMP_REQS (WebGW): End Request ----",
+                    api_url,
+                    headers,
+                    request_body,
+                )
 
-            response = requests.post(api_url, headers=headers, json=request_body, timeout=20)
+            response = await self.webgw_client.post(request_body, timeout=20)
             response.raise_for_status()
 
             response_data = response.json()
 
-            # response_data may be large, consider truncating if necessary (4KB)
-            logger.info(
-                f"WebGW API response data: {json.dumps(response_data, indent=2)[:4096]}{'... [truncated]' if len(json.dumps(response_data)) > 4096 else ''}"
-            )
+            # Poll responses carry the output audio; it is elided on the log thread (4KB max)
+            self.log_queue.log("INFO", "WebGW API response data: {}", response_data)
 
             # response headers
-            resp_headers = response.headers
-            logger.info(f"WebGW API response headers: {resp_headers}")
+            self.log_queue.log("INFO", "WebGW API response headers: {}", response.headers)
 
             # Transform the WebGW response to mimic the intranet response structure.
             if response_data.get("success"):
@@ -116,7 +144,7 @@ class SpeechService:
                 logger.error(f"WebGW API call failed: {error_msg}")
                 return {"success": False, "errorMessage": error_msg}
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"WebGW API request failed: {e}")
             return {"success": False, "errorMessage": f"API request failed: {e}"}
         except json.JSONDecodeError as e:
@@ -127,107 +155,369 @@ class SpeechService:
 
     def _preprocess_audio(self, audio_path: str) -> str:
         """
-        Conditionally converts an audio file to a 16kHz, single-channel WAV file using pydub.
-        Only processes files identified as microphone recordings (e.g., 'audio.wav').
+        Converts an audio file to a 16kHz, single-channel 16-bit WAV file before upload.
+        Files whose RIFF header already says so are sent as they are; WAV/PCM is resampled
+        in-process and other formats go through ffmpeg (see audio_preprocess).
         Returns the path to the converted file, or original path if not processed, or None on failure.
         """
         if not audio_path or not os.path.exists(audio_path):
             logger.error(f"Audio file not found or path is empty: {audio_path}")
             return None
 
-        # Heuristic: Only process if it's a generic recording filename.
-        # Assuming 'audio.wav' is the default name for microphone recordings from Gradio.
-        if os.path.basename(audio_path) == "audio.wav":
-            try:
-                logger.info(
-                    f"Detected microphone recording: {audio_path}. Starting preprocessing..."
-                )
-                audio = AudioSegment.from_file(audio_path)
+        try:
+            output_path = normalize_audio(audio_path, self.output_store)
+        except Exception as e:
+            # The backend accepted unconverted uploads before, so send the original as a fallback.
+            logger.warning(f"Failed to preprocess '{audio_path}', uploading it unchanged: {e}")
+            return audio_path
 
-                audio = audio.set_frame_rate(16000).set_channels(1)
+        if output_path == audio_path:
+            logger.info(f"{audio_path} is already 16kHz mono PCM. Skipping preprocessing.")
+        else:
+            logger.info(f"Preprocessed {audio_path} to: {output_path}")
+        return output_path
 
-                # Export to a new file in the same directory (or a temp one if preferred)
-                # Using a distinct name to avoid overwriting original if it's not a temp file
-                output_path = f"{os.path.splitext(audio_path)[0]}_16k_mono.wav"
-                audio.export(output_path, format="wav")
+    def _register_batch_polls(self):
+        """Register batch poll functions: one WebGW request per task kind per scheduler tick"""
+        self.poll_scheduler.register_batch(
+            "non-edit", lambda task_ids: self._poll_batch("call-non-edit-model", task_ids)
+        )
+        self.poll_scheduler.register_batch(
+            "edit", lambda task_ids: self._poll_batch("call-edit-model", task_ids)
+        )
+        self.poll_scheduler.register_batch(
+            "instruct",
+            lambda task_ids: self._poll_batch(
+                "poll_task", task_ids, api_project="260113-ming-uniaudio-instruct"
+            ),
+        )
 
-                logger.info(f"Successfully preprocessed microphone recording to: {output_path}")
-                return output_path
-            except Exception as e:
-                logger.error(f"Failed to preprocess microphone recording '{audio_path}': {e}")
-                return None
-        else:
-            logger.info(
-                f"Detected uploaded file: {audio_path}. Skipping preprocessing as per user instruction."
+    async def _poll_batch(
+        self, call_name: str, task_ids: list, api_project: str = "251220-ming-uniaudio"
+    ) -> dict:
+        """
+        Polls several tasks in one WebGW call (call_args={"task_ids": [...]}).
+        Returns {task_id: poll_response}, each shaped like the response of a single poll.
+        """
+        response = await self._call_webgw_api(
+            call_name=call_name, call_args={"task_ids": task_ids}, api_project=api_project
+        )
+        if not response.get("success"):
+            raise RuntimeError(response.get("errorMessage", "Batch poll failed"))
+
+        result_content = response.get("resultMap", {}).get("result")
+        if isinstance(result_content, str):
+            result_content = json.loads(result_content)
+        result_content = result_content or {}
+
+        # The 251220 project wraps results as {"success": "True", "data": {...}},
+        # the instruct project returns them bare; each task result is wrapped the same way.
+        wrapped = "data" in result_content
+        if wrapped and result_content.get("success") != "True":
+            raise RuntimeError(result_content.get("errMsg", "Batch poll failed"))
+        tasks = (result_content["data"] if wrapped else result_content).get("tasks") or {}
+
+        return {
+            task_id: {
+                "success": True,
+                "resultMap": {"result": {"success": "True", "data": task} if wrapped else task},
+            }
+            for task_id, task in tasks.items()
+        }
+
+    async def _cached_task(self, task_type: str, cache_key: str):
+        """
+        Looks up the result cache. On a hit, returns a pseudo task_id whose result is
+        registered with the poll scheduler right away, so the backend is never called.
+        """
+        result = await asyncio.to_thread(self.result_cache.get, cache_key)
+        if result is None:
+            return None
+        if any(
+            self.output_store.owns(value) and not self.output_store.touch(value) for value in result
+        ):
+            return None  # its audio file has since been cleaned out of the output store
+        return self._resolved_task(task_type, cache_key, result)
+
+    def _resolved_task(self, task_type: str, cache_key: str, result: tuple) -> str:
+        task_id = f"cached-{cache_key[:32]}"
+        self.tasks.resolve(task_type, task_id, result)
+        logger.info(f"{task_type} result served from cache: {cache_key}")
+        return task_id
+
+    async def _coalesced(self, cache_key: str, submit) -> str:
+        """
+        Identical requests (same cache_key) share one backend task while it is in flight:
+        concurrent or repeated submissions get the running task's task_id and its poll
+        results. Released when the task finishes (or the submission fails).
+        """
+        return await self.inflight.run(
+            cache_key, submit, keep=lambda task_id: not task_id.startswith("Error:")
+        )
+
+    async def _track_task(self, kind: str, task_id: str, cache_key: str):
+        """
+        Registers a task just submitted: its result is cached once done, and it
+        is journaled so polling can resume after a restart.
+        """
+        self._result_cache_keys[task_id] = cache_key
+        await asyncio.to_thread(self.journal.record, TASK_JOURNAL_OWNER, kind, task_id, cache_key)
+
+    def watch_task(self, kind: str, task_id: str):
+        """Registers one more session waiting for a task (a long-text task waits for its chunks)"""
+        if task_id not in self._chunked_tasks:
+            self.tasks.watch(kind, task_id)
+
+    async def release_task(self, kind: str, task_id: str):
+        """
+        A session stopped waiting for a task (it closed the page or submitted a
+        new one). A task no session waits for is cancelled: polling stops and
+        the backend is asked to stop working on it.
+        """
+        chunk_ids = self._chunked_tasks.pop(task_id, None)
+        if chunk_ids is None:
+            await self.tasks.release(kind, task_id)
+            return
+        await self.tasks.cancel(f"{kind}-long", task_id)
+        await self._release_chunks(kind, chunk_ids)
+
+    async def _release_chunks(self, kind: str, chunk_ids: list):
+        """The long-text task stops waiting for its chunks; unwatched ones are cancelled"""
+        await asyncio.gather(*(self.tasks.release(kind, chunk_id) for chunk_id in chunk_ids))
+
+    async def _cancel_task(self, task_id: str, api_project: str = "251220-ming-uniaudio"):
+        """Asks the backend to cancel a task (called by the task manager on cancellation)"""
+        response = await self._call_webgw_api(
+            call_name="cancel_task", call_args={"task_id": task_id}, api_project=api_project
+        )
+        if not response.get("success"):
+            raise ConnectionError(response.get("errorMessage", "Cancel request failed"))
+        logger.info(f"Backend task {task_id} cancelled")
+
+    async def resume_tasks(self, timeout: float = 600):
+        """
+        Resumes polling the tasks the journal lists as unfinished after a
+        restart; their results are cached as usual, and identical requests
+        join them instead of submitting again.
+        """
+        entries = await asyncio.to_thread(self.journal.pending, TASK_JOURNAL_OWNER)
+        if not entries:
+            return
+        logger.info(f"Resuming {len(entries)} unfinished SpeechService tasks")
+        checks = {
+            "tts": self.tts_check_task,
+            "asr": self.asr_check_task,
+            "edit": self.edit_check_task,
+            "instruct": self.poll_instruct_task,
+        }
+
+        async def resume(entry):
+            self._result_cache_keys[entry.task_id] = entry.cache_key
+            if entry.cache_key:
+                self.inflight.adopt(entry.cache_key, entry.task_id)
+            deadline = asyncio.get_running_loop().time() + timeout
+            while asyncio.get_running_loop().time() < deadline:
+                result = await checks[entry.kind](entry.task_id)
+                if result[0] != "pending":
+                    return
+                await asyncio.sleep(self.poll_scheduler.interval)
+            logger.warning(f"Resumed {entry.kind} task {entry.task_id} timed out")
+            self.inflight.release(self._result_cache_keys.pop(entry.task_id, None))
+
+        await asyncio.gather(*(resume(entry) for entry in entries if entry.kind in checks))
+
+    async def _scheduled_check(
+        self,
+        task_type: str,
+        task_id: str,
+        check_once,
+        pending: tuple,
+        error: tuple = ("Error: {}", None),
+        batch_group: str = None,
+        cancel_fn=None,
+    ) -> tuple:
+        """
+        Checks a task through the task manager: its result once finished, an
+        error once timed out or cancelled (built from the `error` template, with
+        "{}" replaced by the message), else `pending`. `cancel_fn` asks the
+        backend to stop the task when it is cancelled.
+        """
+        self.tasks.track(
+            task_type,
+            task_id,
+            check_once,
+            batch=(batch_group, task_id) if batch_group else None,
+            on_finish=self._task_finished,
+            cancel_fn=cancel_fn,
+        )
+        record = await self.tasks.check(task_type, task_id)
+        if record.state in (TIMED_OUT, CANCELLED):
+            message = "Task timed out" if record.state == TIMED_OUT else "Task cancelled"
+            return tuple(slot.format(message) if isinstance(slot, str) else slot for slot in error)
+        return record.result if record.final else pending
+
+    async def _task_finished(self, record):
+        """
+        Once a task finishes, fails or times out: caches its result, journals it
+        and ends the coalescing of identical requests.
+        """
+        result = record.result
+        if record.task_id in self._result_cache_keys:
+            await asyncio.to_thread(
+                self.journal.finish,
+                TASK_JOURNAL_OWNER,
+                record.task_id,
+                record.state,
+                result[1:] if record.state == DONE else result and result[0],
             )
-            return audio_path
+        cache_key = self._result_cache_keys.pop(record.task_id, None)
+        if cache_key and record.state == DONE:
+            await asyncio.to_thread(self.result_cache.put, cache_key, result)
+            if record.kind == "asr":
+                await asyncio.to_thread(self.transcript_cache.put, cache_key, result[1])
+        self.inflight.release(cache_key)
+
+    async def _start_chunked_task(self, task_type: str, starts: list) -> str:
+        """
+        Long-text mode: submits every chunk as a task of its own, concurrently (each
+        still goes through the result cache and request coalescing), and returns a
+        task_id standing for the whole text. If a chunk fails to submit, returns its error.
+        """
+        chunk_ids = await asyncio.gather(*starts)
+        errors = [chunk_id for chunk_id in chunk_ids if chunk_id.startswith("Error:")]
+        submitted = [chunk_id for chunk_id in chunk_ids if not chunk_id.startswith("Error:")]
+        # The long-text task waits for its chunks: once it fails or is released, chunks nobody
+        # else waits for are cancelled
+        for chunk_id in submitted:
+            self.tasks.watch(task_type, chunk_id)
+        if errors:
+            await self._release_chunks(task_type, submitted)
+            return errors[0]
+        task_id = f"long-{uuid.uuid4().hex}"
+        self._chunked_tasks[task_id] = list(chunk_ids)
+        logger.info(f"{task_type} text split into {len(chunk_ids)} tasks: {task_id}")
+        return task_id
+
+    async def _chunked_check(self, task_type: str, task_id: str, check_chunk) -> tuple:
+        """Check a long-text task: once every chunk is done, crossfade them into one audio"""
+
+        async def check_once(_=None):
+            chunk_ids = self._chunked_tasks.get(task_id)
+            if chunk_ids is None:
+                return "Error: Task not found or expired", None
+            results = await asyncio.gather(*(check_chunk(chunk_id) for chunk_id in chunk_ids))
+            for status, _ in results:
+                if status not in ("done", "pending"):
+                    await self._release_chunks(task_type, self._chunked_tasks.pop(task_id, []))
+                    return status, None
+            if any(status == "pending" for status, _ in results):
+                return "pending", None
+
+            self._chunked_tasks.pop(task_id, None)
+            try:
+                content = await asyncio.to_thread(self.long_text.stitch, [p for _, p in results])
+                return "done", await asyncio.to_thread(self.output_store.save, content)
+            except Exception as e:
+                logger.error(f"Failed to join audio of {task_type} task {task_id}: {e}")
+                return f"Error: Failed to join audio - {e}", None
+
+        return await self._scheduled_check(
+            f"{task_type}-long", task_id, check_once, pending=("pending", None)
+        )
 
-    def _submit_tts_task(self, payload: dict) -> dict:
+    async def _submit_tts_task(self, payload: dict) -> dict:
         """
         Submits the TTS task to the async endpoint.
         Returns the initial response which should contain the task_id.
         """
-        return self._call_webgw_api(call_name="call-non-edit-model", call_args=payload)
+        return await self._call_webgw_api(call_name="call-non-edit-model", call_args=payload)
 
-    def _poll_tts_result(self, task_id: str) -> dict:
+    async def _poll_tts_result(self, task_id: str) -> dict:
         """Polls the TTS task result."""
         payload = {"task_id": task_id}
-        return self._call_webgw_api(call_name="call-non-edit-model", call_args=payload)
+        return await self._call_webgw_api(call_name="call-non-edit-model", call_args=payload)
 
-    def _submit_edit_task(self, payload: dict) -> dict:
+    async def _submit_edit_task(self, payload: dict) -> dict:
         """
         Submits the Edit task to the async endpoint.
         Returns the initial response which should contain the task_id.
         """
-        return self._call_webgw_api(call_name="call-edit-model", call_args=payload)
+        return await self._call_webgw_api(call_name="call-edit-model", call_args=payload)
 
-    def _poll_edit_result(self, task_id: str) -> dict:
+    async def _poll_edit_result(self, task_id: str) -> dict:
         """Polls the Edit task result."""
         payload = {"task_id": task_id}
-        return self._call_webgw_api(call_name="call-edit-model", call_args=payload)
+        return await self._call_webgw_api(call_name="call-edit-model", call_args=payload)
+
+    async def tts_start_task(self, text: str, prompt_wav_path: str, prompt_text: str) -> str:
+        """Submit TTS task and return task_id; long texts are split and submitted concurrently"""
+        chunks = self.long_text.split(text)
+        if len(chunks) > 1:
+            return await self._start_chunked_task(
+                "tts",
+                [self.tts_start_task(chunk, prompt_wav_path, prompt_text) for chunk in chunks],
+            )
 
-    def tts_start_task(self, text: str, prompt_wav_path: str, prompt_text: str) -> str:
-        """Submit TTS task and return task_id"""
-        with open(prompt_wav_path, "rb") as f:
-            prompt_audio_bytes = f.read()
-        prompt_audio_b64 = base64.b64encode(prompt_audio_bytes).decode("utf-8")
+        # The prompt audio enters the key as a content hash; cache hits skip encoding it
+        cache_key = await asyncio.to_thread(
+            make_cache_key,
+            "tts",
+            {"task_name": "tts", "text": text, "prompt_text": prompt_text},
+            [prompt_wav_path],
+        )
+        cached_task_id = await self._cached_task("tts", cache_key)
+        if cached_task_id:
+            return cached_task_id
 
+        prompt_audio_b64, codec = await asyncio.to_thread(
+            self.audio_b64_cache.encode, prompt_wav_path, self.audio_codec
+        )
         submit_payload = {
             "task_name": "tts",
             "prompt_audio_b64": prompt_audio_b64,
             "text": text,
             "prompt_text": prompt_text,
         }
+        tag_codec(submit_payload, "prompt_audio_b64", codec)
+        return await self._coalesced(
+            cache_key, lambda: self._start_tts_task(submit_payload, cache_key)
+        )
 
+    async def _start_tts_task(self, submit_payload: dict, cache_key: str) -> str:
+        """Submits the TTS task (identical in-flight requests are merged by _coalesced)"""
         # The response from the submission API is the *outer* MPS response
-        initial_response = self._submit_tts_task(submit_payload)
+        initial_response = await self._submit_tts_task(submit_payload)
         logger.info(f"TTS task submission response: {initial_response}")
 
-        if not initial_response.get("success"):
-            return f"Error: {initial_response.get('errorMessage', 'Task submission failed')}"
-
-        result_content_str = initial_response.get("resultMap", {}).get("result")
-        if not result_content_str:
-            return "Error: Missing 'result' field in submission response"
-
-        if isinstance(result_content_str, str):
-            inner_response = json.loads(result_content_str)
-        else:
-            inner_response = result_content_str
-
-        if inner_response.get("success") != "True":
-            return f"Error: {inner_response.get('errMsg', 'Internal API call failed')}"
-
-        task_id = inner_response.get("data", {}).get("task_id")
+        task_id, error = submitted_task_id(initial_response)
         if not task_id:
-            return "Error: Failed to get task_id from response"
+            return f"Error: {error or 'Failed to get task_id from response'}"
 
         logger.info(f"TTS task started with ID: {task_id}")
+        await self._track_task("tts", task_id, cache_key)
+        # Register with the poll scheduler right away so task timing starts at submission
+        await self.tts_check_task(task_id)
         return task_id
 
-    def tts_check_task(self, task_id: str) -> (str, tuple or None):
+    async def tts_check_task(self, task_id: str) -> (str, str or None):
         """Check TTS task status and return result"""
-        poll_response = self._poll_tts_result(task_id)
+        if task_id.startswith("long-"):
+            return await self._chunked_check("tts", task_id, self.tts_check_task)
+        return await self._scheduled_check(
+            "tts",
+            task_id,
+            lambda poll_response: self._tts_check_task_once(task_id, poll_response),
+            pending=("pending", None),
+            batch_group="non-edit",
+            cancel_fn=lambda: self._cancel_task(task_id),
+        )
+
+    async def _tts_check_task_once(
+        self, task_id: str, poll_response: dict = None
+    ) -> (str, str or None):
+        """Query TTS task status once (called by the poll scheduler)"""
+        if poll_response is None:
+            poll_response = await self._poll_tts_result(task_id)
 
         if not poll_response.get("success"):
             return f"Error: {poll_response.get('errorMessage', 'Polling failed')}", None
@@ -247,6 +537,8 @@ class SpeechService:
         task_status = inner_response.get("data", {}).get("status")
         if task_status == "pending":
             return "pending", None
+        if task_status == "cancelled":
+            return "Error: Task cancelled", None
 
         # Task finished, process final audio
         output_audio_b64 = inner_response.get("data", {}).get("output_audio_b64")
@@ -254,22 +546,35 @@ class SpeechService:
             return "Error: Task succeeded but no audio data returned.", None
 
         try:
-            decoded_audio_bytes = base64.b64decode(output_audio_b64)
-            rate, audio_data = wavfile.read(io.BytesIO(decoded_audio_bytes))
-            return "done", (rate, audio_data)
+            audio_path = await asyncio.to_thread(self.output_store.save_audio, output_audio_b64)
+            return "done", audio_path
         except Exception as e:
             logger.error(f"Error decoding final audio for task {task_id}: {e}")
             return f"Error: Failed to decode audio - {e}", None
 
-    def asr_start_task(self, audio_path: str) -> str:
+    async def asr_start_task(self, audio_path: str) -> str:
         """Submit ASR task and return task_id"""
-        processed_path = self._preprocess_audio(audio_path)
+        cache_key = await asyncio.to_thread(
+            make_cache_key, "asr", {"task_name": "asr"}, [audio_path]
+        )
+        # Transcripts are keyed by audio content hash and outlive result cache eviction
+        transcript = self.transcript_cache.get(cache_key)
+        if transcript is not None:
+            return self._resolved_task("asr", cache_key, ("done", transcript))
+        cached_task_id = await self._cached_task("asr", cache_key)
+        if cached_task_id:
+            return cached_task_id
+        return await self._coalesced(cache_key, lambda: self._start_asr_task(audio_path, cache_key))
+
+    async def _start_asr_task(self, audio_path: str, cache_key: str) -> str:
+        """Submits the ASR task (identical in-flight requests are merged by _coalesced)"""
+        processed_path = await asyncio.to_thread(self._preprocess_audio, audio_path)
         if not processed_path:
             return "Error: Audio preprocessing failed"
 
-        with open(processed_path, "rb") as f:
-            audio_bytes = f.read()
-        audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
+        audio_b64, codec = await asyncio.to_thread(
+            self.audio_b64_cache.encode, processed_path, self.audio_codec
+        )
 
         submit_payload = {
             "task_name": "asr",
@@ -287,37 +592,73 @@ class SpeechService:
                 }
             ],
         }
+        tag_codec(submit_payload, "audio_b64", codec)
 
         # Reuse common async submission logic
-        initial_response = self._submit_tts_task(submit_payload)
+        initial_response = await self._submit_tts_task(submit_payload)
         logger.info(f"ASR task submission response: {initial_response}")
 
-        if not initial_response.get("success"):
-            return f"Error: {initial_response.get('errorMessage', 'ASR task submission failed')}"
-
-        result_content_str = initial_response.get("resultMap", {}).get("result")
-        if not result_content_str:
-            return "Error: Missing 'result' field in submission response"
-
-        if isinstance(result_content_str, str):
-            inner_response = json.loads(result_content_str)
-        else:
-            inner_response = result_content_str
-
-        if inner_response.get("success") != "True":
-            return f"Error: {inner_response.get('errMsg', 'Internal API call failed')}"
-
-        task_id = inner_response.get("data", {}).get("task_id")
+        task_id, error = submitted_task_id(initial_response)
         if not task_id:
-            return "Error: Failed to get task_id from response"
+            return f"Error: {error or 'Failed to get task_id from response'}"
 
         logger.info(f"ASR task started with ID: {task_id}")
+        await self._track_task("asr", task_id, cache_key)
+        # Register with the poll scheduler right away so task timing starts at submission
+        await self.asr_check_task(task_id)
         return task_id
 
-    def asr_check_task(self, task_id: str) -> (str, str or None):
+    async def seed_transcripts(self, audio_paths: list, timeout: float = 120):
+        """
+        Transcribes a batch of reference clips into the transcript cache; clips
+        that are already cached are skipped.
+        """
+
+        async def transcribe(audio_path) -> bool:
+            task_id = await self.asr_start_task(audio_path)
+            if task_id.startswith("Error:"):
+                logger.warning(f"Transcript seeding failed for {audio_path}: {task_id}")
+                return False
+            # Watch it like a session does: a session joining it and leaving must not cancel it
+            self.watch_task("asr", task_id)
+            try:
+                deadline = asyncio.get_running_loop().time() + timeout
+                while asyncio.get_running_loop().time() < deadline:
+                    status, _ = await self.asr_check_task(task_id)
+                    if status == "done":
+                        return True
+                    if status != "pending":
+                        logger.warning(f"Transcript seeding failed for {audio_path}: {status}")
+                        return False
+                    await asyncio.sleep(self.poll_scheduler.interval)
+                logger.warning(f"Transcript seeding timed out for {audio_path}")
+                return False
+            finally:
+                await self.release_task("asr", task_id)
+
+        seeded = await asyncio.gather(*(transcribe(audio_path) for audio_path in audio_paths))
+        logger.info(
+            f"Transcript cache seeded for {sum(seeded)} of {len(audio_paths)} reference clips"
+        )
+
+    async def asr_check_task(self, task_id: str) -> (str, str or None):
         """Check ASR task status and return result"""
+        return await self._scheduled_check(
+            "asr",
+            task_id,
+            lambda poll_response: self._asr_check_task_once(task_id, poll_response),
+            pending=("pending", None),
+            batch_group="non-edit",
+            cancel_fn=lambda: self._cancel_task(task_id),
+        )
+
+    async def _asr_check_task_once(
+        self, task_id: str, poll_response: dict = None
+    ) -> (str, str or None):
+        """Query ASR task status once (called by the poll scheduler)"""
         # Reuse common async polling logic
-        poll_response = self._poll_tts_result(task_id)
+        if poll_response is None:
+            poll_response = await self._poll_tts_result(task_id)
 
         if not poll_response.get("success"):
             return f"Error: {poll_response.get('errorMessage', 'Polling failed')}", None
@@ -337,6 +678,8 @@ class SpeechService:
         task_status = inner_response.get("data", {}).get("status")
         if task_status == "pending":
             return "pending", None
+        if task_status == "cancelled":
+            return "Error: Task cancelled", None
 
         # Task finished, process final text result
         transcribed_text = inner_response.get("data", {}).get("transcribed_text")
@@ -347,15 +690,30 @@ class SpeechService:
         final_text = transcribed_text.split("\t", 1)[-1]
         return "done", final_text
 
-    def edit_start_task(self, audio_path: str, instruction_text: str) -> str:
+    async def edit_start_task(self, audio_path: str, instruction_text: str) -> str:
         """Submit Edit task and return task_id"""
-        processed_path = self._preprocess_audio(audio_path)
+        cache_key = await asyncio.to_thread(
+            make_cache_key,
+            "edit",
+            {"task_name": "edit", "instruction": instruction_text},
+            [audio_path],
+        )
+        cached_task_id = await self._cached_task("edit", cache_key)
+        if cached_task_id:
+            return cached_task_id
+        return await self._coalesced(
+            cache_key, lambda: self._start_edit_task(audio_path, instruction_text, cache_key)
+        )
+
+    async def _start_edit_task(self, audio_path: str, instruction_text: str, cache_key: str) -> str:
+        """Submits the Edit task (identical in-flight requests are merged by _coalesced)"""
+        processed_path = await asyncio.to_thread(self._preprocess_audio, audio_path)
         if not processed_path:
             return "Error: Audio preprocessing failed"
 
-        with open(processed_path, "rb") as f:
-            audio_bytes = f.read()
-        audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
+        audio_b64, codec = await asyncio.to_thread(
+            self.audio_b64_cache.encode, processed_path, self.audio_codec
+        )
 
         messages = [
             {
@@ -371,37 +729,41 @@ class SpeechService:
         ]
 
         submit_payload = {"task_name": "edit", "audio_b64": audio_b64, "messages": messages}
+        tag_codec(submit_payload, "audio_b64", codec)
 
         # Call dedicated Edit task submission logic
-        initial_response = self._submit_edit_task(submit_payload)
+        initial_response = await self._submit_edit_task(submit_payload)
         logger.info(f"Edit task submission response: {initial_response}")
 
-        if not initial_response.get("success"):
-            return f"Error: {initial_response.get('errorMessage', 'Edit task submission failed')}"
-
-        result_content_str = initial_response.get("resultMap", {}).get("result")
-        if not result_content_str:
-            return "Error: Missing 'result' field in submission response"
-
-        if isinstance(result_content_str, str):
-            inner_response = json.loads(result_content_str)
-        else:
-            inner_response = result_content_str
-
-        if inner_response.get("success") != "True":
-            return f"Error: {inner_response.get('errMsg', 'Internal API call failed')}"
-
-        task_id = inner_response.get("data", {}).get("task_id")
+        task_id, error = submitted_task_id(initial_response)
         if not task_id:
-            return "Error: Failed to get task_id from response"
+            return f"Error: {error or 'Failed to get task_id from response'}"
 
         logger.info(f"Edit task started with ID: {task_id}")
+        await self._track_task("edit", task_id, cache_key)
+        # Register with the poll scheduler right away so task timing starts at submission
+        await self.edit_check_task(task_id)
         return task_id
 
-    def edit_check_task(self, task_id: str) -> (str, str or None, tuple or None):
+    async def edit_check_task(self, task_id: str) -> (str, str or None, str or None):
         """Check Edit task status and return result (status, text_result, audio_result)"""
+        return await self._scheduled_check(
+            "edit",
+            task_id,
+            lambda poll_response: self._edit_check_task_once(task_id, poll_response),
+            pending=("pending", "Processing...", None),
+            error=("Error", "{}", None),
+            batch_group="edit",
+            cancel_fn=lambda: self._cancel_task(task_id),
+        )
+
+    async def _edit_check_task_once(
+        self, task_id: str, poll_response: dict = None
+    ) -> (str, str or None, str or None):
+        """Query Edit task status once (called by the poll scheduler)"""
         # Call dedicated Edit task polling logic
-        poll_response = self._poll_edit_result(task_id)
+        if poll_response is None:
+            poll_response = await self._poll_edit_result(task_id)
 
         if not poll_response.get("success"):
             return "Error", f"Polling failed: {poll_response.get('errorMessage', 'Unknown error')}", None
@@ -421,6 +783,8 @@ class SpeechService:
         task_status = inner_response.get("data", {}).get("status")
         if task_status == "pending":
             return "pending", "Processing...", None
+        if task_status == "cancelled":
+            return "Error", "Task cancelled", None
 
         # Task finished, parse results
         data = inner_response.get("data", {})
@@ -430,31 +794,64 @@ class SpeechService:
         if not output_audio_b64:
             logger.warning(f"Edit task {task_id} did not return audio data.")
             # Return blank audio
-            return "done", edited_text, (blank_rate, blank_audio_data)
+            return "done", edited_text, BLANK_AUDIO_PATH
 
         try:
-            decoded_audio_bytes = base64.b64decode(output_audio_b64)
-            rate, audio_data = wavfile.read(io.BytesIO(decoded_audio_bytes))
-            return "done", edited_text, (rate, audio_data)
+            audio_path = await asyncio.to_thread(self.output_store.save_audio, output_audio_b64)
+            return "done", edited_text, audio_path
         except Exception as e:
             logger.error(f"Error decoding final audio for edit task {task_id}: {e}")
             return "Error", f"Failed to decode audio: {e}", None
 
     # Instruct Model Methods ===========================================
-    def submit_instruct_task(self, payload: dict) -> str:
-        """Submit controllable TTS task"""
+    async def submit_instruct_task(self, payload: dict) -> str:
+        """
+        Submit controllable TTS task. Long texts are split into sentences submitted
+        concurrently, all with the same caption, seed and prompt audio.
+        """
+        chunks = self.long_text.split(payload.get("text"))
+        if len(chunks) > 1:
+            return await self._start_chunked_task(
+                "instruct",
+                [self.submit_instruct_task({**payload, "text": chunk}) for chunk in chunks],
+            )
+
+        prompt_audio = payload.get("prompt_audio")
+        prompt_is_file = bool(prompt_audio) and os.path.isfile(prompt_audio)
+        cache_key = await asyncio.to_thread(
+            make_cache_key,
+            "instruct",
+            {
+                "text": payload.get("text"),
+                "caption": payload.get("caption"),
+                "seed": payload.get("seed"),
+                "prompt_audio": None if prompt_is_file else prompt_audio,
+            },
+            [prompt_audio] if prompt_is_file else [],
+        )
+        cached_task_id = await self._cached_task("instruct", cache_key)
+        if cached_task_id:
+            return cached_task_id
+        return await self._coalesced(
+            cache_key, lambda: self._start_instruct_task(payload, cache_key)
+        )
+
+    async def _start_instruct_task(self, payload: dict, cache_key: str) -> str:
+        """Submits the controllable TTS task (identical in-flight requests are merged by _coalesced)"""
         # Process reference audio (if exists and is file path)
         prompt_audio = payload.get("prompt_audio")
         prompt_wav_b64 = None
+        codec = "wav"
 
         if prompt_audio:
             # If it's already a Base64 string (though UI usually passes paths), keep it
             # Otherwise attempt to read as a file path
             if os.path.isfile(prompt_audio):
-                processed_path = self._preprocess_audio(prompt_audio)
+                processed_path = await asyncio.to_thread(self._preprocess_audio, prompt_audio)
                 if processed_path:
-                    with open(processed_path, "rb") as f:
-                        prompt_wav_b64 = base64.b64encode(f.read()).decode("utf-8")
+                    prompt_wav_b64, codec = await asyncio.to_thread(
+                        self.audio_b64_cache.encode, processed_path, self.audio_codec
+                    )
                 else:
                     return "Error: Audio file processing failed"
             else:
@@ -471,48 +868,50 @@ class SpeechService:
 
         # Remove None values (prompt_wav_b64 optional in some modes)
         call_args = {k: v for k, v in call_args.items() if v is not None}
+        tag_codec(call_args, "prompt_wav_b64", codec)
 
-        response = self._call_webgw_api(
+        response = await self._call_webgw_api(
             call_name="submit_task",
             call_args=call_args,
             api_project="260113-ming-uniaudio-instruct",
         )
 
-        if not response.get("success"):
-            return f"Error: {response.get('errorMessage', 'Submission failed')}"
-
-        result_content = response.get("resultMap", {}).get("result")
-
-        # Logging
         logger.info(f"Instruct task submission response content: {response}")
-
-        # Parse inner JSON (Maya returned structure)
-        if isinstance(result_content, str):
-            try:
-                result_data = json.loads(result_content)
-            except json.JSONDecodeError:
-                return f"Error: Invalid response format - {result_content}"
-        else:
-            result_data = result_content
-
-        # Note: Directly return task_id from data
-        # Maya format: { "task_id": "...", "status": "pending" }
-        task_id = result_data.get("task_id")
+        task_id, error = submitted_task_id(response)
         if not task_id:
-            return f"Error: Missing task_id in response - {result_data}"
+            return f"Error: {error or 'Missing task_id in response'}"
 
         logger.info(f"Instruct task started with ID: {task_id}")
+        await self._track_task("instruct", task_id, cache_key)
 
+        # Register with the poll scheduler right away so task timing starts at submission
+        await self.poll_instruct_task(task_id)
         return task_id
 
-    def poll_instruct_task(self, task_id: str) -> (str, tuple or None):
+    async def poll_instruct_task(self, task_id: str) -> (str, str or None):
         """Poll controllable TTS task result"""
-        response = self._call_webgw_api(
-            call_name="poll_task",
-            call_args={"task_id": task_id},
-            api_project="260113-ming-uniaudio-instruct",
+        if task_id.startswith("long-"):
+            return await self._chunked_check("instruct", task_id, self.poll_instruct_task)
+        return await self._scheduled_check(
+            "instruct",
+            task_id,
+            lambda response: self._poll_instruct_task_once(task_id, response),
+            pending=("pending", None),
+            batch_group="instruct",
+            cancel_fn=lambda: self._cancel_task(task_id, "260113-ming-uniaudio-instruct"),
         )
 
+    async def _poll_instruct_task_once(
+        self, task_id: str, response: dict = None
+    ) -> (str, str or None):
+        """Query controllable TTS task status once (called by the poll scheduler)"""
+        if response is None:
+            response = await self._call_webgw_api(
+                call_name="poll_task",
+                call_args={"task_id": task_id},
+                api_project="260113-ming-uniaudio-instruct",
+            )
+
         if not response.get("success"):
             return f"Error: {response.get('errorMessage', 'Polling request failed')}", None
 
@@ -537,9 +936,8 @@ class SpeechService:
             if not output_audio_b64:
                 return "Error: Task successful but no audio returned", None
             try:
-                decoded_audio = base64.b64decode(output_audio_b64)
-                rate, audio_data = wavfile.read(io.BytesIO(decoded_audio))
-                return "done", (rate, audio_data)
+                audio_path = await asyncio.to_thread(self.output_store.save_audio, output_audio_b64)
+                return "done", audio_path
             except Exception as e:
                 logger.error(f"Failed to decode instruct audio: {e}")
                 return f"Error: Audio decoding failed - {e}", None
@@ -551,6 +949,7 @@ class SpeechService:
 class GradioInterface:
     def __init__(self, speech_service: SpeechService):
         self.service = speech_service
+        self.lanes = get_queue_lanes()
 
         # Initialize UniAudio V4 MOE Demo Tab
         self.uniaudio_demo_tab = MingOmniTTSDemoTab(
@@ -582,6 +981,10 @@ class GradioInterface:
                 font-family: SFMono-Regular, Consolas, "Liberation Mono", Menlo, Courier, monospace !important;
             }
             """
+        self._transcript_seed_task = None
+        self._resume_task = None
+        # session -> {UI slot: (task type, task_id)}: the tasks each session waits for
+        self._session_tasks = {}
         self.demo = self._create_interface()
 
     def play_audio(self, content):
@@ -664,6 +1067,7 @@ class GradioInterface:
                                 submit_btn = gr.Button("Execute Edit", variant="primary")
                                 output_text = gr.Textbox(label="Edited Text", interactive=False)
                                 output_audio = gr.Audio(
+                                    type="filepath",
                                     label="Edited Audio",
                                     autoplay=True,
                                     interactive=False,
@@ -747,24 +1151,28 @@ class GradioInterface:
                 self.asr_start_wrapper,
                 inputs=[input_audio],
                 outputs=[asr_task_id_state, transcription_box, asr_polling_counter],
+                **self.lanes.listener("asr"),
             )
             asr_polling_counter.change(
                 self.asr_check_wrapper,
                 inputs=[asr_task_id_state, asr_polling_counter],
                 outputs=[transcription_box, asr_polling_counter],
                 every=2,
+                concurrency_limit=None,
             )
 
             submit_btn.click(
                 self.edit_start_wrapper,
                 inputs=[input_audio, instruction_box],
                 outputs=[edit_task_id_state, edit_polling_counter, output_text, output_audio],
+                **self.lanes.listener("edit"),
             )
             edit_polling_counter.change(
                 self.edit_check_wrapper,
                 inputs=[edit_task_id_state, edit_polling_counter],
                 outputs=[output_text, output_audio, edit_polling_counter],
                 every=2,
+                concurrency_limit=None,
             )
 
             continuous_edit.change(
@@ -780,24 +1188,28 @@ class GradioInterface:
                 self.prompt_asr_start_wrapper,
                 inputs=[prompt_audio],
                 outputs=[prompt_asr_task_id_state, prompt_text, prompt_asr_polling_counter],
+                **self.lanes.listener("asr"),
             )
             prompt_asr_polling_counter.change(
                 self.prompt_asr_check_wrapper,
                 inputs=[prompt_asr_task_id_state, prompt_asr_polling_counter],
                 outputs=[prompt_text, prompt_asr_polling_counter],
                 every=2,
+                concurrency_limit=None,
             )
 
             tts_btn.click(
                 self.tts_start_wrapper,
                 inputs=[tts_box, prompt_audio, prompt_text],
                 outputs=[task_id_state, synthesized_audio, polling_counter],
+                **self.lanes.listener("tts"),
             )
             polling_counter.change(
                 self.tts_check_wrapper,
                 inputs=[task_id_state, polling_counter],
                 outputs=[synthesized_audio, polling_counter],
                 every=2,
+                concurrency_limit=None,
             )
 
             with gr.Accordion("Microphone permissions not working? Click for solutions", open=False):
@@ -814,6 +1226,9 @@ class GradioInterface:
                 """
                 )
 
+            demo.load(self.seed_prompt_transcripts, show_progress="hidden", api_name=False)
+            demo.unload(self.release_session_tasks)
+
         return demo
 
     def _get_tts_examples(self) -> list:
@@ -844,16 +1259,20 @@ class GradioInterface:
 
     # Wrapper Functions =======================================================
 
-    def edit_start_wrapper(self, audio_path: str, instruction: str):
+    async def edit_start_wrapper(self, audio_path: str, instruction: str, request: gr.Request):
         """Async task start wrapper for Voice Editing"""
         logger.info(
             f"Edit start wrapper called with audio: {audio_path}, instruction: {instruction}"
         )
         if not audio_path or not instruction:
+            await self._session_task(request, "edit")
             # Correspond to UI outputs: task_id, polling_counter, output_text, output_audio
             return None, 0, "Error: Please provide audio and editing instructions", (blank_rate, blank_audio_data)
 
-        task_id = self.service.edit_start_task(audio_path, instruction)
+        task_id = await self.service.edit_start_task(audio_path, instruction)
+        await self._session_task(
+            request, "edit", "edit", None if task_id.startswith("Error:") else task_id
+        )
         if task_id.startswith("Error:"):
             return None, 0, task_id, (blank_rate, blank_audio_data)
 
@@ -861,14 +1280,14 @@ class GradioInterface:
         # Return task_id, start polling counter, update status info, clear audio output
         return task_id, 1, status_message, gr.update(value=None)
 
-    def edit_check_wrapper(self, task_id: str, polling_counter: int):
+    async def edit_check_wrapper(self, task_id: str, polling_counter: int):
         """Async task status check wrapper for Voice Editing"""
         if not task_id or polling_counter == 0:
             # No task or polling not started, return directly
             return gr.update(), gr.update(), polling_counter
 
         logger.info(f"Polling Edit task {task_id}, counter: {polling_counter}")
-        status, text_result, audio_result = self.service.edit_check_task(task_id)
+        status, text_result, audio_result = await self.service.edit_check_task(task_id)
 
         if status == "pending":
             elapsed = polling_counter * 2
@@ -882,30 +1301,36 @@ class GradioInterface:
             # Show error in textbox, return blank audio, stop polling
             return text_result, audio_result or (blank_rate, blank_audio_data), 0
 
-    def tts_start_wrapper(self, text: str, prompt_wav_path: str, prompt_text: str):
+    async def tts_start_wrapper(
+        self, text: str, prompt_wav_path: str, prompt_text: str, request: gr.Request
+    ):
         """Task start wrapper for Voice Synthesis"""
         logger.info(
             f"TTS start wrapper called with text length: {len(text)}, prompt_wav_path: {prompt_wav_path}, prompt_text length: {len(prompt_text)}"
         )
         if not all([text, prompt_wav_path, prompt_text]):
+            await self._session_task(request, "tts")
             # outputs: [task_id_state, synthesized_audio, polling_counter]
             return None, gr.update(label="Error: Missing synthesis text, reference audio, or reference text.", value=None), 0
 
-        task_id = self.service.tts_start_task(text, prompt_wav_path, prompt_text)
+        task_id = await self.service.tts_start_task(text, prompt_wav_path, prompt_text)
+        await self._session_task(
+            request, "tts", "tts", None if task_id.startswith("Error:") else task_id
+        )
         if task_id.startswith("Error:"):
             return None, gr.update(label=task_id, value=None), 0
 
         status_message = f"Task submitted (ID: ...{task_id[-6:]}), starting polling..."
         return task_id, gr.update(label=status_message, value=None), 1
 
-    def tts_check_wrapper(self, task_id: str, polling_counter: int):
+    async def tts_check_wrapper(self, task_id: str, polling_counter: int):
         """Task status check wrapper for Voice Synthesis"""
         if not task_id or polling_counter == 0:
             # outputs: [synthesized_audio, polling_counter]
             return gr.update(), 0
 
         logger.info(f"Polling TTS task {task_id}, counter: {polling_counter}")
-        status, result = self.service.tts_check_task(task_id)
+        status, result = await self.service.tts_check_task(task_id)
 
         if status == "pending":
             elapsed = polling_counter * 2  # Approx. 2s per check
@@ -916,13 +1341,17 @@ class GradioInterface:
         else:  # Error case
             return gr.update(label=status, value=None), 0
 
-    def asr_start_wrapper(self, audio_path: str):
+    async def asr_start_wrapper(self, audio_path: str, request: gr.Request):
         """Async task start wrapper for ASR"""
         logger.info(f"ASR start wrapper called with audio_path: {audio_path}")
         if not audio_path:
+            await self._session_task(request, "asr")
             return None, "Error: Please upload an audio file first.", 0
 
-        task_id = self.service.asr_start_task(audio_path)
+        task_id = await self.service.asr_start_task(audio_path)
+        await self._session_task(
+            request, "asr", "asr", None if task_id.startswith("Error:") else task_id
+        )
         if task_id.startswith("Error:"):
             return None, task_id, 0
 
@@ -930,13 +1359,13 @@ class GradioInterface:
         # Return task_id to state, update status, start polling
         return task_id, status_message, 1
 
-    def asr_check_wrapper(self, task_id: str, polling_counter: int):
+    async def asr_check_wrapper(self, task_id: str, polling_counter: int):
         """Async task status check wrapper for ASR"""
         if not task_id or polling_counter == 0:
             return gr.update(), 0
 
         logger.info(f"Polling ASR task {task_id}, counter: {polling_counter}")
-        status, result = self.service.asr_check_task(task_id)
+        status, result = await self.service.asr_check_task(task_id)
 
         if status == "pending":
             elapsed = polling_counter * 2
@@ -949,27 +1378,92 @@ class GradioInterface:
             status_message = f"Recognition failed: {status}"
             return status_message, 0
 
-    def prompt_asr_start_wrapper(self, audio_path: str):
+    async def prompt_asr_start_wrapper(self, audio_path: str, request: gr.Request):
         """Async task start wrapper for TTS reference audio ASR"""
         logger.info(f"Prompt ASR start wrapper called with audio_path: {audio_path}")
         if not audio_path:
+            await self._session_task(request, "prompt_asr")
             # outputs: [task_id_state, output_textbox, polling_counter]
             return None, "Error: Please upload reference audio first.", 0
 
-        task_id = self.service.asr_start_task(audio_path)
+        task_id = await self.service.asr_start_task(audio_path)
+        await self._session_task(
+            request, "prompt_asr", "asr", None if task_id.startswith("Error:") else task_id
+        )
         if task_id.startswith("Error:"):
             return None, task_id, 0
 
+        # Cached clips (including the pre-seeded examples) return their text right away
+        status, result = await self.service.asr_check_task(task_id)
+        if status == "done":
+            return None, result, 0
+
         status_message = f"Reference audio recognition task submitted, waiting for results..."
         return task_id, status_message, 1
 
-    def prompt_asr_check_wrapper(self, task_id: str, polling_counter: int):
+    async def _session_task(
+        self, request: gr.Request, slot: str, kind: str = None, task_id: str = None
+    ):
+        """
+        Registers the task a session waits for in UI slot `slot` (None when there is no new
+        task) and releases the slot's previous task, which is cancelled once no session waits
+        for it, so the backend stops computing results nobody will see.
+        """
+        tasks = self._session_tasks.setdefault(request.session_hash, {})
+        previous = tasks.pop(slot, None)
+        if task_id:
+            # Watch the new task before releasing the old one: resubmitting the same request
+            # shares its task, which must not be cancelled
+            self.service.watch_task(kind, task_id)
+            tasks[slot] = (kind, task_id)
+        if previous:
+            await self.service.release_task(*previous)
+
+    async def release_session_tasks(self, request: gr.Request):
+        """Releases the tasks of a session that disconnected (page closed or reloaded)"""
+        tasks = self._session_tasks.pop(request.session_hash, {})
+        await asyncio.gather(
+            *(self.service.release_task(kind, task_id) for kind, task_id in tasks.values())
+        )
+
+    async def seed_prompt_transcripts(self):
+        """On the first page load, transcribe the example reference clips in the background"""
+        # The poll scheduler and HTTP client live on Gradio's event loop, so warm up once it runs
+        if self._transcript_seed_task is None:
+            audio_paths = [audio_path for audio_path, _ in self._get_tts_examples()]
+            self._transcript_seed_task = asyncio.create_task(
+                self.service.seed_transcripts(audio_paths)
+            )
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """
+        Lifespan of the Gradio (FastAPI) server: resumes the tasks a restart left unfinished
+        in the background as soon as the server is up, without waiting for a page load. The
+        scheduler and HTTP clients are bound to Gradio's event loop, so it cannot start earlier.
+        """
+        self._resume_task = asyncio.create_task(self.resume_journaled_tasks())
+        yield
+        self._resume_task.cancel()
+
+    async def resume_journaled_tasks(self):
+        """Resumes the tasks a restart left unfinished and logs any failure"""
+        results = await asyncio.gather(
+            self.service.resume_tasks(),
+            self.uniaudio_demo_tab.resume_tasks(),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.opt(exception=result).error(f"Resuming journaled tasks failed: {result}")
+
+    async def prompt_asr_check_wrapper(self, task_id: str, polling_counter: int):
         """Async task status check wrapper for TTS reference audio ASR"""
         if not task_id or polling_counter == 0:
             return gr.update(), 0
 
         logger.info(f"Polling Prompt ASR task {task_id}, counter: {polling_counter}")
-        status, result = self.service.asr_check_task(task_id)
+        status, result = await self.service.asr_check_task(task_id)
 
         if status == "pending":
             elapsed = polling_counter * 2
@@ -1049,78 +1543,88 @@ class GradioInterface:
             gr.update(value=None),
         )
 
-    def process_edit_example(self, audio_path: str, instruction: str):
+    async def process_edit_example(self, audio_path: str, instruction: str):
+        """
+        Example click handler. The edit task does not use the transcription, so both
+        tasks are submitted at once and polled together, and each result is shown as
+        soon as it arrives: the wait is the longer of the two rather than their sum.
+        """
         # Populate input fields
-        yield gr.update(value=audio_path), gr.update(
-            value=instruction
-        ), "Submitting recognition task...", gr.update(), gr.update()
-
-        # --- ASR Task ---
-        asr_task_id = self.service.asr_start_task(audio_path)
-        if asr_task_id.startswith("Error:"):
-            yield gr.update(), gr.update(), asr_task_id, gr.update(), gr.update()
-            return
-
-        yield gr.update(), gr.update(), "Recognition task submitted, waiting for results...", gr.update(), gr.update()
-
-        transcription = ""
-        for i in range(30):  # Timeout after 60s
-            time.sleep(2)
-            status, result = self.service.asr_check_task(asr_task_id)
-            if status == "pending":
-                yield gr.update(), gr.update(), f"Transcribing... ({(i+1)*2}s)", gr.update(), gr.update()
-            elif status == "done":
-                transcription = result
-                yield gr.update(), gr.update(), transcription, gr.update(), gr.update()
-                break
-            else:  # Error
-                yield gr.update(), gr.update(), f"Recognition failed: {result}", gr.update(), gr.update()
-                return
-
-        if not transcription:
-            yield gr.update(), gr.update(), "Recognition timeout or no results returned", gr.update(), gr.update()
-            return
-
-        # --- Edit Task ---
-        yield gr.update(), gr.update(), transcription, "Submitting edit task...", gr.update(value=None)
-
-        edit_task_id = self.service.edit_start_task(audio_path, instruction)
-        if edit_task_id.startswith("Error:"):
-            yield gr.update(), gr.update(), transcription, f"Edit task submission failed: {edit_task_id}", (
-                blank_rate,
-                blank_audio_data,
-            )
-            return
-
-        yield gr.update(), gr.update(), transcription, "Edit task submitted, waiting for results...", gr.update(
-            value=None
+        yield (
+            gr.update(value=audio_path),
+            gr.update(value=instruction),
+            "Submitting recognition task...",
+            "Submitting edit task...",
+            gr.update(value=None),
         )
 
-        for i in range(60):  # Timeout after 120s
-            time.sleep(2)
-            status, text_result, audio_result = self.service.edit_check_task(edit_task_id)
-            if status == "pending":
-                yield gr.update(), gr.update(), transcription, f"Editing... ({(i+1)*2}s)", gr.update()
-            elif status == "done":
-                yield gr.update(), gr.update(), transcription, text_result, audio_result
-                return
-            else:  # Error
-                yield gr.update(), gr.update(), transcription, f"Edit failed: {text_result}", audio_result or (
-                    blank_rate,
-                    blank_audio_data,
-                )
-                return
-
-        yield gr.update(), gr.update(), transcription, "Edit task timeout", (
-            blank_rate,
-            blank_audio_data,
+        asr_task_id, edit_task_id = await asyncio.gather(
+            self.service.asr_start_task(audio_path),
+            self.service.edit_start_task(audio_path, instruction),
+        )
+        asr_pending = not asr_task_id.startswith("Error:")
+        transcription = (
+            "Recognition task submitted, waiting for results..." if asr_pending else asr_task_id
+        )
+        edit_pending = not edit_task_id.startswith("Error:")
+        edit_text = (
+            "Edit task submitted, waiting for results..."
+            if edit_pending
+            else f"Edit task submission failed: {edit_task_id}"
         )
+        edit_audio = None if edit_pending else (blank_rate, blank_audio_data)
+        yield gr.update(), gr.update(), transcription, edit_text, gr.update(value=edit_audio)
+
+        elapsed = 0
+        while asr_pending or edit_pending:
+            await asyncio.sleep(2)
+            elapsed += 2
+            audio_update = gr.update()
+
+            if asr_pending:  # Timeout after 60s
+                status, result = await self.service.asr_check_task(asr_task_id)
+                asr_pending = status == "pending" and elapsed < 60
+                if status == "pending":
+                    transcription = (
+                        f"Transcribing... ({elapsed}s)"
+                        if asr_pending
+                        else "Recognition timeout or no results returned"
+                    )
+                elif status == "done":
+                    transcription = result
+                else:  # Error
+                    transcription = f"Recognition failed: {result}"
+
+            if edit_pending:  # Timeout after 120s
+                status, text_result, audio_result = await self.service.edit_check_task(edit_task_id)
+                edit_pending = status == "pending" and elapsed < 120
+                if status == "pending":
+                    edit_text = f"Editing... ({elapsed}s)" if edit_pending else "Edit task timeout"
+                elif status == "done":
+                    edit_text, edit_audio = text_result, audio_result
+                else:  # Error
+                    edit_text = f"Edit failed: {text_result}"
+                    edit_audio = audio_result
+                if not edit_pending:
+                    edit_audio = edit_audio or (blank_rate, blank_audio_data)
+                    audio_update = edit_audio
+
+            # The edit audio is sent once when it arrives so the player is not reset while ASR is
+            # still running; the last output carries every result
+            if not (asr_pending or edit_pending):
+                audio_update = edit_audio
+            yield gr.update(), gr.update(), transcription, edit_text, audio_update
 
     def launch(self):
         """启动Gradio应用"""
         server_name = os.getenv("GRADIO_APP_HOST", "127.0.0.1")
         server_port = int(os.getenv("GRADIO_APP_PORT", "7860"))
-        self.demo.launch(share=False, server_name=server_name, server_port=server_port)
+        self.demo.launch(
+            share=False,
+            server_name=server_name,
+            server_port=server_port,
+            app_kwargs={"lifespan": self.lifespan},
+        )
 
 
 # 主程序 ==============================================================
@@ -1130,4 +1634,6 @@ if __name__ == "__main__":
 
     # 创建并启动Gradio界面
     gradio_interface = GradioInterface(speech_service)
-    gradio_interface.demo.queue(default_concurrency_limit=10).launch()
+    gradio_interface.demo.queue(default_concurrency_limit=10)
+    gradio_interface.lanes.install(gradio_interface.demo)
+    gradio_interface.demo.launch(app_kwargs={"lifespan": gradio_interface.lifespan})
@@ -0,0 +1,153 @@
+import base64
+import io
+import itertools
+import os
+import zlib
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+try:
+    import soundfile
+except ImportError:  # only needed for the compressed transports
+    soundfile = None
+
+CODECS = ("wav", "flac", "opus")
+
+# Sample rates the Opus encoder accepts.
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+_WHITESPACE = str.maketrans("", "", " \t\r\n")
+
+
+def get_transport_codec() -> str:
+    """
+    Codec used for audio embedded in submit payloads, from AUDIO_TRANSPORT:
+      wav   the file bytes as they are (default)
+      flac  lossless, typically 1.5-3x smaller for speech
+      opus  lossy, an order of magnitude smaller
+    """
+    codec = os.environ.get("AUDIO_TRANSPORT", "wav").strip().lower()
+    if codec not in CODECS:
+        logger.warning(f"Unknown AUDIO_TRANSPORT '{codec}', falling back to wav")
+        return "wav"
+    if codec != "wav" and soundfile is None:
+        logger.warning(f"AUDIO_TRANSPORT={codec} requires the soundfile package, using wav")
+        return "wav"
+    return codec
+
+
+# FLAC subtype for each source subtype. Integer PCM keeps its bit depth, so
+# FLAC stays lossless; float samples are quantized to 16 bits. Other subtypes
+# (e.g. 32-bit integer PCM) have no FLAC equivalent and are sent as they are.
+FLAC_SUBTYPES = {
+    "PCM_U8": "PCM_16",
+    "PCM_S8": "PCM_16",
+    "PCM_16": "PCM_16",
+    "PCM_24": "PCM_24",
+    "FLOAT": "PCM_16",
+    "DOUBLE": "PCM_16",
+}
+
+
+def compress(audio_path: str, codec: str) -> Tuple[bytes, str]:
+    """
+    Returns the contents of `audio_path` encoded with `codec`, and the codec
+    actually used: files the encoder cannot take are sent as they are ("wav").
+    """
+    if codec == "wav":
+        with open(audio_path, "rb") as f:
+            return f.read(), "wav"
+    try:
+        info = soundfile.info(audio_path)
+        buffer = io.BytesIO()
+        if codec == "flac":
+            subtype = FLAC_SUBTYPES.get(info.subtype)
+            if subtype is None:
+                raise ValueError(f"FLAC cannot hold {info.subtype} samples losslessly")
+            if info.subtype in ("FLOAT", "DOUBLE"):
+                # Scaled to [-1, 1] on write; clip so loud samples do not wrap around.
+                data, sample_rate = soundfile.read(audio_path, dtype="float32")
+                np.clip(data, -1.0, 1.0, out=data)
+            else:
+                # Integer PCM read as int32 is left-aligned, so it converts exactly.
+                data, sample_rate = soundfile.read(audio_path, dtype="int32")
+            soundfile.write(buffer, data, sample_rate, format="FLAC", subtype=subtype)
+        else:
+            if info.samplerate not in OPUS_SAMPLE_RATES:
+                raise ValueError(f"Opus does not support {info.samplerate} Hz")
+            data, sample_rate = soundfile.read(audio_path, dtype="float32")
+            soundfile.write(buffer, data, sample_rate, format="OGG", subtype="OPUS")
+        return buffer.getvalue(), codec
+    except Exception as e:
+        logger.warning(f"Cannot encode {audio_path} as {codec}, sending it unchanged: {e}")
+        with open(audio_path, "rb") as f:
+            return f.read(), "wav"
+
+
+def decompress(content: bytes, codec: str) -> bytes:
+    """Decodes audio produced by `compress()` back to WAV bytes of the same bit depth."""
+    if codec == "wav":
+        return content
+    info = soundfile.info(io.BytesIO(content))
+    data, sample_rate = soundfile.read(io.BytesIO(content), dtype="int32")
+    subtype = "PCM_24" if info.subtype == "PCM_24" else "PCM_16"
+    buffer = io.BytesIO()
+    soundfile.write(buffer, data, sample_rate, format="WAV", subtype=subtype)
+    return buffer.getvalue()
+
+
+def codec_field(b64_field: str) -> str:
+    """Name of the tag field for an audio field: prompt_wav_b64 -> prompt_wav_codec."""
+    return f"{b64_field[: -len('_b64')]}_codec"
+
+
+def tag_codec(payload: Dict[str, Any], b64_field: str, codec: Union[str, List[str]]):
+    """
+    Records the codec of `payload[b64_field]` next to it. WAV fields stay
+    untagged so payloads in the default mode are unchanged.
+    """
+    codecs = codec if isinstance(codec, list) else [codec]
+    if any(c != "wav" for c in codecs):
+        payload[codec_field(b64_field)] = codec
+
+
+def _iter_b64(encoded: str, chunk_size: int) -> Iterator[bytes]:
+    carry = ""
+    for start in range(0, len(encoded), chunk_size):
+        piece = carry + encoded[start : start + chunk_size].translate(_WHITESPACE)
+        usable = len(piece) - len(piece) % 4
+        carry = piece[usable:]
+        if usable:
+            yield base64.b64decode(piece[:usable])
+    if carry:
+        yield base64.b64decode(carry)  # raises on truncated input
+
+
+def iter_gzip_b64(encoded: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Decodes base64 text of gzip data (the proxy's `gzippedRaw`) piece by piece
+    and yields the decompressed bytes, so memory use is bounded by `chunk_size`
+    rather than by the length of the audio. Data that is not gzip is yielded
+    as it is.
+    """
+    chunks = _iter_b64(encoded, chunk_size - chunk_size % 4)
+    first = next(chunks, b"")
+    if not first.startswith(GZIP_MAGIC):
+        logger.warning("Proxied audio is not gzip-compressed, using it as is")
+        yield first
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for compressed in itertools.chain([first], chunks):
+        data = decompressor.decompress(compressed, chunk_size)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+    yield decompressor.flush()
+    if not decompressor.eof:
+        raise ValueError("truncated gzip data")
@@ -0,0 +1,77 @@
+import argparse
+import base64
+import gzip
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.io import wavfile
+
+from audio_transport import iter_gzip_b64
+from output_store import OutputStore
+
+
+def make_gzipped_b64(seconds: float, sample_rate: int = 44100) -> str:
+    """A stereo 16-bit clip shaped like a BGM response: base64 of gzip of the WAV."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = np.sin(2 * np.pi * 220 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 0.5 * t))
+    noise = np.random.default_rng(0).normal(0, 0.05, (len(t), 2))
+    data = ((tone[:, None] + noise) * 12000).astype(np.int16)
+    buffer = io.BytesIO()
+    wavfile.write(buffer, sample_rate, data)
+    return base64.b64encode(gzip.compress(buffer.getvalue())).decode("utf-8")
+
+
+def buffered(gzipped_b64: str, output_path: str):
+    """The previous download path: decode everything, decompress everything, write."""
+    compressed_data = base64.b64decode(gzipped_b64)
+    with gzip.GzipFile(fileobj=io.BytesIO(compressed_data)) as f_gz:
+        content = f_gz.read()
+    with open(output_path, "wb") as f:
+        f.write(content)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == "__main__":
+    """
+    Compares peak Python memory and time of saving a proxied `gzippedRaw`
+    download with the buffered decoder and with the streaming one. The
+    response text itself is allocated before measuring starts.
+
+    To run:
+        python bench_audio_download.py --seconds 30 60
+    """
+    parser = argparse.ArgumentParser(description="Benchmark proxied audio decoding")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[30, 60])
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OutputStore(tmp)
+        print(f"{'clip':>6} {'WAV MB':>8} {'method':>10} {'time ms':>9} {'peak MB':>9}")
+        for seconds in args.seconds:
+            gzipped_b64 = make_gzipped_b64(seconds)
+            wav_mb = len(gzip.decompress(base64.b64decode(gzipped_b64))) / 1024 / 1024
+            results = {
+                "buffered": measure(buffered, gzipped_b64, os.path.join(tmp, "buffered.wav")),
+                "streaming": measure(
+                    lambda: store.save_stream(iter_gzip_b64(gzipped_b64, args.chunk_kb * 1024))
+                ),
+            }
+            for method, (elapsed, peak) in results.items():
+                print(
+                    f"{seconds:>5.0f}s {wav_mb:>8.1f} {method:>10} "
+                    f"{elapsed * 1000:>9.1f} {peak / 1024 / 1024:>9.2f}"
+                )
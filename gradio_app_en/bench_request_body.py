@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from webgw_client import AsyncWebGWClient, get_async_client
+
+MODES = ("json", "json+dump", "stream")
+
+
+class SinkHandler(BaseHTTPRequestHandler):
+    """Reads and discards the request body, like a gateway that streams it on."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, 1 << 16)))
+        body = b'{"success": true, "resultObj": {"result": "{}"}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def send(mode: str, megabytes: int, repeat: int) -> float:
+    """Peak RSS growth (MB) while sending `repeat` requests carrying `megabytes` of base64."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    client = AsyncWebGWClient(url, "bench", "bench")
+
+    # One allocation, standing in for the entry held by the encoded-audio cache.
+    audio_b64 = "A" * (megabytes * 1024 * 1024)
+    request_body = client.build_request_body(
+        "bench", "submit_task", {"text": "benchmark", "prompt_wav_b64": audio_b64}
+    )
+    await client.post({"api_project": "warmup", "call_args": {}})  # open the connection pool
+    baseline = peak_rss_mb()
+
+    for _ in range(repeat):
+        if mode == "stream":
+            response = await client.post(request_body)
+        else:
+            if mode == "json+dump":
+                # What DUMP_REQS used to do before truncating the dump.
+                json.dumps(request_body, indent=2, ensure_ascii=False)[:4096]
+            response = await get_async_client().post(url, headers=client.headers, json=request_body)
+        response.raise_for_status()
+    server.shutdown()
+    return peak_rss_mb() - baseline
+
+
+if __name__ == "__main__":
+    """
+    Measures how much peak RSS one WebGW submit adds as the embedded audio
+    grows, for the previous `json=` body (with and without the DUMP_REQS dump)
+    and for StreamingJSONBody. Each measurement runs in a fresh process
+    against a local sink server.
+
+    To run:
+        python bench_request_body.py --sizes 1 4 16 64
+    """
+    parser = argparse.ArgumentParser(description="Benchmark request body memory")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16, 64], help="MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "MB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, megabytes = args.child
+        print(f"{asyncio.run(send(mode, int(megabytes), args.repeat)):.1f}")
+        sys.exit(0)
+
+    print(f"Peak RSS added per request (MB), {args.repeat} requests each")
+    print(f"{'base64 MB':>10}" + "".join(f"{mode:>12}" for mode in MODES))
+    for megabytes in args.sizes:
+        row = f"{megabytes:>10}"
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, str(megabytes)]
+                + ["--repeat", str(args.repeat)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            row += f"{float(output.strip().splitlines()[-1]):>12.1f}"
+        print(row)
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from poll_scheduler import PollScheduler
+from task_manager import TaskManager
+
+
+async def never_done(response=None):
+    return None
+
+
+def add_pending(manager: TaskManager, count: int):
+    for i in range(count):
+        manager.track("bench", f"task-{i:08d}", never_done)
+
+
+def add_finished(manager: TaskManager, count: int):
+    for i in range(count):
+        manager.resolve("bench-cached", f"task-{i:08d}", ("done", "/tmp/result.wav"))
+
+
+def new_manager(count: int, retention: float) -> TaskManager:
+    # Long intervals keep the scheduler from polling and the manager from
+    # sweeping while records are added.
+    return TaskManager(
+        PollScheduler(interval=3600), retention=retention, max_records=count, sweep_interval=3600
+    )
+
+
+def measure(add, count: int, retention: float):
+    """Time of adding `count` records, then Python memory per record (measured separately)."""
+    started = time.perf_counter()
+    add(new_manager(count, retention), count)
+    elapsed = time.perf_counter() - started
+
+    manager = new_manager(count, retention)
+    tracemalloc.start()
+    add(manager, count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size / count, manager
+
+
+async def run(count: int, retention: float):
+    pending_s, pending_bytes, _ = measure(add_pending, count, retention)
+    finished_s, finished_bytes, manager = measure(add_finished, count, retention)
+    await asyncio.sleep(retention)
+    manager.sweep_interval = 0
+    started = time.perf_counter()
+    manager._sweep()
+    sweep_s = time.perf_counter() - started
+    return pending_s, pending_bytes, finished_s, finished_bytes, sweep_s, len(manager._records)
+
+
+if __name__ == "__main__":
+    """
+    Measures what tracked tasks cost: time and Python memory per pending task
+    (its record plus its poll scheduler entry) and per finished record, and
+    the time to evict all finished records once their retention is over.
+
+    To run:
+        python bench_task_manager.py --count 10000 50000
+    """
+    parser = argparse.ArgumentParser(description="Benchmark task manager records")
+    parser.add_argument("--count", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--retention", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(
+        f"{'tasks':>7} {'pending us':>11} {'B/pending':>10} {'finished us':>12} "
+        f"{'B/finished':>11} {'sweep ms':>9} {'left':>5}"
+    )
+    for count in args.count:
+        pending_s, pending_bytes, finished_s, finished_bytes, sweep_s, left = asyncio.run(
+            run(count, args.retention)
+        )
+        print(
+            f"{count:>7} {pending_s / count * 1e6:>11.1f} {pending_bytes:>10.0f} "
+            f"{finished_s / count * 1e6:>12.1f} {finished_bytes:>11.0f} "
+            f"{sweep_s * 1000:>9.1f} {left:>5}"
+        )
@@ -0,0 +1,320 @@
+import argparse
+import base64
+import gzip
+import io
+import json
+import math
+import random
+import struct
+import threading
+import time
+import uuid
+import wave
+from collections import Counter
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from loguru import logger
+
+from audio_transport import decompress
+
+SPEECH_PROJECT = "251220-ming-uniaudio"
+INSTRUCT_PROJECT = "260113-ming-uniaudio-instruct"
+
+
+def make_wav(seconds: float = 1.0, sample_rate: int = 16000, freq: float = 440.0) -> bytes:
+    """Generates a mono 16-bit sine tone as WAV bytes."""
+    frames = int(seconds * sample_rate)
+    samples = (
+        int(0.2 * 32767 * math.sin(2 * math.pi * freq * i / sample_rate)) for i in range(frames)
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(struct.pack(f"<{frames}h", *samples))
+    return buffer.getvalue()
+
+
+class MockWebGW:
+    """
+    In-memory stand-in for the WebGW gateway and the model services behind it.
+
+    Every task finishes `delay` seconds after submission, randomly stretched or
+    shortened by up to `jitter` (a fraction of `delay`). Poll calls accept either
+    `task_id` or a `task_ids` list (batch poll); batch results are returned as
+    {"tasks": {task_id: result}} in the same envelope as a single poll, and
+    unknown ids are left out.
+
+    Every project also accepts `cancel_task` with a `task_id`; a cancelled task
+    stays "cancelled" when polled instead of finishing.
+
+    Audio fields (`*_b64`) tagged with a `*_codec` field (see audio_transport)
+    are decoded back to WAV like the real services would; undecodable audio
+    fails the call.
+    """
+
+    def __init__(self, delay: float = 3.0, jitter: float = 0.0):
+        self.delay = delay
+        self.jitter = jitter
+        self.tasks = {}
+        # cancelled task id -> seconds of work it had left
+        self.cancelled = {}
+        self.calls = Counter()
+        # codec -> number of audio fields / base64 characters received
+        self.audio_fields = Counter()
+        self.audio_chars = Counter()
+        # "json" / "multipart" -> requests received
+        self.transports = Counter()
+        self._lock = threading.Lock()
+        self._wav_b64 = base64.b64encode(make_wav()).decode("utf-8")
+
+    def handle(self, request_body: dict, transport: str = "json") -> dict:
+        api_project = request_body.get("api_project")
+        call_name = request_body.get("call_name")
+        call_args = request_body.get("call_args") or {}
+        kind = "batch" if "task_ids" in call_args else "single"
+        with self._lock:
+            self.calls[(api_project, call_name, kind)] += 1
+            self.transports[transport] += 1
+
+        try:
+            self._decode_audio(call_args)
+        except Exception as e:
+            return {"success": False, "errorMessage": f"Undecodable audio: {e}"}
+
+        if call_name == "cancel_task":
+            result = self._cancel(api_project, call_args)
+        elif api_project == SPEECH_PROJECT:
+            result = self._speech(call_name, call_args)
+        elif api_project == INSTRUCT_PROJECT:
+            result = self._instruct(call_name, call_args)
+        else:
+            result = self._uniaudio(api_project, call_name, call_args)
+        if result is None:
+            return {"success": False, "errorMessage": f"Unknown call {api_project}/{call_name}"}
+        return {"success": True, "resultObj": {"result": json.dumps(result)}}
+
+    def _decode_audio(self, call_args: dict):
+        for field, value in call_args.items():
+            if not field.endswith("_b64") or not value:
+                continue
+            values = value if isinstance(value, list) else [value]
+            codecs = call_args.get(f"{field[: -len('_b64')]}_codec") or "wav"
+            if not isinstance(codecs, list):
+                codecs = [codecs] * len(values)
+            for encoded, codec in zip(values, codecs):
+                if codec != "wav":
+                    wav = decompress(base64.b64decode(encoded), codec)
+                    if wav[:4] != b"RIFF":
+                        raise ValueError(f"{field} is not a WAV file after decoding {codec}")
+                with self._lock:
+                    self.audio_fields[codec] += 1
+                    self.audio_chars[codec] += len(encoded)
+
+    def _submit(self, kind: str) -> str:
+        task_id = uuid.uuid4().hex
+        delay = self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+        with self._lock:
+            self.tasks[task_id] = (kind, time.monotonic() + delay)
+        return task_id
+
+    def _cancel(self, api_project: str, call_args: dict) -> dict:
+        task_id = call_args.get("task_id")
+        with self._lock:
+            found = task_id in self.tasks
+            if found and task_id not in self.cancelled:
+                self.cancelled[task_id] = max(self.tasks[task_id][1] - time.monotonic(), 0)
+        if api_project == SPEECH_PROJECT:
+            if not found:
+                return {"success": "False", "errMsg": "task not found"}
+            return {"success": "True", "data": {"task_id": task_id, "status": "cancelled"}}
+        if not found:
+            return {"status": "failed", "error_message": "task not found"}
+        return {"task_id": task_id, "status": "cancelled"}
+
+    def _poll(self, call_args: dict, poll_one):
+        def poll(task_id):
+            if task_id in self.cancelled:
+                return {"status": "cancelled"}
+            return poll_one(*self.tasks[task_id])
+
+        if "task_ids" in call_args:
+            return {
+                task_id: poll(task_id) for task_id in call_args["task_ids"] if task_id in self.tasks
+            }
+        task_id = call_args.get("task_id")
+        return poll(task_id) if task_id in self.tasks else None
+
+    # 251220-ming-uniaudio: call-non-edit-model (tts/asr) and call-edit-model
+    def _speech(self, call_name: str, call_args: dict):
+        if call_name not in ("call-non-edit-model", "call-edit-model"):
+            return None
+        if "task_id" not in call_args and "task_ids" not in call_args:
+            task_id = self._submit(call_args.get("task_name", "tts"))
+            return {"success": "True", "data": {"task_id": task_id}}
+
+        def poll_one(kind, ready_at):
+            if time.monotonic() < ready_at:
+                return {"status": "pending"}
+            if kind == "asr":
+                return {"status": "done", "transcribed_text": "zh\t这是一段模拟识别结果"}
+            data = {"status": "done", "output_audio_b64": self._wav_b64}
+            if kind == "edit":
+                data.update(transcribed_text="zh\t原始文本", edited_text="编辑后的文本")
+            return data
+
+        polled = self._poll(call_args, poll_one)
+        if polled is None:
+            return {"success": "False", "errMsg": "task not found"}
+        if "task_ids" in call_args:
+            return {"success": "True", "data": {"tasks": polled}}
+        return {"success": "True", "data": polled}
+
+    # 260113-ming-uniaudio-instruct: submit_task / poll_task
+    def _instruct(self, call_name: str, call_args: dict):
+        if call_name == "submit_task":
+            return {"task_id": self._submit("instruct"), "status": "pending"}
+        if call_name != "poll_task":
+            return None
+
+        def poll_one(kind, ready_at):
+            if time.monotonic() < ready_at:
+                return {"status": "pending"}
+            return {"status": "completed", "output_audio_b64": self._wav_b64}
+
+        polled = self._poll(call_args, poll_one)
+        if polled is None:
+            return {"status": "failed", "error_message": "task not found"}
+        return {"tasks": polled} if "task_ids" in call_args else polled
+
+    # UniAudio V4 projects: submit_task / poll_task / get_audio
+    def _uniaudio(self, api_project: str, call_name: str, call_args: dict):
+        if call_name == "submit_task":
+            return {"task_id": self._submit(call_args.get("task_type", "unknown"))}
+        if call_name == "get_audio":
+            return {"gzippedRaw": base64.b64encode(gzip.compress(make_wav())).decode("utf-8")}
+        if call_name != "poll_task":
+            return None
+
+        def poll_one(kind, ready_at):
+            if time.monotonic() < ready_at:
+                return {"status": "pending"}
+            audio_url = (
+                f"http://mock-oss/{api_project}/{uuid.uuid4().hex}.wav"
+                f"?OSSAccessKeyId=mock&Expires={int(time.time()) + 3600}&Signature=mock"
+            )
+            return {"status": "completed", "output_audio_url": audio_url}
+
+        polled = self._poll(call_args, poll_one)
+        if polled is None:
+            return {"status": "failed", "error_message": "task not found"}
+        return {"tasks": polled} if "task_ids" in call_args else polled
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict:
+    """
+    Rebuilds the JSON envelope of a multipart upload (see
+    webgw_client.split_binary_fields): the `request` part holds the envelope,
+    and each `call_args.<field>[.<index>]` part is base64-encoded back into it.
+    """
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    request_body = None
+    lists = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        content = part.get_payload(decode=True)
+        if name == "request":
+            request_body = json.loads(content)
+        elif name and name.startswith("call_args."):
+            field, _, index = name[len("call_args.") :].partition(".")
+            lists.setdefault(field, []).append((int(index or 0), bool(index), content))
+    if request_body is None:
+        raise ValueError("multipart upload without a 'request' part")
+    call_args = request_body.setdefault("call_args", {})
+    for field, items in lists.items():
+        encoded = [base64.b64encode(c).decode("utf-8") for _, _, c in sorted(items)]
+        call_args[field] = encoded if items[0][1] else encoded[0]
+    return request_body
+
+
+def make_handler(backend: MockWebGW, multipart: bool = True):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            content_type = self.headers.get("Content-Type", "")
+            try:
+                raw_body = self.rfile.read(length)
+                if not content_type.startswith("multipart/form-data"):
+                    response, status = backend.handle(json.loads(raw_body)), 200
+                elif multipart:
+                    request_body = parse_multipart(content_type, raw_body)
+                    response, status = backend.handle(request_body, "multipart"), 200
+                else:
+                    response = {"success": False, "errorMessage": "Unsupported Media Type"}
+                    status = 415
+            except (ValueError, AttributeError) as e:
+                response = {"success": False, "errorMessage": f"Bad request: {e}"}
+                status = 400
+            body = json.dumps(response).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    """
+    Runs a local mock of the WebGW backend, for development and load testing
+    without API credentials. Point the app at it in .secret:
+
+        WEB_GW_API_URL="http://127.0.0.1:8799/"
+
+    To run:
+        python mock_webgw.py --port 8799 --delay 3 --jitter 0.2
+
+    Multipart uploads (WEBGW_BINARY_UPLOAD) are accepted unless --no-multipart
+    is given, which answers them with HTTP 415 to exercise the JSON fallback.
+    """
+    parser = argparse.ArgumentParser(description="Local mock WebGW backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--delay", type=float, default=3.0, help="seconds until a task finishes")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +/- fraction of delay")
+    parser.add_argument(
+        "--no-multipart", action="store_true", help="reject multipart uploads with HTTP 415"
+    )
+    args = parser.parse_args()
+
+    backend = MockWebGW(delay=args.delay, jitter=args.jitter)
+    server = ThreadingHTTPServer(
+        (args.host, args.port), make_handler(backend, not args.no_multipart)
+    )
+    logger.info(f"Mock WebGW listening on http://{args.host}:{args.port}/ (delay={args.delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for (api_project, call_name, kind), count in sorted(backend.calls.items()):
+            logger.info(f"{api_project}/{call_name} [{kind}]: {count} calls")
+        for codec, count in sorted(backend.audio_fields.items()):
+            chars = backend.audio_chars[codec]
+            logger.info(f"{codec} audio: {count} fields, {chars / count / 1024:.1f} KB base64 each")
+        for transport, count in sorted(backend.transports.items()):
+            logger.info(f"{transport} requests: {count}")
+        saved = sum(backend.cancelled.values())
+        logger.info(f"cancelled tasks: {len(backend.cancelled)} ({saved:.1f}s of work left)")
@@ -0,0 +1,308 @@
+import base64
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+# Results that are not tied to one browser session (SpeechService tasks, which
+# identical requests from several users share) live in this namespace.
+SHARED_NAMESPACE = "shared"
+
+_NAMESPACE_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def session_namespace(request) -> str:
+    """Namespace for a Gradio request: its session, or the shared one for API calls."""
+    session_hash = getattr(request, "session_hash", None)
+    if session_hash and _NAMESPACE_PATTERN.fullmatch(session_hash):
+        return session_hash
+    return SHARED_NAMESPACE
+
+
+class OutputStore:
+    """
+    Directory of generated audio handed to Gradio as file paths.
+
+    The bytes returned by the backend are written out as they are, so a result
+    costs one base64 decode instead of decode, WAV parse and re-encode. Files
+    live in `<directory>/<namespace>/<content hash><suffix>`, one namespace per
+    browser session, so cleaning up after one user never touches another
+    user's files. A result several sessions use (e.g. from the result cache)
+    is kept in the shared namespace and linked into each of them (see `link()`).
+
+    An in-memory index keeps every file in least-recently-used order, globally
+    and per namespace, which makes lookups, inserts and evictions O(1). A
+    session past `session_max_bytes` loses its own oldest files; past
+    `max_bytes` the oldest files overall go. Files younger than `min_age` are
+    never evicted, so a result is not removed before Gradio has picked it up. A
+    janitor thread removes files unused for `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        session_max_bytes: int,
+        ttl: float,
+        min_age: float = 60.0,
+        janitor_interval: float = 60.0,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.session_max_bytes = session_max_bytes
+        self.ttl = ttl
+        self.min_age = min_age
+        self._lock = threading.Lock()
+        # path -> (namespace, size, last used), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._namespaces: Dict[str, "OrderedDict[str, None]"] = {}
+        self._namespace_bytes: Dict[str, int] = {}
+        self._emptied_namespaces = set()
+        self._total_bytes = 0
+        self._load_index()
+
+        self._stopped = threading.Event()
+        self._janitor = threading.Thread(
+            target=self._run_janitor, args=(janitor_interval,), name="output-janitor", daemon=True
+        )
+        self._janitor.start()
+
+    def _load_index(self):
+        entries = []
+        os.makedirs(self.directory, exist_ok=True)
+        for namespace in os.listdir(self.directory):
+            namespace_dir = os.path.join(self.directory, namespace)
+            if not os.path.isdir(namespace_dir):
+                if namespace.endswith(".tmp"):
+                    os.remove(namespace_dir)  # temporary file left behind (see _tmp_path)
+                continue
+            for name in os.listdir(namespace_dir):
+                path = os.path.join(namespace_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, path, namespace, stat.st_size))
+        with self._lock:
+            for used_at, path, namespace, size in sorted(entries):
+                self._add(path, namespace, size, used_at)
+        logger.info(
+            f"Output store loaded: {len(self._entries)} files, "
+            f"{self._total_bytes / 1024 / 1024:.1f} MB in {self.directory}"
+        )
+
+    def _path(self, namespace: str, name: str) -> str:
+        return os.path.join(self.directory, namespace, name)
+
+    def _add(self, path: str, namespace: str, size: int, used_at: float):
+        self._entries[path] = (namespace, size, used_at)
+        self._namespaces.setdefault(namespace, OrderedDict())[path] = None
+        self._namespace_bytes[namespace] = self._namespace_bytes.get(namespace, 0) + size
+        self._emptied_namespaces.discard(namespace)
+        self._total_bytes += size
+
+    def _remove(self, path: str):
+        namespace, size, _ = self._entries.pop(path)
+        files = self._namespaces[namespace]
+        del files[path]
+        self._namespace_bytes[namespace] -= size
+        self._total_bytes -= size
+        if not files:
+            del self._namespaces[namespace]
+            del self._namespace_bytes[namespace]
+            self._emptied_namespaces.add(namespace)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _use(self, path: str):
+        namespace, size, _ = self._entries[path]
+        self._entries[path] = (namespace, size, time.time())
+        self._entries.move_to_end(path)
+        self._namespaces[namespace].move_to_end(path)
+
+    def _evict(self, namespace: str, now: float):
+        files = self._namespaces.get(namespace)
+        if namespace != SHARED_NAMESPACE:
+            while files and self._namespace_bytes[namespace] > self.session_max_bytes:
+                oldest = next(iter(files))
+                if now - self._entries[oldest][2] < self.min_age:
+                    break
+                self._remove(oldest)
+        while self._entries and self._total_bytes > self.max_bytes:
+            oldest, (_, _, used_at) = next(iter(self._entries.items()))
+            if now - used_at < self.min_age:
+                break
+            self._remove(oldest)
+
+    def _tmp_path(self) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{threading.get_ident()}.{time.monotonic_ns()}.tmp")
+
+    def _put(self, tmp_path: str, namespace: str, name: str) -> str:
+        """Moves a finished temporary file into `namespace` and indexes it."""
+        path = self._path(namespace, name)
+        size = os.path.getsize(tmp_path)
+        with self._lock:
+            if path in self._entries:
+                os.remove(tmp_path)
+                self._use(path)
+                return path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            now = time.time()
+            self._add(path, namespace, size, now)
+            self._evict(namespace, now)
+        return path
+
+    def save(self, content: bytes, suffix: str = ".wav", namespace: str = SHARED_NAMESPACE) -> str:
+        """Writes `content` to `namespace` (once per distinct content) and returns its path."""
+        path = self._path(namespace, f"{hashlib.sha1(content).hexdigest()[:20]}{suffix}")
+        if self.touch(path):
+            return path
+
+        tmp_path = self._tmp_path()
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        return self._put(tmp_path, namespace, os.path.basename(path))
+
+    def save_audio(self, audio_b64: str, namespace: str = SHARED_NAMESPACE) -> str:
+        """Decodes a base64 WAV returned by the backend and saves it; raises if it is not a WAV."""
+        content = base64.b64decode(audio_b64)
+        if content[:4] != b"RIFF" or content[8:12] != b"WAVE":
+            raise ValueError("output audio is not a WAV file")
+        return self.save(content, ".wav", namespace)
+
+    def save_stream(
+        self, chunks: Iterable[bytes], suffix: str = ".wav", namespace: str = SHARED_NAMESPACE
+    ) -> str:
+        """
+        Like `save()` for content produced piece by piece: the chunks are hashed
+        while they are written, so the content is never held in memory whole.
+        """
+        tmp_path = self._tmp_path()
+        digest = hashlib.sha1()
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return self._put(tmp_path, namespace, f"{digest.hexdigest()[:20]}{suffix}")
+
+    def save_file(
+        self, name: str, write: Callable[[str], Any], namespace: str = SHARED_NAMESPACE
+    ) -> str:
+        """
+        Stores the file `write(tmp_path)` creates as `name`, unless the store
+        has it already, and returns its path. For derived files named after
+        their source rather than their content (e.g. converted uploads).
+        """
+        path = self._path(namespace, name)
+        if self.touch(path):
+            return path
+
+        tmp_path = self._tmp_path()
+        try:
+            write(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self._put(tmp_path, namespace, name)
+
+    def link(self, path: str, namespace: str = SHARED_NAMESPACE) -> str:
+        """
+        Returns the stored file `path` as a file of `namespace`: a hard link
+        (a copy where the file system has none), so each namespace's cleanup
+        only removes its own name. Sizes count once per namespace.
+        """
+        name = os.path.basename(path)
+        if self.touch(self._path(namespace, name)):
+            return self._path(namespace, name)
+
+        tmp_path = self._tmp_path()
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+        return self._put(tmp_path, namespace, name)
+
+    def owns(self, path) -> bool:
+        """True if `path` names a file of this store (whether or not it still exists)."""
+        if not isinstance(path, str):
+            return False
+        root = os.path.abspath(self.directory)
+        return os.path.commonpath([root, os.path.abspath(path)]) == root
+
+    def touch(self, path: str) -> bool:
+        """Marks a stored file as just used; False if it is no longer in the store."""
+        with self._lock:
+            if path not in self._entries:
+                return False
+            self._use(path)
+            return True
+
+    def sweep(self):
+        """Removes files unused for `ttl` seconds and the directories of emptied namespaces."""
+        now = time.time()
+        with self._lock:
+            while self._entries and self.ttl > 0:
+                oldest, (_, _, used_at) = next(iter(self._entries.items()))
+                if now - used_at <= self.ttl:
+                    break
+                self._remove(oldest)
+            self._evict(SHARED_NAMESPACE, now)
+            for namespace in self._emptied_namespaces:
+                try:
+                    os.rmdir(os.path.join(self.directory, namespace))
+                except OSError:
+                    pass
+            self._emptied_namespaces.clear()
+
+    def _run_janitor(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning(f"Output store cleanup failed: {e}")
+
+    def close(self):
+        self._stopped.set()
+
+
+_output_store: Optional[OutputStore] = None
+_output_store_lock = threading.Lock()
+
+
+def get_output_store() -> OutputStore:
+    """
+    Returns the output store shared by the process, configured from:
+      OUTPUT_DIR             directory of generated audio (default ./cache/outputs)
+      OUTPUT_MAX_MB          total size limit in MB (default 1024)
+      OUTPUT_SESSION_MAX_MB  size limit per browser session in MB (default 100)
+      OUTPUT_TTL             seconds an unused file is kept, 0 means forever (default 1 day)
+    """
+    global _output_store
+    with _output_store_lock:
+        if _output_store is None:
+            try:
+                max_mb = float(os.environ.get("OUTPUT_MAX_MB", 1024))
+                session_max_mb = float(os.environ.get("OUTPUT_SESSION_MAX_MB", 100))
+                ttl = float(os.environ.get("OUTPUT_TTL", 24 * 3600))
+            except ValueError:
+                logger.warning("Invalid OUTPUT_* setting, using defaults")
+                max_mb, session_max_mb, ttl = 1024, 100, 24 * 3600
+            _output_store = OutputStore(
+                os.environ.get("OUTPUT_DIR", os.path.join("cache", "outputs")),
+                max_bytes=int(max_mb * 1024 * 1024),
+                session_max_bytes=int(session_max_mb * 1024 * 1024),
+                ttl=ttl,
+            )
+        return _output_store
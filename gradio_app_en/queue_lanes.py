@@ -0,0 +1,237 @@
+import asyncio
+import os
+import random
+import threading
+from typing import Dict, NamedTuple, Optional
+
+import gradio
+from gradio import route_utils
+from gradio.queueing import Queue
+from loguru import logger
+
+
+class Lane(NamedTuple):
+    name: str
+    concurrency_limit: int
+    max_size: Optional[int]  # most requests waiting in the lane, None for no limit
+    priority: int  # lanes with a higher priority get free workers first
+
+
+# Quick, interactive work gets more workers and a higher priority than long
+# generations. The concurrency limits add up to less than Gradio's 40 workers,
+# so a burst in one lane cannot take the workers of another.
+DEFAULT_LANES = (
+    Lane("asr", 8, 64, 3),
+    Lane("edit", 4, 32, 2),
+    Lane("tts", 6, 32, 2),
+    Lane("instruct", 6, 32, 1),
+    Lane("tta", 4, 32, 1),
+    Lane("podcast", 3, 16, 0),
+    Lane("bgm", 3, 16, 0),
+    Lane("speech_with_bgm", 3, 16, 0),
+)
+
+
+def parse_lanes(spec: str, defaults=DEFAULT_LANES) -> Dict[str, Lane]:
+    """
+    The `defaults` lanes with the overrides in `spec` applied, e.g.
+    "bgm=2:8:0,asr=16": concurrency limit, queue size and priority per lane;
+    omitted fields keep their default and a queue size of 0 means no limit.
+    """
+    lanes = {lane.name: lane for lane in defaults}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, values = item.partition("=")
+        name = name.strip().lower()
+        if name not in lanes:
+            logger.warning(f"Unknown queue lane '{name}' ignored")
+            continue
+        try:
+            fields = [int(value) if value.strip() else None for value in values.split(":")]
+        except ValueError:
+            logger.warning(f"Invalid settings for queue lane '{name}' ignored: {values}")
+            continue
+        lane = lanes[name]
+        limit, max_size, priority = (fields + [None] * 3)[:3]
+        lanes[name] = lane._replace(
+            concurrency_limit=lane.concurrency_limit if limit is None else max(limit, 1),
+            max_size=lane.max_size if max_size is None else max_size or None,
+            priority=lane.priority if priority is None else priority,
+        )
+    return lanes
+
+
+# LaneQueue overrides private methods of Gradio's Queue; it is only swapped in
+# on the Gradio versions it has been checked against.
+VERIFIED_GRADIO_VERSIONS = ("4.44.1",)
+
+
+class QueueLanes:
+    """
+    Separate lanes of the Gradio queue for each kind of work (ASR, edit, TTS,
+    music, ...), each with its own concurrency limit, queue size and priority.
+
+    Event listeners join a lane with `**lanes.listener(name)`, which makes the
+    lane their concurrency group in Gradio. `install()` then swaps in a queue
+    that turns requests away once their lane is full and hands free workers to
+    the waiting lane with the highest priority (Gradio itself picks one at
+    random). Events outside any lane, like the quick status checks, go first.
+    On other Gradio versions than `VERIFIED_GRADIO_VERSIONS` the queue is left
+    alone and only the per-lane concurrency limits apply.
+
+    Queued and running requests per lane are served as JSON at /queue/lanes
+    and logged every `report_interval` seconds while a lane is busy.
+    """
+
+    def __init__(self, lanes: Dict[str, Lane], report_interval: float = 60.0):
+        self.lanes = lanes
+        self.report_interval = report_interval
+
+    def listener(self, name: str) -> dict:
+        """Event listener arguments (`concurrency_id`, `concurrency_limit`) of lane `name`."""
+        lane = self.lanes[name]
+        return {"concurrency_id": lane.name, "concurrency_limit": lane.concurrency_limit}
+
+    def install(self, demo):
+        """Makes the queue of `demo` (set up by `demo.queue()`) honour the lanes."""
+        if gradio.__version__ in VERIFIED_GRADIO_VERSIONS:
+            queue = demo._queue
+            queue.__class__ = LaneQueue
+            queue.lanes = self
+            queue._report_task = None
+        else:
+            logger.warning(
+                f"Queue lanes are not verified with Gradio {gradio.__version__} (only "
+                f"{', '.join(VERIFIED_GRADIO_VERSIONS)}): lane queue sizes, priorities and "
+                "/queue/lanes are off, lanes only limit concurrency"
+            )
+        total = sum(lane.concurrency_limit for lane in self.lanes.values())
+        if total > demo.max_threads:
+            logger.warning(
+                f"Queue lane concurrency limits add up to {total}, more than the "
+                f"{demo.max_threads} Gradio workers: busy lanes can hold up the others"
+            )
+        logger.info(
+            "Queue lanes: "
+            + ", ".join(
+                f"{lane.name} (limit {lane.concurrency_limit}, size {lane.max_size or '-'}, "
+                f"priority {lane.priority})"
+                for lane in self.lanes.values()
+            )
+        )
+
+    def priority(self, concurrency_id: str) -> int:
+        lane = self.lanes.get(concurrency_id)
+        if lane is None:
+            return max((other.priority for other in self.lanes.values()), default=0) + 1
+        return lane.priority
+
+
+class LaneQueue(Queue):
+    """Gradio queue with per-lane queue sizes and priorities (see `QueueLanes.install()`)."""
+
+    lanes: QueueLanes
+
+    async def push(self, body, request, username):
+        if body.fn_index is not None:
+            fn = route_utils.get_fn(self.blocks, None, body)
+            lane = self.lanes.lanes.get(fn.concurrency_id)
+            event_queue = self.event_queue_per_concurrency_id.get(fn.concurrency_id)
+            if lane and lane.max_size and event_queue and len(event_queue.queue) >= lane.max_size:
+                logger.warning(f"Queue lane {lane.name} is full, request turned away")
+                return False, (
+                    f"The {lane.name} queue is full ({lane.max_size} requests waiting), "
+                    "please try again later."
+                )
+        return await super().push(body, request, username)
+
+    def get_events(self):
+        # Same as Queue.get_events(), but lanes are tried in order of priority
+        # (at random among lanes of the same priority).
+        concurrency_ids = list(self.event_queue_per_concurrency_id.keys())
+        random.shuffle(concurrency_ids)
+        concurrency_ids.sort(key=self.lanes.priority, reverse=True)
+        for concurrency_id in concurrency_ids:
+            event_queue = self.event_queue_per_concurrency_id[concurrency_id]
+            if len(event_queue.queue) and (
+                event_queue.concurrency_limit is None
+                or event_queue.current_concurrency < event_queue.concurrency_limit
+            ):
+                first_event = event_queue.queue[0]
+                block_fn = first_event.fn
+                events = [first_event]
+                batch = block_fn.batch
+                if batch:
+                    events += [
+                        event for event in event_queue.queue[1:] if event.fn == first_event.fn
+                    ][: block_fn.max_batch_size - 1]
+
+                for event in events:
+                    event_queue.queue.remove(event)
+
+                return events, batch, concurrency_id
+
+    def lane_status(self) -> Dict[str, dict]:
+        """Queued and running requests, and the settings, of each lane."""
+        status = {}
+        for lane in self.lanes.lanes.values():
+            event_queue = self.event_queue_per_concurrency_id.get(lane.name)
+            status[lane.name] = {
+                "queued": len(event_queue.queue) if event_queue else 0,
+                "running": event_queue.current_concurrency if event_queue else 0,
+                "concurrency_limit": lane.concurrency_limit,
+                "max_size": lane.max_size,
+                "priority": lane.priority,
+            }
+        return status
+
+    def set_server_app(self, app):
+        super().set_server_app(app)
+        if not any(getattr(route, "path", None) == "/queue/lanes" for route in app.routes):
+            app.add_api_route("/queue/lanes", self.lane_status, methods=["GET"])
+
+    def start(self):
+        super().start()
+        if self.lanes.report_interval > 0 and self._report_task is None:
+            self._report_task = asyncio.get_running_loop().create_task(self._report())
+
+    async def _report(self):
+        while not self.stopped:
+            await asyncio.sleep(self.lanes.report_interval)
+            busy = [
+                f"{name} {lane['running']}/{lane['concurrency_limit']} running, "
+                f"{lane['queued']} queued"
+                for name, lane in self.lane_status().items()
+                if lane["running"] or lane["queued"]
+            ]
+            if busy:
+                logger.info(f"Queue lanes: {'; '.join(busy)}")
+
+
+_queue_lanes: Optional[QueueLanes] = None
+_queue_lanes_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}, falling back to {default}")
+        return default
+
+
+def get_queue_lanes() -> QueueLanes:
+    """
+    Returns the queue lanes shared by every tab in the process, configured from:
+      QUEUE_LANES                  overrides of the default lanes, e.g. "bgm=2:8:0,asr=16"
+                                   (concurrency limit:queue size:priority, see parse_lanes())
+      QUEUE_LANE_REPORT_INTERVAL   seconds between queue depth logs of busy lanes, 0 for none
+                                   (default 60)
+    """
+    global _queue_lanes
+    with _queue_lanes_lock:
+        if _queue_lanes is None:
+            _queue_lanes = QueueLanes(
+                parse_lanes(os.environ.get("QUEUE_LANES", "")),
+                report_interval=_env_float("QUEUE_LANE_REPORT_INTERVAL", 60.0),
+            )
+        return _queue_lanes
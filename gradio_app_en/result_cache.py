@@ -0,0 +1,393 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from audio_transport import compress
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def make_cache_key(namespace: str, payload: dict, audio_paths: Sequence[str] = ()) -> str:
+    """
+    Content hash of a request: the payload (keys sorted, None values dropped,
+    strings stripped) plus the bytes of any audio files it refers to.
+    """
+    digest = hashlib.sha256(namespace.encode("utf-8"))
+    normalized = json.dumps(_normalize(payload), sort_keys=True, ensure_ascii=False)
+    digest.update(normalized.encode("utf-8"))
+    for path in audio_paths:
+        digest.update(b"\0")
+        if path:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Disk-backed LRU cache of finished task results, evicted by total size and TTL.
+
+    Values are pickled to `<directory>/<key[:2]>/<key>.pkl`. The index lives in
+    memory and is rebuilt from the directory on startup; the access time of each
+    file records its recency so LRU order survives restarts. A `max_bytes` of 0
+    disables the cache.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (path, size, created_at), least recently used first
+        self._index: "OrderedDict[str, tuple]" = OrderedDict()
+        self._total_bytes = 0
+        self._last_sweep = 0.0
+        if self.enabled:
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
+
+    def _load_index(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, name[: -len(".pkl")], path, stat))
+        for _, key, path, stat in sorted(entries):
+            self._index[key] = (path, stat.st_size, stat.st_mtime)
+            self._total_bytes += stat.st_size
+        with self._lock:
+            self._evict()
+        logger.info(
+            f"Result cache loaded: {len(self._index)} entries, "
+            f"{self._total_bytes / 1024 / 1024:.1f} MB in {self.directory}"
+        )
+
+    def _remove(self, key: str):
+        path, size, _ = self._index.pop(key)
+        self._total_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        now = time.time()
+        if self.ttl > 0 and now - self._last_sweep > 60:
+            self._last_sweep = now
+            expired = [k for k, (_, _, created) in self._index.items() if now - created > self.ttl]
+            for key in expired:
+                self._remove(key)
+        while self._total_bytes > self.max_bytes and self._index:
+            self._remove(next(iter(self._index)))
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and self.ttl > 0 and time.time() - entry[2] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            path, _, created = entry
+
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path, (time.time(), created))
+        except Exception as e:
+            logger.warning(f"Dropping unreadable result cache entry {key}: {e}")
+            with self._lock:
+                if key in self._index:
+                    self._remove(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            logger.warning(f"Failed to write result cache entry {key}: {e}")
+            return
+
+        with self._lock:
+            if key in self._index:
+                _, old_size, _ = self._index.pop(key)
+                self._total_bytes -= old_size
+            self._index[key] = (path, size, time.time())
+            self._total_bytes += size
+            self._evict()
+
+
+class TranscriptCache:
+    """
+    Persistent map from audio content hash to its ASR transcript.
+
+    Transcripts are tiny, so the whole map is kept in memory and the JSON file is
+    rewritten on every change; past `max_entries` the least recently used are dropped.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries.update(json.load(f))
+            logger.info(f"Transcript cache loaded: {len(self._entries)} entries from {path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable transcript cache {path}: {e}")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str):
+        with self._lock:
+            if self._entries.get(key) == text:
+                return
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            snapshot = json.dumps(self._entries, ensure_ascii=False, indent=0)
+
+            tmp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Failed to save transcript cache {self.path}: {e}")
+
+
+class EncodedAudioCache:
+    """
+    In-memory LRU cache of base64-encoded audio files.
+
+    Entries are keyed by (absolute path, size, mtime, codec), so a file that is
+    replaced or edited in place is read again. The cache is bounded by the total
+    length of the encoded strings; a `max_bytes` of 0 disables it.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (base64 text, codec used)
+        self._entries: "OrderedDict[tuple, Tuple[str, str]]" = OrderedDict()
+        self._total_bytes = 0
+
+    def encode(self, path: str, codec: str = "wav") -> Tuple[str, str]:
+        """
+        Returns the base64 (utf-8 str) of the file at `path` encoded with `codec`
+        (see audio_transport.compress), and the codec actually used.
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, codec)
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return encoded
+            self.misses += 1
+
+        content, used_codec = compress(path, codec)
+        encoded = (base64.b64encode(content).decode("utf-8"), used_codec)
+        if len(encoded[0]) > self.max_bytes:
+            return encoded
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = encoded
+                self._total_bytes += len(encoded[0])
+                while self._total_bytes > self.max_bytes:
+                    _, (evicted, _) = self._entries.popitem(last=False)
+                    self._total_bytes -= len(evicted)
+        return encoded
+
+
+class SingleFlight:
+    """
+    Coalesces identical submissions that are still in flight.
+
+    The first caller for a key runs `submit`; callers arriving while it runs, or
+    while the task it started is still in progress, get the same value. A flight
+    lasts until `release(key)` (called when the task finishes) or `max_age`
+    seconds; exceptions and values rejected by `keep` end it immediately.
+    """
+
+    def __init__(self, max_age: float = 600.0):
+        self.max_age = max_age
+        self.coalesced = 0
+        self._flights: Dict[str, Tuple[asyncio.Future, float]] = {}
+
+    async def run(
+        self,
+        key: str,
+        submit: Callable[[], Awaitable[Any]],
+        keep: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        if (
+            flight is not None
+            and flight[0].get_loop() is loop
+            and loop.time() - flight[1] < self.max_age
+        ):
+            self.coalesced += 1
+            logger.info(f"Joined in-flight request {key}")
+            return await asyncio.shield(flight[0])
+
+        future = loop.create_future()
+        self._flights[key] = (future, loop.time())
+        try:
+            value = await submit()
+        except BaseException as e:
+            self._drop(key, future)
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                future.exception()  # waiters re-raise it; don't warn if there are none
+            else:
+                future.cancel()
+            raise
+        future.set_result(value)
+        if keep is not None and not keep(value):
+            self._drop(key, future)
+        return value
+
+    def adopt(self, key: str, value: Any):
+        """
+        Starts a flight for a task submitted earlier (e.g. one resumed after a
+        restart), so identical requests join it instead of submitting again.
+        Must be called from the event loop the flight's callers run on.
+        """
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._flights[key] = (future, future.get_loop().time())
+
+    def _drop(self, key: str, future: asyncio.Future):
+        flight = self._flights.get(key)
+        if flight is not None and flight[0] is future:
+            del self._flights[key]
+
+    def release(self, key: Optional[str]):
+        if key is not None:
+            self._flights.pop(key, None)
+
+
+_result_cache = None
+_transcript_cache = None
+_encoded_audio_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Returns the result cache shared by every tab in the process, configured from:
+      RESULT_CACHE_DIR     cache directory (default ./cache/results)
+      RESULT_CACHE_MAX_MB  total size limit in MB, 0 disables the cache (default 512)
+      RESULT_CACHE_TTL     seconds an entry stays valid, 0 means forever (default 7 days)
+    """
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            try:
+                max_mb = float(os.environ.get("RESULT_CACHE_MAX_MB", 512))
+                ttl = float(os.environ.get("RESULT_CACHE_TTL", 7 * 24 * 3600))
+            except ValueError:
+                logger.warning("Invalid RESULT_CACHE_* setting, using defaults")
+                max_mb, ttl = 512, 7 * 24 * 3600
+            _result_cache = ResultCache(
+                os.environ.get("RESULT_CACHE_DIR", os.path.join("cache", "results")),
+                max_bytes=int(max_mb * 1024 * 1024),
+                ttl=ttl,
+            )
+        return _result_cache
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """
+    Returns the transcript cache shared by the process, stored at
+    TRANSCRIPT_CACHE_PATH (default ./cache/transcripts.json).
+    """
+    global _transcript_cache
+    with _result_cache_lock:
+        if _transcript_cache is None:
+            _transcript_cache = TranscriptCache(
+                os.environ.get("TRANSCRIPT_CACHE_PATH", os.path.join("cache", "transcripts.json"))
+            )
+        return _transcript_cache
+
+
+def get_encoded_audio_cache() -> EncodedAudioCache:
+    """
+    Returns the encoded-audio cache shared by the process, holding at most
+    AUDIO_B64_CACHE_MB megabytes of base64 text (default 64, 0 disables it).
+    """
+    global _encoded_audio_cache
+    with _result_cache_lock:
+        if _encoded_audio_cache is None:
+            try:
+                max_mb = float(os.environ.get("AUDIO_B64_CACHE_MB", 64))
+            except ValueError:
+                logger.warning("Invalid AUDIO_B64_CACHE_MB, using default")
+                max_mb = 64
+            _encoded_audio_cache = EncodedAudioCache(int(max_mb * 1024 * 1024))
+        return _encoded_audio_cache
@@ -2,6 +2,7 @@ import gradio as gr
 import json
 import os
 from loguru import logger
+from task_manager import DONE, PENDING, task_state
 
 class AudioInstructTab:
     def __init__(self, speech_service):
@@ -156,7 +157,8 @@ class AudioInstructTab:
                 fn=self.check_task_status,
                 inputs=[task_id_state, polling_counter],
                 outputs=[audio_output, polling_counter, status_msg],
-                every=2
+                every=2,
+                concurrency_limit=None
             )
 
             logger.info("Structured mode events bound.")
@@ -176,7 +178,8 @@ class AudioInstructTab:
                 fn=self.check_task_status,
                 inputs=[expert_task_id_state, expert_polling_counter],
                 outputs=[expert_audio_output, expert_polling_counter, expert_status_msg],
-                every=2
+                every=2,
+                concurrency_limit=None
             )
 
             logger.info("Expert mode events bound.")
@@ -191,7 +194,8 @@ class AudioInstructTab:
                 fn=self.check_task_status,
                 inputs=[free_task_id_state, free_polling_counter],
                 outputs=[free_audio_output, free_polling_counter, free_status_msg],
-                every=2
+                every=2,
+                concurrency_limit=None
             )
 
     def update_ui_visibility(self, instruct_type):
@@ -253,21 +257,21 @@ class AudioInstructTab:
 
         return {"audio_sequence": [base_caption]}
 
-    def _submit_task(self, payload):
+    async def _submit_task(self, payload):
         """Internal task submission method"""
         logger.info(f"AudioInstructTab submitting task with payload: {payload}")
 
         # 调用 SpeechService 的新接口
         # payload 已经包含了 text, prompt_audio, caption, seed
-        return self.service.submit_instruct_task(payload)
+        return await self.service.submit_instruct_task(payload)
 
-    def _check_task(self, task_id):
+    async def _check_task(self, task_id):
         """Internal task status check method"""
         logger.info(f"AudioInstructTab checking task status for task_id: {task_id}")
 
-        return self.service.poll_instruct_task(task_id)
+        return await self.service.poll_instruct_task(task_id)
 
-    def submit_structured_task(self, instruct_type, text, prompt_audio,
+    async def submit_structured_task(self, instruct_type, text, prompt_audio,
                              speaker_id, pitch, volume, speed, dialect, emotion,
                              ip_character, style, album, seed):
         """Submit structured task"""
@@ -290,25 +294,25 @@ class AudioInstructTab:
         }
 
         # 调用内部提交方法
-        task_id = self._submit_task(payload)
+        task_id = await self._submit_task(payload)
 
         if task_id.startswith("错误") or task_id.startswith("Error"):
             return None, 0, task_id, None
 
         return task_id, 1, f"Task submitted (ID: ...{task_id[-6:]})", None
 
-    def submit_expert_task(self, text, prompt_audio,
+    async def submit_expert_task(self, text, prompt_audio,
                          speaker_id, pitch, volume, speed, dialect, emotion,
                          ip_character, style, album, seed):
         """Submit expert mode task"""
 
         logger.info(f"Submitting expert task with text: {text}")
 
-        return self.submit_structured_task("expert", text, prompt_audio,
+        return await self.submit_structured_task("expert", text, prompt_audio,
                                          speaker_id, pitch, volume, speed, dialect, emotion,
                                          ip_character, style, album, seed)
 
-    def submit_json_task(self, json_str, prompt_audio, seed):
+    async def submit_json_task(self, json_str, prompt_audio, seed):
         """Submit JSON mode task"""
 
         logger.info(f"Submitting JSON task with input: {json_str}")
@@ -352,14 +356,14 @@ class AudioInstructTab:
             "seed": seed,
         }
 
-        task_id = self._submit_task(payload)
+        task_id = await self._submit_task(payload)
 
         if task_id.startswith("错误") or task_id.startswith("Error"):
             return None, 0, task_id, None
 
         return task_id, 1, f"Task submitted (ID: ...{task_id[-6:]})", None
 
-    def check_task_status(self, task_id, polling_counter):
+    async def check_task_status(self, task_id, polling_counter):
         """Check task status"""
 
         # 如果没有任务ID或者轮询计数器归零（任务已结束），则停止轮询逻辑
@@ -369,12 +373,12 @@ class AudioInstructTab:
         logger.info(f"Checking task status for task_id: {task_id}, polling_counter: {polling_counter}")
 
         # 调用内部检查方法
-        status, result = self._check_task(task_id)
+        status, result = await self._check_task(task_id)
 
-        if status == "pending":
+        if task_state(status) == PENDING:
             elapsed = polling_counter * 2
             return gr.update(), polling_counter + 1, f"Synthesizing... ({elapsed}s)"
-        elif status == "done" or status == "completed":
+        elif task_state(status) == DONE:
             return gr.update(value=result), 0, "Success!"
         else:
             return gr.update(), 0, f"Failed: {status}"
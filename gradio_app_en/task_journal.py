@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, NamedTuple, Optional
+
+from loguru import logger
+
+
+class JournalEntry(NamedTuple):
+    owner: str
+    kind: str
+    task_id: str
+    cache_key: Optional[str]
+    namespace: Optional[str]
+    submitted_at: float
+
+
+class TaskJournal:
+    """
+    SQLite journal of the tasks submitted to the backend: who submitted them
+    (`owner`, e.g. an API project), their kind, result cache key and output
+    namespace, their status and where their result went.
+
+    Backend tasks keep running when this process restarts. `pending()` lists
+    the tasks that had not finished, so polling them can resume instead of the
+    work being submitted again. Pending tasks older than `max_age` are given up
+    on and marked "expired"; finished entries are deleted after `retention`
+    seconds.
+    """
+
+    def __init__(self, path: str, max_age: float = 24 * 3600, retention: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                owner TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                cache_key TEXT,
+                namespace TEXT,
+                status TEXT NOT NULL,
+                result TEXT,
+                submitted_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (owner, task_id)
+            )
+            """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (owner, status)")
+        removed = self._db.execute(
+            "DELETE FROM tasks WHERE status != 'pending' AND updated_at < ?",
+            (time.time() - retention,),
+        ).rowcount
+        logger.info(f"Task journal opened: {path} ({removed} old entries removed)")
+
+    def record(
+        self,
+        owner: str,
+        kind: str,
+        task_id: str,
+        cache_key: Optional[str] = None,
+        namespace: Optional[str] = None,
+    ):
+        """Records a task just submitted to the backend as pending."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, 'pending', NULL, ?, ?)",
+                (owner, kind, task_id, cache_key, namespace, now, now),
+            )
+
+    def finish(self, owner: str, task_id: str, status: str, result: Any = None):
+        """
+        Marks a task "done" or "failed". `result` (anything JSON can encode)
+        says where its result went, or why it failed.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE tasks SET status = ?, result = ?, updated_at = ? "
+                "WHERE owner = ? AND task_id = ?",
+                (status, json.dumps(result, ensure_ascii=False), time.time(), owner, task_id),
+            )
+
+    def pending(self, owner: str) -> List[JournalEntry]:
+        """Unfinished tasks of `owner`, oldest first; those past `max_age` are expired instead."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE tasks SET status = 'expired', updated_at = ? "
+                "WHERE owner = ? AND status = 'pending' AND submitted_at < ?",
+                (now, owner, now - self.max_age),
+            )
+            rows = self._db.execute(
+                "SELECT owner, kind, task_id, cache_key, namespace, submitted_at FROM tasks "
+                "WHERE owner = ? AND status = 'pending' ORDER BY submitted_at",
+                (owner,),
+            ).fetchall()
+        return [JournalEntry(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_task_journal: Optional[TaskJournal] = None
+_task_journal_lock = threading.Lock()
+
+
+def get_task_journal() -> TaskJournal:
+    """
+    Returns the task journal shared by the process, configured from:
+      TASK_JOURNAL_PATH     SQLite file of the journal (default ./cache/tasks.db);
+                            empty keeps it in memory, so nothing survives a restart
+      TASK_JOURNAL_MAX_AGE  seconds after which an unfinished task is not resumed
+                            (default 1 day)
+    """
+    global _task_journal
+    with _task_journal_lock:
+        if _task_journal is None:
+            try:
+                max_age = float(os.environ.get("TASK_JOURNAL_MAX_AGE", 24 * 3600))
+            except ValueError:
+                logger.warning("Invalid value for TASK_JOURNAL_MAX_AGE, falling back to 1 day")
+                max_age = 24 * 3600
+            path = os.environ.get("TASK_JOURNAL_PATH", os.path.join("cache", "tasks.db"))
+            _task_journal = TaskJournal(path or ":memory:", max_age=max_age)
+        return _task_journal
@@ -0,0 +1,490 @@
+import asyncio
+import base64
+import json
+import os
+import re
+import socket
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpcore
+import httpx
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+WEBGW_HEADERS_VERSION = "2.0"
+
+# Responses meaning the gateway does not accept multipart uploads for a project.
+MULTIPART_UNSUPPORTED_STATUS = (404, 405, 415, 501)
+
+# Responses to a single multipart request that may just be a bad request: it is
+# retried as JSON, but the project keeps using multipart.
+MULTIPART_RETRY_STATUS = (400,)
+
+# Strings longer than this are streamed in slices of this size.
+JSON_CHUNK_SIZE = 64 * 1024
+
+_BASE64_UNSAFE = re.compile(r"[^A-Za-z0-9+/=]")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, falling back to {default}")
+        return default
+
+
+class DNSCache:
+    """
+    Process-wide TTL cache for host name resolution.
+    Only consulted when the pool has to open a new connection, so a warm
+    keep-alive pool never touches it; it saves the lookup on reconnects.
+    """
+
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, host: str, port: int) -> Optional[str]:
+        """Returns the cached address without resolving, or None on a miss."""
+        if self.ttl <= 0:
+            return host
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+        return None
+
+    def resolve(self, host: str, port: int) -> str:
+        cached = self.lookup(host, port)
+        if cached is not None:
+            return cached
+        now = time.monotonic()
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Let urllib3 perform (and report) the lookup itself.
+            return host
+        address = infos[0][4][0]
+        with self._lock:
+            self._entries[(host, port)] = (address, now + self.ttl)
+        return address
+
+    def forget(self, host: str, port: int):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+_dns_cache = DNSCache()
+
+
+class _CachedDNSMixin:
+    def _new_conn(self):
+        # Connect to the cached address but keep `host` untouched afterwards,
+        # so TLS SNI and certificate checks still use the real host name.
+        dns_host = self._dns_host
+        self._dns_host = _dns_cache.resolve(dns_host, self.port)
+        try:
+            return super()._new_conn()
+        except Exception:
+            _dns_cache.forget(dns_host, self.port)
+            raise
+        finally:
+            self._dns_host = dns_host
+
+
+class _CachedDNSHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = type(
+        "CachedDNSHTTPConnection", (_CachedDNSMixin, HTTPConnectionPool.ConnectionCls), {}
+    )
+
+
+class _CachedDNSHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = type(
+        "CachedDNSHTTPSConnection", (_CachedDNSMixin, HTTPSConnectionPool.ConnectionCls), {}
+    )
+
+
+class WebGWAdapter(HTTPAdapter):
+    """HTTPAdapter with TCP keep-alive and the DNS cache wired into its pools."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault(
+            "socket_options",
+            HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+        )
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CachedDNSHTTPConnectionPool,
+            "https": _CachedDNSHTTPSConnectionPool,
+        }
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the pooled session shared by every WebGW call in the process.
+
+    Configured on first use from the environment (after `.secret` is loaded):
+      WEBGW_POOL_CONNECTIONS  number of per-host pools kept (default 4)
+      WEBGW_POOL_MAXSIZE      keep-alive connections per host (default 32); requests
+                              beyond it open extra connections that are closed after use
+      WEBGW_DNS_CACHE_TTL     seconds to cache DNS results, 0 disables (default 300)
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_connections = _env_int("WEBGW_POOL_CONNECTIONS", 4)
+            pool_maxsize = _env_int("WEBGW_POOL_MAXSIZE", 32)
+            _dns_cache.ttl = _env_int("WEBGW_DNS_CACHE_TTL", 300)
+
+            # Non-blocking pool: with every connection busy (e.g. on slow downloads) a
+            # request opens an extra one instead of waiting for a free one forever
+            adapter = WebGWAdapter(
+                pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=False
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+            logger.info(
+                f"WebGW session initialized: pool_connections={pool_connections}, "
+                f"pool_maxsize={pool_maxsize}, dns_cache_ttl={_dns_cache.ttl}s"
+            )
+        return _session
+
+
+class StreamingJSONBody:
+    """
+    A JSON request body that is serialized while it is being sent.
+
+    `json=` makes the HTTP client build the whole document as a str and then as
+    bytes, two extra copies of every base64 audio field per request. Here only
+    the small structural parts are pre-rendered; long base64 strings are kept
+    by reference and encoded to bytes one `chunk_size` slice at a time, so a
+    request adds O(chunk_size) memory on top of the payload it was given. The
+    exact length is known up front, so the body is sent with Content-Length
+    rather than chunked transfer encoding.
+    """
+
+    def __init__(self, value: Any, chunk_size: int = JSON_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        # bytes, or long ASCII-only strings to be sliced while sending
+        self._parts: List[Any] = []
+        self._buffer = bytearray()
+        self._add(value)
+        self._flush()
+        self.length = sum(len(part) for part in self._parts)
+
+    def _flush(self):
+        if self._buffer:
+            self._parts.append(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _add(self, value: Any):
+        if isinstance(value, dict):
+            self._buffer += b"{"
+            for index, (key, item) in enumerate(value.items()):
+                if index:
+                    self._buffer += b", "
+                self._buffer += json.dumps(str(key)).encode("utf-8") + b": "
+                self._add(item)
+            self._buffer += b"}"
+        elif isinstance(value, (list, tuple)):
+            self._buffer += b"["
+            for index, item in enumerate(value):
+                if index:
+                    self._buffer += b", "
+                self._add(item)
+            self._buffer += b"]"
+        elif (
+            isinstance(value, str)
+            and len(value) > self.chunk_size
+            and _BASE64_UNSAFE.search(value) is None
+        ):
+            # Base64 needs no escaping: stream the string itself between quotes.
+            self._buffer += b'"'
+            self._flush()
+            self._parts.append(value)
+            self._buffer += b'"'
+        else:
+            self._buffer += json.dumps(value).encode("utf-8")
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            for start in range(0, len(part), self.chunk_size):
+                yield part[start : start + self.chunk_size].encode("ascii")
+
+    async def aiter_bytes(self) -> AsyncIterator[bytes]:
+        # httpx treats anything iterable as a sync stream, so AsyncClient needs this.
+        for chunk in self:
+            yield chunk
+
+
+def split_binary_fields(request_body: dict) -> Tuple[dict, List[tuple]]:
+    """
+    Moves the base64 audio fields (`*_b64` strings or lists of strings) out of
+    `call_args` into raw multipart file parts named `call_args.<field>` (or
+    `call_args.<field>.<index>` for lists). The gateway base64-encodes each part
+    back into `call_args`, so services see the same arguments either way.
+    Returns the remaining envelope and the file parts.
+    """
+    call_args = dict(request_body.get("call_args") or {})
+    files = []
+    for field, value in list(call_args.items()):
+        if not field.endswith("_b64") or not value:
+            continue
+        if isinstance(value, str):
+            files.append((f"call_args.{field}", (field, base64.b64decode(value))))
+        elif isinstance(value, list) and all(isinstance(v, str) for v in value):
+            for index, item in enumerate(value):
+                files.append((f"call_args.{field}.{index}", (field, base64.b64decode(item))))
+        else:
+            continue
+        del call_args[field]
+    return {**request_body, "call_args": call_args}, files
+
+
+class WebGWClient:
+    """
+    Builds WebGW request envelopes and sends them over the shared pooled session.
+    Response handling stays with the caller, since each API project wraps its
+    results differently.
+
+    Projects listed in WEBGW_BINARY_UPLOAD (comma separated, or "*" for all) send
+    their audio as raw multipart/form-data parts instead of base64 inside the
+    JSON body (see `split_binary_fields()`). If the gateway answers that it does
+    not support multipart uploads the project falls back to JSON for the rest of
+    the process; a multipart request rejected as bad (HTTP 400) is retried as JSON.
+    """
+
+    def __init__(self, api_url: str, api_key: str, app_id: str):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.app_id = app_id
+        self.binary_projects = {
+            project.strip()
+            for project in os.environ.get("WEBGW_BINARY_UPLOAD", "").split(",")
+            if project.strip()
+        }
+        self._binary_unsupported = set()
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "Content-Type": "application/json",
+            "x-webgw-appid": self.app_id,
+            "x-webgw-version": WEBGW_HEADERS_VERSION,
+        }
+
+    @property
+    def multipart_headers(self) -> dict:
+        # Content-Type (with the boundary) is set by the HTTP client.
+        return {k: v for k, v in self.headers.items() if k != "Content-Type"}
+
+    def _binary_request(self, request_body: dict) -> Optional[Tuple[dict, List[tuple]]]:
+        """Returns (envelope, file parts) if `request_body` should go out as multipart."""
+        api_project = request_body.get("api_project")
+        if api_project in self._binary_unsupported:
+            return None
+        if api_project not in self.binary_projects and "*" not in self.binary_projects:
+            return None
+        envelope, files = split_binary_fields(request_body)
+        return (envelope, files) if files else None
+
+    def _multipart_rejected(self, api_project: str, status_code: int) -> bool:
+        """True if a multipart request has to be sent again as JSON."""
+        if status_code in MULTIPART_RETRY_STATUS:
+            logger.warning(
+                f"Multipart request rejected for {api_project} (HTTP {status_code}), "
+                f"retrying it as base64 JSON"
+            )
+            return True
+        if status_code not in MULTIPART_UNSUPPORTED_STATUS:
+            return False
+        self._binary_unsupported.add(api_project)
+        logger.warning(
+            f"Multipart upload rejected for {api_project} (HTTP {status_code}), "
+            f"falling back to base64 JSON"
+        )
+        return True
+
+    def build_request_body(
+        self, api_project: str, call_name: str, call_args: dict, call_token: Optional[str] = "token"
+    ) -> dict:
+        return {
+            "api_key": self.api_key,
+            "api_project": api_project,
+            "call_name": call_name,
+            "call_token": call_token,
+            "call_args": call_args,
+        }
+
+    def post(self, request_body: dict, timeout: float = 20) -> requests.Response:
+        binary = self._binary_request(request_body)
+        if binary is not None:
+            envelope, files = binary
+            response = get_session().post(
+                self.api_url,
+                headers=self.multipart_headers,
+                data={"request": json.dumps(envelope)},
+                files=files,
+                timeout=timeout,
+            )
+            if not self._multipart_rejected(request_body["api_project"], response.status_code):
+                return response
+        body = StreamingJSONBody(request_body)
+        return get_session().post(
+            self.api_url,
+            headers={**self.headers, "Content-Length": str(body.length)},
+            data=body,
+            timeout=timeout,
+        )
+
+    def call(
+        self,
+        api_project: str,
+        call_name: str,
+        call_args: dict,
+        call_token: Optional[str] = "token",
+        timeout: float = 20,
+    ) -> requests.Response:
+        request_body = self.build_request_body(api_project, call_name, call_args, call_token)
+        return self.post(request_body, timeout=timeout)
+
+
+# Async client ========================================================
+
+
+class _CachedDNSAsyncBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that routes TCP connects through the shared DNS cache."""
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend):
+        self._backend = backend
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        # TLS is started afterwards with the request's host name, not this address.
+        address = _dns_cache.lookup(host, port)
+        if address is None:
+            address = await asyncio.to_thread(_dns_cache.resolve, host, port)
+        try:
+            return await self._backend.connect_tcp(
+                address,
+                port,
+                timeout=timeout,
+                local_address=local_address,
+                socket_options=socket_options,
+            )
+        except Exception:
+            _dns_cache.forget(host, port)
+            raise
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+# One client per event loop: a client's connections belong to the loop it was created on
+_async_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+_async_clients_lock = threading.Lock()
+
+
+def _new_async_client() -> httpx.AsyncClient:
+    """A new AsyncClient with the WEBGW_* pool settings (see `get_async_client()`)."""
+    pool_maxsize = _env_int("WEBGW_POOL_MAXSIZE", 32)
+    keepalive_expiry = _env_int("WEBGW_KEEPALIVE_EXPIRY", 60)
+    _dns_cache.ttl = _env_int("WEBGW_DNS_CACHE_TTL", 300)
+
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=pool_maxsize,
+            max_keepalive_connections=pool_maxsize,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        socket_options=[(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+    )
+    pool = getattr(transport, "_pool", None)
+    if getattr(pool, "_network_backend", None) is not None:
+        pool._network_backend = _CachedDNSAsyncBackend(pool._network_backend)
+
+    client = httpx.AsyncClient(transport=transport)
+    logger.info(
+        f"WebGW async client initialized: max_connections={pool_maxsize}, "
+        f"keepalive_expiry={keepalive_expiry}s, dns_cache_ttl={_dns_cache.ttl}s"
+    )
+    return client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the httpx.AsyncClient shared by WebGW calls on the running event loop.
+
+    Uses the same settings as `get_session()`; WEBGW_POOL_MAXSIZE bounds the
+    connections opened to the WebGW host, and idle connections are kept alive
+    for WEBGW_KEEPALIVE_EXPIRY seconds (default 60).
+    """
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _new_async_client()
+            # Clients of loops that have closed cannot be used (or closed) any more
+            for other in [other for other in _async_clients if other.is_closed()]:
+                del _async_clients[other]
+            _async_clients[loop] = client
+    return client
+
+
+class AsyncWebGWClient(WebGWClient):
+    """Asyncio counterpart of WebGWClient, backed by the shared httpx.AsyncClient."""
+
+    async def post(self, request_body: dict, timeout: float = 20) -> httpx.Response:
+        binary = self._binary_request(request_body)
+        if binary is not None:
+            envelope, files = binary
+            response = await get_async_client().post(
+                self.api_url,
+                headers=self.multipart_headers,
+                data={"request": json.dumps(envelope)},
+                files=files,
+                timeout=timeout,
+            )
+            if not self._multipart_rejected(request_body["api_project"], response.status_code):
+                return response
+        body = StreamingJSONBody(request_body)
+        return await get_async_client().post(
+            self.api_url,
+            headers={**self.headers, "Content-Length": str(body.length)},
+            content=body.aiter_bytes(),
+            timeout=timeout,
+        )
+
+    async def call(
+        self,
+        api_project: str,
+        call_name: str,
+        call_args: dict,
+        call_token: Optional[str] = "token",
+        timeout: float = 20,
+    ) -> httpx.Response:
+        request_body = self.build_request_body(api_project, call_name, call_args, call_token)
+        return await self.post(request_body, timeout=timeout)